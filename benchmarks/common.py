@@ -0,0 +1,70 @@
+"""Helpers shared by the benchmarks."""
+
+import time
+import timeit
+from typing import Any, Callable, Optional, Sequence
+
+import irace.params as p
+from irace import Experiment, Scenario, ParameterSpace, Categorical, Real, Integer, Bool, batched
+
+
+def best_of(function: Callable[[], Any], repeat: int = 5, number: int = 1) -> float:
+    """The best time of `repeat` measurements of `number` calls, in seconds per call."""
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def report(timings: dict[str, float], baseline: Optional[str] = None) -> None:
+    for name, timing in timings.items():
+        relative = f" ({timings[baseline] / timing:5.1f}x)" if baseline is not None else ''
+        print(f"{name:>40}: {timing * 1e3:11.3f} ms{relative}")
+
+
+def no_op_target_runner(experiment: Experiment, scenario: Scenario) -> float:
+    return 0.0
+
+
+@batched
+def no_op_batch_target_runner(experiments: Sequence[Experiment], scenario: Scenario) -> list[float]:
+    return [0.0] * len(experiments)
+
+
+def sleeping_target_runner(experiment: Experiment, scenario: Scenario) -> float:
+    """A target runner that takes 5 ms, e.g. to measure how well parallel execution scales."""
+    time.sleep(0.005)
+    return experiment.configuration['x']
+
+
+def sized_parameter_space(n_params: int, depth: int = 0) -> ParameterSpace:
+    """
+    A parameter space with `n_params` parameters of all types. If `depth` is positive, every parameter is conditional
+    on the `depth` parameters before it, which gives conditions of `depth` nested `ValueOf` comparisons.
+    """
+
+    def active(j: int) -> p.RCondition:
+        # A condition that holds for every value of the parameter
+        if j % 4 < 2:
+            return p.ValueOf(f'x{j}').geq(0)
+        return p.ValueOf(f'x{j}').isin(['a', 'b', 'c'] if j % 4 == 2 else ['FALSE', 'TRUE'])
+
+    params = []
+    for i in range(n_params):
+        previous = range(max(i - depth, 0), i)
+        condition = p.all(*map(active, previous)) if previous else None
+        kind = i % 4
+        if kind == 0:
+            params.append(Real(f'x{i}', 0, 1, condition=condition))
+        elif kind == 1:
+            params.append(Integer(f'x{i}', 1, 100, log=True, condition=condition))
+        elif kind == 2:
+            params.append(Categorical(f'x{i}', ['a', 'b', 'c'], condition=condition))
+        else:
+            params.append(Bool(f'x{i}', condition=condition))
+    return ParameterSpace(params)
+
+
+# A small space for benchmarks of whole tunings
+tuning_parameter_space = ParameterSpace([
+    Real('x', 0, 1),
+    Integer('y', 1, 100),
+    Categorical('z', ['a', 'b', 'c']),
+])
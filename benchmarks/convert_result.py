@@ -0,0 +1,69 @@
+"""
+Compare `convert_result` with the previous row-by-row conversion via `convert_configuration`, both on the few elites
+irace usually returns and on large frames, which are converted column by column.
+"""
+
+import numpy as np
+import pandas as pd
+
+from irace import ParameterSpace, Categorical, Ordinal, Real, Integer, Bool
+from irace.codec import convert_configuration, convert_result
+
+from common import best_of, report
+
+parameter_space = ParameterSpace([
+    Categorical('algorithm', ['as', 'mmas', 'eas', 'ras', 'acs']),
+    Ordinal('localsearch', ['0', '1', '2', '3']),
+    Real('alpha', 0, 5),
+    Real('beta', 0, 10),
+    Integer('ants', 5, 100, log=True),
+    Bool('dlb'),
+])
+
+
+def raw_result(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """A frame shaped like the elites returned by irace, with some inactive (NA) parameters."""
+    rng = np.random.default_rng(seed)
+    alpha = rng.uniform(0, 5, n_rows)
+    alpha[rng.random(n_rows) < 0.1] = np.nan
+    return pd.DataFrame({
+        '.ID.': np.arange(n_rows),
+        'algorithm': rng.choice(['as', 'mmas', 'eas', 'ras', 'acs'], n_rows).astype(object),
+        'localsearch': rng.choice(['0', '1', '2', '3'], n_rows).astype(object),
+        'alpha': alpha,
+        'beta': rng.uniform(0, 10, n_rows),
+        'ants': rng.integers(5, 100, n_rows).astype(float),
+        'dlb': rng.choice(['FALSE', 'TRUE'], n_rows).astype(object),
+        '.PARENT.': np.zeros(n_rows),
+    })
+
+
+def convert_result_rowwise(result: pd.DataFrame) -> list[dict]:
+    result = result.loc[:, ~result.columns.str.startswith('.')]
+    return [convert_configuration(configuration, parameter_space) for configuration in result.to_dict('records')]
+
+
+ROWS = (5, 100, 10_000, 100_000)
+
+
+def run(quick: bool = False) -> dict[str, float]:
+    timings = {}
+    for n_rows in ROWS[:3] if quick else ROWS:
+        result = raw_result(n_rows)
+        timings[f'convert_result({n_rows} rows, records)'] = best_of(lambda: convert_result(result, parameter_space))
+        timings[f'convert_result({n_rows} rows, DataFrame)'] = \
+            best_of(lambda: convert_result(result, parameter_space, return_df=True))
+    return timings
+
+
+if __name__ == '__main__':
+    for n_rows in (5, 100_000):
+        result = raw_result(n_rows)
+        benchmarks = {
+            f'previous ({n_rows} rows, records)': lambda: convert_result_rowwise(result),
+            f'convert_result ({n_rows} rows, records)': lambda: convert_result(result, parameter_space),
+            f'convert_result ({n_rows} rows, DataFrame)':
+                lambda: convert_result(result, parameter_space, return_df=True),
+        }
+        report({name: best_of(fn) for name, fn in benchmarks.items()}, baseline=f'previous ({n_rows} rows, records)')
+    report(run())
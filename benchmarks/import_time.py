@@ -0,0 +1,47 @@
+"""Measure the time to import irace in a fresh interpreter, and the cost of starting R with `irace.warmup()`."""
+
+import subprocess
+import sys
+
+STATEMENTS = {
+    'import irace': 'import irace',
+    'build ParameterSpace': 'import irace; irace.ParameterSpace([irace.Real("x", 0, 1), irace.Bool("y")])',
+    'irace.warmup()': 'import irace; irace.warmup()',
+}
+
+TEMPLATE = '''
+import sys, time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start, 'rpy2' in sys.modules)
+'''
+
+
+def measure(statement: str, repeat: int = 5) -> tuple[float, bool]:
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', TEMPLATE.format(statement=statement)], check=True,
+                                capture_output=True, text=True).stdout.split()
+        timings.append((float(output[0]), output[1] == 'True'))
+    return min(timings)
+
+
+def run(quick: bool = False) -> dict[str, float]:
+    timings = {}
+    for name, statement in STATEMENTS.items():
+        try:
+            timings[name] = measure(statement, repeat=2 if quick else 5)[0]
+        except subprocess.CalledProcessError:
+            # `irace.warmup()` fails if R or the irace R package are not available
+            print(f"skipping {name}, it failed in a fresh interpreter")
+    return timings
+
+
+if __name__ == '__main__':
+    for name, statement in STATEMENTS.items():
+        try:
+            timing, loads_rpy2 = measure(statement)
+        except subprocess.CalledProcessError as e:
+            print(f"{name} failed in a fresh interpreter with exit code {e.returncode}:\n{e.stderr}", file=sys.stderr)
+            sys.exit(1)
+        print(f"{name:>22}: {timing * 1e3:9.1f} ms (rpy2 loaded: {loads_rpy2})")
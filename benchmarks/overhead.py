@@ -0,0 +1,33 @@
+"""Measure the overhead of the binding per experiment with a target runner that does nothing."""
+
+import time
+
+from irace import irace, Scenario, Profiler
+
+from common import no_op_target_runner, no_op_batch_target_runner, tuning_parameter_space, report
+
+N_EXPERIMENTS = 2000
+
+
+def overhead(target_runner, n_experiments: int) -> tuple[float, Profiler]:
+    profiler = Profiler()
+    scenario = Scenario(max_experiments=n_experiments, seed=42, profiler=profiler)
+    start = time.perf_counter()
+    irace(target_runner, tuning_parameter_space, scenario)
+    return (time.perf_counter() - start) / profiler.experiments, profiler
+
+
+def run(quick: bool = False) -> dict[str, float]:
+    n_experiments = N_EXPERIMENTS // 4 if quick else N_EXPERIMENTS
+    timings = {}
+    for name, target_runner in (('single', no_op_target_runner), ('batched', no_op_batch_target_runner)):
+        per_experiment, profiler = overhead(target_runner, n_experiments)
+        timings[f'per experiment ({name})'] = per_experiment
+        for section, histogram in profiler.sections.items():
+            if section not in ('setup', 'convert_result'):
+                timings[f'per experiment ({name}, {section})'] = histogram.sum / profiler.experiments
+    return timings
+
+
+if __name__ == '__main__':
+    report(run())
@@ -0,0 +1,24 @@
+"""Measure the time to build the R version of parameter spaces of increasing size and condition depth."""
+
+from irace import warmup
+from irace._rpy2 import py2rpy_parameter_space
+
+from common import best_of, sized_parameter_space, report
+
+SIZES = (10, 100, 500)
+DEPTHS = (0, 4, 16)
+
+
+def run(quick: bool = False) -> dict[str, float]:
+    warmup()
+    timings = {}
+    for n_params in SIZES[:2] if quick else SIZES:
+        for depth in DEPTHS:
+            parameter_space = sized_parameter_space(n_params, depth)
+            timings[f'py2rpy_parameter_space({n_params}, depth={depth})'] = \
+                best_of(lambda: py2rpy_parameter_space(parameter_space))
+    return timings
+
+
+if __name__ == '__main__':
+    report(run())
@@ -0,0 +1,87 @@
+"""
+Run the benchmarks and optionally compare them with an earlier run, e.g.
+
+    python benchmarks/run.py --output main.json
+    python benchmarks/run.py --compare main.json
+
+Benchmarks that need R are skipped if R or the irace package are not available. With `--compare`, the exit code is
+non-zero if any benchmark is slower than in the earlier run by more than `--threshold`.
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import sys
+import traceback
+
+MODULES = {
+    'import_time': False,
+    'convert_result': False,
+    'parameter_space': True,
+    'overhead': True,
+    'scaling': True,
+}
+
+
+def r_available() -> bool:
+    try:
+        from irace import warmup
+        warmup()
+        return True
+    except Exception:
+        return False
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmarks', nargs='*', help=f"benchmarks to run, out of {', '.join(MODULES)} (all by default)")
+    parser.add_argument('--quick', action='store_true', help='run smaller versions of the benchmarks')
+    parser.add_argument('--output', help='write the timings to this JSON file')
+    parser.add_argument('--compare', help='compare the timings with this JSON file')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='ratio to the earlier timing above which a benchmark counts as a regression')
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(MODULES)
+    if unknown:
+        parser.error(f"unknown benchmarks {', '.join(sorted(unknown))}")
+
+    has_r = r_available()
+    timings = {}
+    for name in args.benchmarks or MODULES:
+        if MODULES[name] and not has_r:
+            print(f"skipping {name}, R or the irace R package are not available")
+            continue
+        print(f"running {name}")
+        try:
+            results = importlib.import_module(name).run(quick=args.quick)
+        except Exception:
+            traceback.print_exc()
+            continue
+        timings.update({f'{name}: {key}': value for key, value in results.items()})
+
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump(dict(python=sys.version, machine=platform.machine(), processor=platform.processor(),
+                           quick=args.quick, timings=timings), file, indent=2)
+
+    baseline = {}
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline = json.load(file)['timings']
+
+    regressions = 0
+    for key, timing in timings.items():
+        line = f"{key:>72}: {timing * 1e3:11.3f} ms"
+        if key in baseline and baseline[key] > 0:
+            ratio = timing / baseline[key]
+            regression = ratio > args.threshold
+            regressions += regression
+            line += f" {ratio:6.2f}x{'  REGRESSION' if regression else ''}"
+        print(line)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
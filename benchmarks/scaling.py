@@ -0,0 +1,48 @@
+"""
+Measure how tunings with a target runner that takes 5 ms scale with `Scenario.n_jobs`, and compare the ways of
+running several tunings with `multi_irace`.
+"""
+
+import os
+import time
+
+from irace import irace, multi_irace, Run, Scenario
+
+from common import sleeping_target_runner, tuning_parameter_space, report
+
+N_EXPERIMENTS = 400
+N_RUNS = 4
+
+
+def n_jobs_options() -> list[int]:
+    cpus = os.cpu_count() or 1
+    return [n for n in (1, 2, 4, 8, 16) if n <= cpus]
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def run(quick: bool = False) -> dict[str, float]:
+    n_experiments = N_EXPERIMENTS // 4 if quick else N_EXPERIMENTS
+    timings = {}
+
+    for n_jobs in n_jobs_options():
+        scenario = Scenario(max_experiments=n_experiments, n_jobs=n_jobs, seed=42)
+        timings[f'irace (n_jobs={n_jobs})'] = timed(
+            lambda: irace(sleeping_target_runner, tuning_parameter_space, scenario))
+
+    n_jobs = min(N_RUNS, os.cpu_count() or 1)
+    runs = [Run(sleeping_target_runner, tuning_parameter_space, Scenario(max_experiments=n_experiments, seed=i))
+            for i in range(N_RUNS)]
+    timings[f'multi_irace R (n_jobs={n_jobs})'] = timed(lambda: multi_irace(runs, n_jobs=n_jobs))
+    timings[f'multi_irace joblib (n_jobs={n_jobs})'] = timed(lambda: multi_irace(runs, n_jobs=n_jobs, joblib=True))
+    timings[f'multi_irace shared pool ({n_jobs} workers)'] = timed(
+        lambda: multi_irace(runs, shared_pool=n_jobs, joblib=True))
+    return timings
+
+
+if __name__ == '__main__':
+    report(run())
@@ -1,5 +1,26 @@
-from .base import irace, multi_irace, Run
+from .base import irace, iirace, multi_irace, imulti_irace, Run, warmup
+from .session import IraceSession
+from .events import ExperimentEvent, IterationEvent, Progress
 from .experiment import Experiment
 from .params import ParameterSpace, Real, Integer, Categorical, Ordinal, Bool
 from .scenario import Scenario
-from .runner import TargetRunner
+from .runner import TargetRunner, BatchTargetRunner, AsyncTargetRunner, batched
+from .cache import EvaluationCache, MemoryCache, SQLiteCache
+from .journal import Journal
+from .racelog import RaceLog
+from .profiling import Profiler
+
+
+def __getattr__(name: str):
+    # The instance stores and the testing phase need numpy and the distributed executor needs multiprocessing, which
+    # are only imported once they are used
+    if name in ('InstanceStore', 'SharedInstanceStore', 'LazyInstanceStore'):
+        from . import instances
+        return getattr(instances, name)
+    if name == 'DistributedExecutor':
+        from .distributed import DistributedExecutor
+        return DistributedExecutor
+    if name == 'evaluate_elites':
+        from .testing import evaluate_elites
+        return evaluate_elites
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,37 +1,63 @@
 import logging
 import math
 from collections import OrderedDict
-from collections.abc import Mapping, Collection
-from typing import Any, Optional
+from functools import cache
+from pathlib import Path
+from typing import Any, Callable, Optional
 
 import numpy as np
 import pandas as pd
 from rpy2 import rinterface, robjects, rinterface_lib
+from rpy2.rinterface_lib import openrlib
 from rpy2.rinterface import SexpClosure, ListSexpVector, rternalize
+# Re-exported, so that callers can catch errors of R without importing rpy2 themselves
+from rpy2.rinterface_lib.embedded import RRuntimeError as RRuntimeError
 from rpy2.robjects import ListVector, StrVector, RObject
 from rpy2.robjects import numpy2ri, pandas2ri
-from rpy2.robjects.packages import importr, PackageNotInstalledError
+from rpy2.robjects.conversion import Converter
+from rpy2.robjects.packages import importr, Package, PackageNotInstalledError
 
 from . import params as p
+from .codec import na_mask, convert_result
+from .events import Monitor
+from .expressions import to_columns, _as_string
+from .execution import execute_experiments
 from .experiment import Experiment
 from .params import ParameterSpace
-from .runner import TargetRunner
+from .racelog import RaceLog
+from .runner import TargetRunner, BatchTargetRunner
 from .scenario import Scenario
 
 rinterface_lib.callbacks.logger.setLevel(logging.ERROR)  # will display errors, but not warnings
 
-try:
-    _irace = importr("irace")
-except PackageNotInstalledError as e:
-    raise PackageNotInstalledError(
-        'The R package irace needs to be installed for this python binding to work. '
-        'Consider running `Rscript -e "install.packages(\'irace\', repos=\'https://cloud.r-project.org\')"`'
-        ' in your shell. '
-        'See more details at https://github.com/mLopez-Ibanez/irace#quick-start') from e
 
-converter = robjects.default_converter + robjects.numpy2ri.converter + robjects.pandas2ri.converter
+@cache
+def irace_package() -> Package:
+    """The irace R package, loaded on first use."""
+    try:
+        return importr("irace")
+    except PackageNotInstalledError as e:
+        raise PackageNotInstalledError(
+            'The R package irace needs to be installed for this python binding to work. '
+            'Consider running `Rscript -e "install.packages(\'irace\', repos=\'https://cloud.r-project.org\')"`'
+            ' in your shell. '
+            'See more details at https://github.com/mLopez-Ibanez/irace#quick-start') from e
 
 
+@cache
+def get_converter() -> Converter:
+    """The combined numpy and pandas converter, built on first use."""
+    return robjects.default_converter + numpy2ri.converter + pandas2ri.converter
+
+
+def __getattr__(name: str) -> Any:
+    # The irace package and the converter used to be created eagerly as module attributes
+    if name == '_irace':
+        return irace_package()
+    elif name == 'converter':
+        return get_converter()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def rpy2py_recursive(data: Any) -> Any:
     """
@@ -59,81 +85,83 @@ def rpy2py_recursive(data: Any) -> Any:
             return data  # We reached the end of recursion
 
 
-def convert_configuration(raw_configuration: dict[str, Any], parameter_space: ParameterSpace) -> dict[str, Any]:
-    """Convert the raw configuration into the appropriate type for the corresponding parameter subspace."""
+_NA_TYPES = (rinterface_lib.sexp.NARealType, rinterface_lib.sexp.NAIntegerType,
+             rinterface_lib.sexp.NACharacterType, rinterface_lib.sexp.NALogicalType)
 
-    configuration = OrderedDict()
 
-    for name, raw_param in raw_configuration.items():
-        subspace = parameter_space.get_subspace(name)
+def rpy2py_vector(vector: rinterface.Sexp) -> Any:
+    """
+    Convert an atomic R vector without going through the robjects layer.
+    Scalars become Python values (`None` for NA), longer numeric vectors become numpy views on the R memory.
+    """
+    if len(vector) == 0:
+        return None
+    elif len(vector) == 1:
+        value = vector[0]
+        if isinstance(value, _NA_TYPES) or (isinstance(value, float) and math.isnan(value)):
+            return None
+        return value
+    elif isinstance(vector, (rinterface.FloatSexpVector, rinterface.IntSexpVector)):
+        return np.asarray(vector.memoryview())
+    else:
+        return [None if isinstance(value, _NA_TYPES) else value for value in vector]
 
-        # Ignore unknown metadata keys
-        if subspace is None:
-            continue
 
-        if raw_param is None or (isinstance(raw_param, float) and math.isnan(raw_param)):
-            configuration[name] = None
-            continue
+class ExperimentDecoder:
+    """
+    Decodes the experiment lists passed by irace to the target runner.
+    The layout of the experiment list and of its configuration is looked up once, all later experiments are
+    read by index.
+    """
 
-        if isinstance(subspace, p.Real):
-            param = float(raw_param) if not isinstance(raw_param, rinterface_lib.sexp.NARealType) else None
-        elif isinstance(subspace, p.Integer):
-            param = int(raw_param) if not isinstance(raw_param, rinterface_lib.sexp.NAIntegerType) else None
-        elif isinstance(subspace, p.Bool):
-            # Bool values come as strings "TRUE" or "FALSE" from R
-            if isinstance(raw_param, str):
-                param = raw_param == "TRUE"
-            else:
-                param = None
-        elif isinstance(subspace, (p.Categorical, p.Ordinal)):
-            # Categorical and ordinal values are passed as strings directly
-            param = str(raw_param) if not isinstance(raw_param, rinterface_lib.sexp.NACharacterType) else None
+    def __init__(self, scenario: Scenario, parameter_space: ParameterSpace) -> None:
+        self.scenario = scenario
+        self.parameter_space = parameter_space
+        self._fields: Optional[dict[str, int]] = None
+        self._slots: Optional[list[tuple[str, int, Callable[[Any], Any]]]] = None
+
+    def _layout(self, obj: ListSexpVector) -> tuple[dict[str, int], list[tuple[str, int, Callable[[Any], Any]]]]:
+        if self._fields is None:
+            self._fields = {name: i for i, name in enumerate(obj.names)}
+            configuration = obj[self._fields['configuration']]
+            converters = self.parameter_space.codec.value_converters
+            self._slots = [(name, i, converters[name]) for i, name in enumerate(configuration.names)
+                           if name in converters]
+        return self._fields, self._slots
+
+    def __call__(self, obj: ListSexpVector) -> Experiment:
+        fields, slots = self._layout(obj)
+
+        configuration_id = str(rpy2py_vector(obj[fields['id_configuration']]))
+        seed = int(rpy2py_vector(obj[fields['seed']]))
+
+        if self.scenario.instances is not None:
+            instance_id = str(rpy2py_vector(obj[fields['id_instance']]))
+            instance = self.scenario.instances[int(rpy2py_vector(obj[fields['instance']]))]
         else:
-            param = None
-
-        configuration[name] = param
+            instance_id = None
+            instance = None
 
-    return configuration
+        bound = rpy2py_vector(obj[fields['bound']]) if 'bound' in fields else None
 
+        raw_configuration = obj[fields['configuration']]
+        configuration = {}
+        for name, i, convert in slots:
+            value = rpy2py_vector(raw_configuration[i])
+            configuration[name] = None if value is None else convert(value)
 
-def convert_result(result: pd.DataFrame, parameter_space: ParameterSpace, return_df: bool = False,
-                   remove_metadata: bool = True) -> pd.DataFrame | list[dict[str, Any]]:
-    if remove_metadata:
-        result = result.loc[:, ~result.columns.str.startswith('.')]
+        return Experiment(
+            configuration_id=configuration_id,
+            instance_id=instance_id,
+            seed=seed,
+            instance=instance,
+            configuration=configuration,
+            bound=float(bound) if bound is not None else None,
+        )
 
-    result = [convert_configuration(configuration, parameter_space)
-              for configuration in result.to_dict('records')]
 
-    if return_df:
-        return pd.DataFrame.from_records(result)
-    else:
-        return result
-
-
-def rpy2py_experiment(obj: ListVector, scenario: Scenario, parameter_space: ParameterSpace) -> Experiment:
-    experiment = rpy2py_recursive(obj)
-
-    configuration_id = str(experiment['id_configuration'])
-    seed = int(experiment['seed'])
-
-    if scenario.instances is not None:
-        instance_id = str(experiment['id_instance'])
-        instance = scenario.instances[int(experiment['instance'])]
-    else:
-        instance_id = None
-        instance = None
-
-    configuration = convert_configuration(experiment['configuration'], parameter_space)
-
-    experiment = Experiment(
-        configuration_id=configuration_id,
-        instance_id=instance_id,
-        seed=seed,
-        instance=instance,
-        configuration=configuration,
-    )
-
-    return experiment
+def rpy2py_experiment(obj: ListSexpVector, scenario: Scenario, parameter_space: ParameterSpace) -> Experiment:
+    return ExperimentDecoder(scenario, parameter_space)(obj)
 
 
 def py2rpy_expression(value: Any) -> RObject:
@@ -145,6 +173,7 @@ def py2rpy_quote(value: Any) -> RObject:
 
 
 def py2rpy_parameter_space(parameter_space: ParameterSpace) -> ListVector:
+    _irace = irace_package()
     r_parameter_space = []
     for subspace in parameter_space.params.values():
         if subspace.condition is not None:
@@ -181,35 +210,266 @@ def py2rpy_parameter_space(parameter_space: ParameterSpace) -> ListVector:
     return _irace.parametersNew(*r_parameter_space, forbidden=forbidden)
 
 
-def py2rpy_target_runner(target_runner: TargetRunner, scenario: Scenario,
-                         parameter_space: ParameterSpace) -> SexpClosure:
-    """Converts a Python `TargetRunner` into an R-callable function that properly converts types."""
+def py2rpy_configurations(configurations: pd.DataFrame | list[dict[str, Any]],
+                          parameter_space: ParameterSpace) -> robjects.DataFrame:
+    """
+    Encode configurations as the data frame irace expects for `initConfigurations`: numeric columns for `Real` and
+    `Integer` parameters, character columns for the others (`Bool` as "TRUE" and "FALSE") and NA for inactive values.
+    """
 
-    @rternalize
-    def inner(experiment: ListSexpVector, _: ListSexpVector) -> ListVector:
-        experiment = rpy2py_experiment(ListVector(experiment), scenario, parameter_space)
+    columns, n = to_columns(configurations, names=parameter_space.params)
+    r_columns = OrderedDict()
+    for name, subspace in parameter_space.params.items():
+        values = columns.get(name, np.full(n, np.nan))
+        if isinstance(subspace, p.NumericalParameterSubspace):
+            values = values.astype(float) if values.dtype != object else \
+                np.array([np.nan if v is None else float(v) for v in values.tolist()], dtype=float)
+            na = np.isnan(values)
+            if isinstance(subspace, p.Integer):
+                r_columns[name] = robjects.IntVector([robjects.NA_Integer if missing else int(v)
+                                                      for v, missing in zip(values.tolist(), na.tolist())])
+            else:
+                r_columns[name] = robjects.FloatVector([robjects.NA_Real if missing else v
+                                                        for v, missing in zip(values.tolist(), na.tolist())])
+        else:
+            r_columns[name] = StrVector([robjects.NA_Character if v is None else v
+                                         for v in _as_string(values).tolist()])
+
+    return robjects.DataFrame(r_columns)
+
+
+@cache
+def _iteration_elites() -> SexpClosure:
+    return robjects.r('''
+function(log_file) {
+    results <- irace::read_logfile(log_file)
+    ids <- results$allElites[[length(results$allElites)]]
+    configurations <- results$allConfigurations
+    list(iteration = length(results$allElites),
+         elites = configurations[match(ids, configurations$.ID.), , drop = FALSE])
+}
+''')
+
+
+def rpy2py_iteration_elites(log_file: str | Path, parameter_space: ParameterSpace, return_df: bool = False,
+                            remove_metadata: bool = True) -> tuple[int, pd.DataFrame | list[dict[str, Any]]]:
+    """Read the number of finished iterations and the current elites from an irace log file."""
+    r_result = _iteration_elites()(str(log_file))
+    iteration = int(r_result.rx2('iteration')[0])
+    elites = get_converter().rpy2py(r_result.rx2('elites'))
+    return iteration, convert_result(elites, parameter_space, return_df=return_df, remove_metadata=remove_metadata)
+
+
+@cache
+def _race_log() -> SexpClosure:
+    # Supports the layout of the log of irace 4 (`state$experiment_log`, `state$instances_log`) and of older versions
+    return robjects.r('''
+function(log_file) {
+    results <- irace::read_logfile(log_file)
+    state <- results$state
+    log <- results$experimentLog
+    if (is.null(log)) log <- state$experiment_log
+    log <- as.data.frame(log)
+    instances <- state$instances_log
+    if (is.null(instances)) instances <- state$.irace$instancesList
+    if (is.null(instances)) instances <- results$instancesList
+    instances <- as.data.frame(instances)
+    experiments <- results$experiments
+    cost <- experiments[cbind(log$instance, match(as.character(log$configuration), colnames(experiments)))]
+    missing <- rep(NA_real_, nrow(log))
+    elites <- results$allElites
+    list(iteration = as.integer(log$iteration),
+         configuration_id = as.integer(log$configuration),
+         instance_id = as.integer(log$instance),
+         instance = as.integer(instances$instanceID[log$instance]),
+         seed = as.integer(instances$seed[log$instance]),
+         cost = as.numeric(cost),
+         time = if (is.null(log$time)) missing else as.numeric(log$time),
+         bound = if (is.null(log$bound)) missing else as.numeric(log$bound),
+         configurations = results$allConfigurations,
+         elite_iteration = as.integer(rep(seq_along(elites), lengths(elites))),
+         elite_rank = as.integer(unlist(lapply(elites, seq_along))),
+         elite_configuration_id = as.integer(unlist(elites)))
+}
+''')
+
+
+# R represents NA in integer vectors by the smallest 32-bit integer
+_NA_INTEGER = np.iinfo(np.int32).min
+
+
+def rpy2py_integers(vector: Any) -> pd.arrays.IntegerArray:
+    """Convert an R integer vector in bulk to a nullable integer array."""
+    values = np.asarray(vector.memoryview()) if len(vector) > 0 else np.empty(0, dtype=np.int32)
+    return pd.arrays.IntegerArray(values.astype(np.int64), values == _NA_INTEGER)
+
+
+def _ids(column: pd.Series) -> pd.arrays.IntegerArray:
+    values = pd.to_numeric(column.mask(na_mask(column)), errors='coerce').to_numpy(dtype=float)
+    na = np.isnan(values) | (values == _NA_INTEGER)
+    return pd.arrays.IntegerArray(np.where(na, 0, values).astype(np.int64), na)
+
+
+def rpy2py_doubles(vector: Any) -> np.ndarray:
+    """Convert an R double vector in bulk to a float array, where NA becomes NaN."""
+    return np.array(vector.memoryview()) if len(vector) > 0 else np.empty(0, dtype=np.float64)
+
+
+def rpy2py_race_log(log_file: str | Path, parameter_space: ParameterSpace) -> RaceLog:
+    """Read the complete history of a run from an irace log file."""
+
+    r_log = _race_log()(str(log_file))
+    integers = {name: rpy2py_integers(r_log.rx2(name)) for name in
+                ('iteration', 'configuration_id', 'instance_id', 'instance', 'seed',
+                 'elite_iteration', 'elite_rank', 'elite_configuration_id')}
+    doubles = {name: rpy2py_doubles(r_log.rx2(name)) for name in ('cost', 'time', 'bound')}
+
+    experiments = pd.DataFrame({
+        'iteration': integers['iteration'],
+        'configuration_id': integers['configuration_id'],
+        'instance_id': integers['instance_id'],
+        # irace numbers the instances from 1, `Scenario.instances` from 0
+        'instance': integers['instance'] - 1,
+        'seed': integers['seed'],
+        'cost': doubles['cost'],
+        'time': doubles['time'],
+        'bound': doubles['bound'],
+    })
+
+    raw_configurations = get_converter().rpy2py(r_log.rx2('configurations'))
+    configurations = convert_result(raw_configurations, parameter_space, return_df=True, remove_metadata=True)
+    configurations.insert(0, 'configuration_id', _ids(raw_configurations['.ID.']))
+    configurations.insert(1, 'parent_id', _ids(raw_configurations['.PARENT.']))
+
+    elites = pd.DataFrame({
+        'iteration': integers['elite_iteration'],
+        'rank': integers['elite_rank'],
+        'configuration_id': integers['elite_configuration_id'],
+    })
+
+    return RaceLog(experiments=experiments, configurations=configurations, elites=elites)
+
+
+def disable_stack_check() -> None:
+    """Allow R to be called from a thread other than the main thread, which R's C stack check would reject."""
+    openrlib.rlib.R_CStackLimit = openrlib.ffi.cast('uintptr_t', -1)
+
+
+def py2rpy_result(result: dict[str, Any]) -> ListVector:
+    return ListVector(result)
+
+
+def target_runner_function(target_runner: TargetRunner | BatchTargetRunner, scenario: Scenario,
+                           parameter_space: ParameterSpace, monitor: Optional[Monitor] = None) \
+        -> Callable[[ListSexpVector, ListSexpVector], ListVector]:
+    """The Python side of `py2rpy_target_runner`, which still needs to be passed to `rternalize`."""
+
+    decode = ExperimentDecoder(scenario, parameter_space)
 
-        try:
-            result = target_runner(experiment, scenario)
+    def inner(experiment: ListSexpVector, _: ListSexpVector) -> ListVector:
+        profiler = scenario.profiler
+        start = profiler.call() if profiler is not None else 0
+        if monitor is not None:
+            monitor.poll()
+            if monitor.should_stop():
+                return py2rpy_result(monitor.stop_result())
+        if profiler is not None:
+            start = profiler.lap('monitor', start)
+        experiment = decode(experiment)
+        if profiler is not None:
+            start = profiler.lap('decode', start)
+        [result] = execute_experiments(target_runner, [experiment], scenario)
+        if profiler is not None:
+            start = profiler.lap('target', start)
+        if monitor is not None:
+            monitor.completed([experiment], [result])
+        if profiler is not None:
+            start = profiler.lap('callbacks', start)
+        r_result = py2rpy_result(result)
+        if profiler is not None:
+            profiler.returned(start, 1)
+        return r_result
 
-            if isinstance(result, Collection) and len(result) == 2:
-                cost, time = result
-                r_result = ListVector(dict(cost=float(cost), time=float(time)))
-            elif isinstance(result, Mapping):
-                r_result = ListVector({key: float(value) for key, value in result.items()})
-            else:
-                r_result = ListVector(dict(cost=float(result)))
+    return inner
 
-        except Exception as e:
-            r_result = ListVector(dict(cost=math.inf, error=str(e)))
 
-        return r_result
+def target_runner_parallel_function(target_runner: TargetRunner | BatchTargetRunner, scenario: Scenario,
+                                    parameter_space: ParameterSpace, monitor: Optional[Monitor] = None) \
+        -> Callable[..., ListSexpVector]:
+    """The Python side of `py2rpy_target_runner_parallel`, which still needs to be passed to `rternalize`."""
+
+    decode = ExperimentDecoder(scenario, parameter_space)
+
+    def inner(experiments: ListSexpVector, *_: Any, **__: Any) -> ListSexpVector:
+        profiler = scenario.profiler
+        start = profiler.call() if profiler is not None else 0
+        if monitor is not None:
+            monitor.poll()
+            if monitor.should_stop():
+                return ListSexpVector([py2rpy_result(monitor.stop_result()) for _ in range(len(experiments))])
+        if profiler is not None:
+            start = profiler.lap('monitor', start)
+        experiments = [decode(experiment) for experiment in experiments]
+        if profiler is not None:
+            start = profiler.lap('decode', start)
+        results = execute_experiments(target_runner, experiments, scenario)
+        if profiler is not None:
+            start = profiler.lap('target', start)
+        if monitor is not None:
+            monitor.completed(experiments, results)
+        if profiler is not None:
+            start = profiler.lap('callbacks', start)
+        r_results = ListSexpVector([py2rpy_result(result) for result in results])
+        if profiler is not None:
+            profiler.returned(start, len(results))
+        return r_results
 
     return inner
 
 
+def py2rpy_target_runner(target_runner: TargetRunner | BatchTargetRunner, scenario: Scenario,
+                         parameter_space: ParameterSpace, monitor: Optional[Monitor] = None) -> SexpClosure:
+    """Converts a Python `TargetRunner` into an R-callable function that properly converts types."""
+    return rternalize(target_runner_function(target_runner, scenario, parameter_space, monitor))
+
+
+def py2rpy_target_runner_parallel(target_runner: TargetRunner | BatchTargetRunner, scenario: Scenario,
+                                  parameter_space: ParameterSpace, monitor: Optional[Monitor] = None) -> SexpClosure:
+    """
+    Converts a Python target runner into an R function suitable for irace's `targetRunnerParallel`,
+    which receives all experiments of a race step at once.
+    """
+    return rternalize(target_runner_parallel_function(target_runner, scenario, parameter_space, monitor))
+
+
+class Trampolines:
+    """
+    A pair of R functions for `targetRunner` and `targetRunnerParallel` that are created once and forward to
+    whichever target runner is currently bound, so that consecutive tunings do not register new R closures.
+    """
+
+    def __init__(self) -> None:
+        self._target_runner: Optional[Callable[..., ListVector]] = None
+        self._target_runner_parallel: Optional[Callable[..., ListSexpVector]] = None
+        self.target_runner = rternalize(lambda *args: self._target_runner(*args))
+        self.target_runner_parallel = rternalize(lambda *args, **kwargs: self._target_runner_parallel(*args, **kwargs))
+
+    def bind(self, target_runner: TargetRunner | BatchTargetRunner, scenario: Scenario,
+             parameter_space: ParameterSpace, monitor: Optional[Monitor] = None) -> None:
+        self._target_runner = target_runner_function(target_runner, scenario, parameter_space, monitor)
+        self._target_runner_parallel = target_runner_parallel_function(target_runner, scenario, parameter_space,
+                                                                       monitor)
+
+    def unbind(self) -> None:
+        self._target_runner = None
+        self._target_runner_parallel = None
+
+
 def py2rpy_scenario(scenario: Scenario, r_target_runner: SexpClosure,
-                    r_parameter_space: Optional[ListVector] = None) -> ListVector:
+                    r_parameter_space: Optional[ListVector] = None,
+                    r_target_runner_parallel: Optional[SexpClosure] = None,
+                    log_file: Optional[str | Path] = None,
+                    r_initial_configurations: Optional[robjects.DataFrame] = None) -> ListVector:
     r_scenario = {
         'targetRunner': r_target_runner,
         'elitist': int(scenario.elitist),
@@ -222,20 +482,35 @@ def py2rpy_scenario(scenario: Scenario, r_target_runner: SexpClosure,
     if r_parameter_space is not None:
         r_scenario['parameters'] = r_parameter_space
 
+    if r_target_runner_parallel is not None:
+        r_scenario['targetRunnerParallel'] = r_target_runner_parallel
+
     if scenario.max_experiments is not None:
         r_scenario['maxExperiments'] = scenario.max_experiments
 
+    if scenario.capping:
+        r_scenario['capping'] = 1
+        r_scenario['boundMax'] = scenario.bound_max
+        r_scenario['cappingType'] = scenario.capping_type
+        r_scenario['boundType'] = scenario.bound_type
+
     if scenario.min_experiments is not None:
         r_scenario['minExperiments'] = scenario.min_experiments
 
+    if r_initial_configurations is not None:
+        r_scenario['initConfigurations'] = r_initial_configurations
+
     if scenario.instances is not None and scenario.instances:
         r_scenario['instances'] = list(range(len(scenario.instances)))
     else:
         # Provide a dummy instance
         r_scenario['instances'] = [0]
 
-    if scenario.log_file is not None:
-        r_scenario['logFile'] = scenario.log_file
+    if log_file is None:
+        log_file = scenario.log_file
+
+    if log_file is not None:
+        r_scenario['logFile'] = str(log_file)
     else:
         r_scenario['logFile'] = ""
 
@@ -0,0 +1,61 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Optional, Sequence
+
+from .execution import normalize_cost, error_result
+from .experiment import Experiment
+from .runner import AsyncTargetRunner
+from .scenario import Scenario
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_loop_lock = threading.Lock()
+
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """
+    The event loop that runs async target runners. It runs in a background thread for the lifetime of the process,
+    so that it is independent of any loop of the caller and objects bound to it (e.g. client sessions) can be reused
+    across race steps and runs.
+    """
+
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            # The thread of the loop does not exist in a forked process (e.g. by R for `Scenario.n_jobs`)
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name='irace-event-loop', daemon=True).start()
+        return _loop
+
+
+async def _execute_experiment(target_runner: AsyncTargetRunner, experiment: Experiment, scenario: Scenario,
+                              semaphore: asyncio.Semaphore) -> dict[str, Any]:
+    async with semaphore:
+        timeout = scenario.experiment_timeout(experiment)
+        start = time.perf_counter()
+        try:
+            return normalize_cost(await asyncio.wait_for(target_runner(experiment, scenario), timeout))
+        except asyncio.TimeoutError:
+            return dict(cost=scenario.timeout_cost, time=time.perf_counter() - start)
+        except Exception as e:
+            return error_result(e)
+
+
+async def _execute_experiments(target_runner: AsyncTargetRunner, experiments: Sequence[Experiment],
+                               scenario: Scenario) -> list[dict[str, Any]]:
+    semaphore = asyncio.Semaphore(scenario.max_concurrency)
+    return await asyncio.gather(*(_execute_experiment(target_runner, experiment, scenario, semaphore)
+                                  for experiment in experiments))
+
+
+def execute_async_experiments(target_runner: AsyncTargetRunner, experiments: Sequence[Experiment],
+                              scenario: Scenario) -> list[dict[str, Any]]:
+    """
+    Run the experiments concurrently on the event loop of the binding, with at most `scenario.max_concurrency` in
+    flight. A timeout of the scenario cancels the experiment instead of killing a process.
+    """
+    future = asyncio.run_coroutine_threadsafe(_execute_experiments(target_runner, experiments, scenario), event_loop())
+    return future.result()
@@ -1,57 +1,390 @@
-from typing import Any, Iterable, Optional
-
-import pandas as pd
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager, ExitStack
+from functools import partial
+from typing import Any, Callable, Iterable, Iterator, Optional, TYPE_CHECKING
 
+from .events import ExperimentEvent, IterationEvent, Monitor, Elites
 from .params import ParameterSpace
-from .runner import TargetRunner
+from .execution import uses_target_runner_parallel
+from .profiling import Profiler
+from .runner import TargetRunner, BatchTargetRunner
 from .scenario import Scenario
 
+if TYPE_CHECKING:
+    import pandas as pd
+    from .session import IraceSession
 
-def irace(target_runner: TargetRunner, parameter_space: ParameterSpace, scenario: Scenario, return_df: bool = False,
-          remove_metadata: bool = True) -> pd.DataFrame | list[dict[str, Any]]:
-    """irace: Iterated Racing for Automatic Algorithm Configuration."""
-
-    from ._rpy2 import _irace, py2rpy_scenario, py2rpy_target_runner, py2rpy_parameter_space, converter, convert_result
-
-    r_target_runner = py2rpy_target_runner(target_runner, scenario, parameter_space)
-    r_parameter_space = py2rpy_parameter_space(parameter_space)
-    print(r_parameter_space)
-    r_scenario = py2rpy_scenario(scenario, r_target_runner, r_parameter_space)
 
-    result = _irace.irace(r_scenario)
-    result = converter.rpy2py(result)
+def warmup() -> None:
+    """Start the embedded R session and load the irace R package and converters, which otherwise happens on first use."""
+    from ._rpy2 import irace_package, get_converter
 
-    return convert_result(result, parameter_space, return_df=return_df, remove_metadata=remove_metadata)
+    irace_package()
+    get_converter()
 
 
 class Run:
-    """A single run of irace with a given target runner and scenario."""
+    """
+    A single run of irace with a given target runner and scenario.
+    `initial_configurations` (e.g. the elites of an earlier run) are evaluated by irace in its first iteration.
+    If `race_log` is set, the complete history of the run is exported to that directory (see `RaceLog`).
+    `weight` is the share of the workers the run gets if `multi_irace` runs with a `shared_pool`.
+    """
 
-    def __init__(self, target_runner: TargetRunner, parameter_space: ParameterSpace, scenario: Scenario,
-                 name: Optional[str] = None) -> None:
+    def __init__(self, target_runner: TargetRunner | BatchTargetRunner, parameter_space: ParameterSpace, scenario: Scenario,
+                 name: Optional[str] = None,
+                 initial_configurations: 'Optional[pd.DataFrame | Iterable[dict[str, Any]]]' = None,
+                 race_log: Optional[str | os.PathLike] = None, weight: float = 1.0) -> None:
         self.target_runner = target_runner
         self.parameter_space = parameter_space
         self.scenario = scenario
         self.name = name
+        if initial_configurations is not None and not _is_frame(initial_configurations):
+            initial_configurations = list(initial_configurations)
+        self.initial_configurations = initial_configurations
+        self.race_log = race_log
+        self.weight = weight
+
+    def with_scenario(self, scenario: Scenario) -> 'Run':
+        return Run(self.target_runner, self.parameter_space, scenario, name=self.name,
+                   initial_configurations=self.initial_configurations, race_log=self.race_log, weight=self.weight)
+
+    def write_race_log(self, log_file: Optional[str | os.PathLike]) -> None:
+        if self.race_log is not None and log_file is not None and os.path.exists(log_file):
+            from .racelog import RaceLog
+            RaceLog.from_log_file(log_file, self.parameter_space).write(self.race_log)
+
+    def r_initial_configurations(self) -> Any:
+        """Validate the initial configurations against the parameter space and convert them for irace."""
+        from ._rpy2 import py2rpy_configurations
+        from .expressions import RSourceError
+
+        if self.initial_configurations is None:
+            return None
+        try:
+            self.parameter_space.validate(self.initial_configurations)
+        except RSourceError:
+            # Conditions given as R source can only be checked by irace itself
+            pass
+        return py2rpy_configurations(self.initial_configurations, self.parameter_space)
+
+
+def _is_frame(value: Any) -> bool:
+    # pandas is only imported if a DataFrame can actually be present
+    pd = sys.modules.get('pandas')
+    return pd is not None and isinstance(value, pd.DataFrame)
+
+
+@contextmanager
+def _log_file(scenario: Scenario, required: bool) -> Iterator[Optional[str | os.PathLike]]:
+    """The log file of the scenario, or a temporary one if a log file is required but none is set."""
+    if scenario.log_file is not None or not required:
+        yield scenario.log_file
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            yield os.path.join(directory, 'irace.Rdata')
+
+
+def _monitor(run: Run, return_df: bool, remove_metadata: bool, **kwargs: Any) -> Monitor:
+    from ._rpy2 import rpy2py_iteration_elites
+
+    read_elites = partial(rpy2py_iteration_elites, parameter_space=run.parameter_space, return_df=return_df,
+                          remove_metadata=remove_metadata)
+    return Monitor(run.scenario, read_elites=read_elites, name=run.name, **kwargs)
+
+
+def _check_progress(run: Run, on_experiment: Optional[Callable[[ExperimentEvent], Any]]) -> None:
+    """
+    With `Scenario.n_jobs > 1`, R executes the experiments of every race step in forked processes, so that the
+    progress they make never reaches the monitor of this process. Executors, batched and async target runners are
+    called by R in this process.
+    """
+    scenario = run.scenario
+    if scenario.n_jobs not in (0, 1) and not uses_target_runner_parallel(run.target_runner, scenario) \
+            and (scenario.has_termination_criteria or on_experiment is not None):
+        raise ValueError('termination criteria and `on_experiment` need `n_jobs=1`, '
+                         'use an `executor` to run the experiments in parallel instead')
+
+
+def _run(run: Run, return_df: bool, remove_metadata: bool, session: Optional['IraceSession'] = None,
+         **kwargs: Any) -> Elites:
+    _check_progress(run, kwargs.get('on_experiment'))
+
+    from ._rpy2 import irace_package, get_converter, py2rpy_scenario, py2rpy_target_runner, \
+        py2rpy_target_runner_parallel, py2rpy_parameter_space, RRuntimeError
+    from .codec import convert_result
+
+    target_runner, parameter_space, scenario = run.target_runner, run.parameter_space, run.scenario
+    monitor = _monitor(run, return_df, remove_metadata, **kwargs)
+    profiler = scenario.profiler
+    start = profiler.start() if profiler is not None else 0
+
+    with _log_file(scenario, required=monitor.watches_iterations or run.race_log is not None) as log_file:
+        monitor.log_file = log_file
+
+        parallel = uses_target_runner_parallel(target_runner, scenario)
+        if session is not None:
+            trampolines = session.bind(target_runner, scenario, parameter_space, monitor)
+            r_target_runner = trampolines.target_runner
+            r_target_runner_parallel = trampolines.target_runner_parallel if parallel else None
+            r_parameter_space = session.parameter_space(parameter_space)
+        else:
+            r_target_runner = py2rpy_target_runner(target_runner, scenario, parameter_space, monitor)
+            r_target_runner_parallel = py2rpy_target_runner_parallel(target_runner, scenario, parameter_space,
+                                                                     monitor) if parallel else None
+            r_parameter_space = py2rpy_parameter_space(parameter_space)
+        if scenario.verbose > 0:
+            print(r_parameter_space)
+        r_scenario = py2rpy_scenario(scenario, r_target_runner, r_parameter_space, r_target_runner_parallel,
+                                     log_file=log_file, r_initial_configurations=run.r_initial_configurations())
+        if profiler is not None:
+            profiler.lap('setup', start)
+
+        try:
+            result = irace_package().irace(r_scenario)
+        except RRuntimeError:
+            if monitor.stop_reason is None:
+                raise
+            result = None
+        finally:
+            if profiler is not None:
+                start = profiler.finish()
+            if session is not None:
+                session.unbind()
+            if scenario.journal is not None:
+                scenario.journal.sync()
+
+        # The last iteration is only saved once irace returns
+        monitor.poll()
+        if profiler is not None:
+            start = profiler.lap('monitor', start)
+        run.write_race_log(log_file)
+
+    if result is None:
+        # Stopped early from Python, so return the elites of the last finished iteration
+        if monitor.elites is not None:
+            return monitor.elites
+        if return_df:
+            import pandas as pd
+            return pd.DataFrame(columns=list(parameter_space.params))
+        return []
+
+    result = get_converter().rpy2py(result)
+    result = convert_result(result, parameter_space, return_df=return_df, remove_metadata=remove_metadata)
+    if profiler is not None:
+        profiler.lap('convert_result', start)
+    return result
+
+
+def irace(target_runner: TargetRunner | BatchTargetRunner, parameter_space: ParameterSpace, scenario: Scenario,
+          return_df: bool = False, remove_metadata: bool = True,
+          on_experiment: Optional[Callable[[ExperimentEvent], Any]] = None,
+          on_iteration: Optional[Callable[[IterationEvent], Any]] = None,
+          on_elites: Optional[Callable[[Elites], Any]] = None,
+          initial_configurations: 'Optional[pd.DataFrame | Iterable[dict[str, Any]]]' = None,
+          race_log: Optional[str | os.PathLike] = None) -> 'pd.DataFrame | list[dict[str, Any]]':
+    """
+    irace: Iterated Racing for Automatic Algorithm Configuration.
+
+    The optional callbacks are called after every completed experiment (`on_experiment`) and after every
+    iteration of irace (`on_iteration` with an `IterationEvent`, `on_elites` with the current elites).
+    If the run is stopped early by the termination criteria of the scenario, the elites of the last finished
+    iteration are returned. Termination criteria and `on_experiment` cannot be used with `Scenario.n_jobs > 1`, as
+    R executes the experiments in forked processes then, but with an `executor`.
+
+    To warm-start irace, `initial_configurations` can be given as a DataFrame or a list of configurations,
+    e.g. the result of an earlier run. They are validated against the parameter space.
+
+    If `race_log` is set, the complete history of the run (all experiments, configurations and the elites of every
+    iteration) is written to that directory as Arrow files, which can be loaded with `RaceLog.read`.
+    """
+
+    return _run(Run(target_runner, parameter_space, scenario, initial_configurations=initial_configurations,
+                    race_log=race_log),
+                return_df=return_df, remove_metadata=remove_metadata,
+                on_experiment=on_experiment, on_iteration=on_iteration, on_elites=on_elites)
+
+
+def iirace(target_runner: TargetRunner | BatchTargetRunner, parameter_space: ParameterSpace, scenario: Scenario,
+           return_df: bool = False, remove_metadata: bool = True,
+           on_experiment: Optional[Callable[[ExperimentEvent], Any]] = None,
+           initial_configurations: 'Optional[pd.DataFrame | Iterable[dict[str, Any]]]' = None) \
+        -> Iterator[IterationEvent]:
+    """
+    Like `irace`, but yields an `IterationEvent` with the current elites after every iteration.
+    irace runs in a background thread, so R must not be used elsewhere until the generator is exhausted.
+    Closing the generator early (e.g. breaking out of the loop) stops irace before the next race step.
+    """
+
+    from ._rpy2 import disable_stack_check
+
+    events = queue.Queue()
+    done = object()
+    cancelled = threading.Event()
+
+    def inner() -> None:
+        try:
+            _run(Run(target_runner, parameter_space, scenario, initial_configurations=initial_configurations),
+                 return_df=return_df, remove_metadata=remove_metadata,
+                 on_experiment=on_experiment, on_iteration=events.put, cancelled=cancelled)
+            events.put(done)
+        except BaseException as e:
+            events.put(e)
+
+    disable_stack_check()
+    thread = threading.Thread(target=inner, daemon=True)
+    thread.start()
+
+    try:
+        while (event := events.get()) is not done:
+            if isinstance(event, BaseException):
+                raise event
+            yield event
+    finally:
+        cancelled.set()
+        thread.join()
 
 
 def multi_irace(runs: Iterable[Run], n_jobs: int = 1, return_df: bool = False, return_named: bool = False,
-                remove_metadata: bool = True, global_seed: Optional[int] = None, joblib: bool = False) \
-        -> list[pd.DataFrame] | list[list[dict[str, Any]]] | dict[str, list[dict[str, Any]]]:
-    """Multiple executions of irace in parallel."""
+                remove_metadata: bool = True, global_seed: Optional[int] = None, joblib: bool = False,
+                on_experiment: Optional[Callable[[ExperimentEvent], Any]] = None,
+                on_iteration: Optional[Callable[[IterationEvent], Any]] = None,
+                on_elites: Optional[Callable[[Elites], Any]] = None, shared_pool: Optional[int] = None) \
+        -> 'list[pd.DataFrame] | list[list[dict[str, Any]]] | dict[str, list[dict[str, Any]]]':
+    """
+    Multiple executions of irace in parallel.
+    The callbacks are the same as for `irace`, the events carry the name of the run and are emitted in the
+    process executing the run.
+
+    With `shared_pool`, all runs are started at once and their experiments are executed by a single pool of
+    `shared_pool` worker processes instead of `n_jobs` and `Scenario.n_jobs`. The runs share the workers by the
+    time their experiments take, weighted by `Run.weight`, so that the pool stays busy until the last run finishes.
+    Batched and async target runners execute their experiments themselves and do not use the pool.
+
+    Termination criteria of the scenarios (`max_wallclock_time`, `max_target_time`, `stop_when`) need `joblib=True`,
+    as R's `multi_irace` would abort all runs once one of them stops early.
+    """
+
+    runs = list(runs)
+    if not joblib:
+        for i, run in enumerate(runs):
+            if run.scenario.has_termination_criteria:
+                raise ValueError(f'termination criteria of run `{_name(run, i)}` need `joblib=True`')
+    callbacks = dict(on_experiment=on_experiment, on_iteration=on_iteration, on_elites=on_elites)
+
+    with ExitStack() as stack:
+        if shared_pool is not None:
+            runs = _share_pool(runs, shared_pool, stack)
+            n_jobs = len(runs)
+
+        results = _multi_irace(runs, n_jobs, return_df, remove_metadata, global_seed, joblib, callbacks)
+
+    if return_named:
+        return {_name(run, i): result for i, (run, result) in enumerate(zip(runs, results))}
+    else:
+        return list(results)
+
+
+def imulti_irace(runs: Iterable[Run], n_jobs: int = 1, return_df: bool = False, remove_metadata: bool = True,
+                 global_seed: Optional[int] = None,
+                 on_experiment: Optional[Callable[[ExperimentEvent], Any]] = None,
+                 on_iteration: Optional[Callable[[IterationEvent], Any]] = None,
+                 on_elites: Optional[Callable[[Elites], Any]] = None, shared_pool: Optional[int] = None) \
+        -> 'Iterator[tuple[str, pd.DataFrame | list[dict[str, Any]]]]':
+    """
+    Like `multi_irace`, but yields the name and the elites of every run as soon as it finishes, in the order in
+    which the runs finish. Runs are executed with joblib, so each run converts its own result in the process that
+    executed it, and only one result at a time is held here.
+    With `global_seed`, the seeds of the runs are drawn from it, but differ from the seeds R's `multi_irace` uses.
+    """
+
+    from joblib import delayed, Parallel
+
+    runs = list(runs)
+    callbacks = dict(on_experiment=on_experiment, on_iteration=on_iteration, on_elites=on_elites)
+    if global_seed is not None:
+        rng = random.Random(global_seed)
+        runs = [run.with_scenario(run.scenario.replace(seed=rng.randrange(1, 2 ** 31))) for run in runs]
+
+    with ExitStack() as stack:
+        if shared_pool is not None:
+            runs = _share_pool(runs, shared_pool, stack)
+            n_jobs = len(runs)
+
+        results = Parallel(n_jobs=n_jobs, return_as='generator_unordered')(
+            delayed(_run_in_worker)(run, _portable_state(run), return_df, remove_metadata, callbacks, index=i)
+            for i, run in enumerate(runs))
+        for i, result, profiler in results:
+            _merge_profiler(runs[i], profiler)
+            yield _name(runs[i], i), result
+            # Not kept alive while waiting for the next run
+            del result
 
+
+def _name(run: Run, index: int) -> str:
+    return run.name if run.name is not None else f"run{index}"
+
+
+def _share_pool(runs: list[Run], n_workers: int, stack: ExitStack) -> list[Run]:
+    """Let the runs execute their experiments in a shared pool, which is shut down when the stack is closed."""
+    from .distributed import DistributedExecutor
+
+    pool = stack.enter_context(DistributedExecutor(n_workers=n_workers))
+    return [run.with_scenario(run.scenario.replace(executor=pool.group(_name(run, i), weight=run.weight), n_jobs=1))
+            for i, run in enumerate(runs)]
+
+
+def _portable_state(run: Run) -> dict[str, Any]:
+    """
+    The attributes of the scenario that are dropped when it is pickled, but can be used by a run in another process:
+    the executor if it is a `GroupExecutor`, the timeout and termination criterion, as joblib pickles functions by
+    value, the cache and the journal, which open their files again (a `MemoryCache` is copied), and a new profiler,
+    which is merged into the profiler of the scenario by `_merge_profiler`.
+    """
+    from .distributed import GroupExecutor
+
+    scenario = run.scenario
+    executor = scenario.executor
+    return dict(executor=executor if isinstance(executor, GroupExecutor) else None, timeout=scenario.timeout,
+                stop_when=scenario.stop_when, cache=scenario.cache, journal=scenario.journal,
+                profiler=Profiler() if scenario.profiler is not None else None)
+
+
+def _run_in_worker(run: Run, state: dict[str, Any], return_df: bool, remove_metadata: bool,
+                   callbacks: dict[str, Any], index: int) -> tuple[int, Any, Optional[Profiler]]:
+    scenario = run.scenario.replace(**state)
+    result = _run(run.with_scenario(scenario), return_df=return_df, remove_metadata=remove_metadata, **callbacks)
+    return index, result, scenario.profiler
+
+
+def _merge_profiler(run: Run, profiler: Optional[Profiler]) -> None:
+    if profiler is not None:
+        run.scenario.profiler.merge(profiler)
+
+
+def _multi_irace(runs: list[Run], n_jobs: int, return_df: bool, remove_metadata: bool, global_seed: Optional[int],
+                 joblib: bool, callbacks: dict[str, Any]) -> 'list[pd.DataFrame] | list[list[dict[str, Any]]]':
     if joblib:
         from joblib import delayed, Parallel
 
-        @delayed
-        def inner(run: Run) -> pd.DataFrame | list[dict[str, Any]]:
-            return irace(target_runner=run.target_runner, scenario=run.scenario, parameter_space=run.parameter_space,
-                         return_df=return_df, remove_metadata=remove_metadata)
-
-        results = Parallel(n_jobs=n_jobs)(inner(run) for run in runs)
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_run_in_worker)(run, _portable_state(run), return_df, remove_metadata, callbacks, index=i)
+            for i, run in enumerate(runs))
+        for run, (_, result, profiler) in zip(runs, results):
+            _merge_profiler(run, profiler)
+        return [result for _, result, _ in results]
     else:
-        from ._rpy2 import py2rpy_scenario, py2rpy_target_runner, py2rpy_parameter_space, _irace, ListVector, converter, \
-            convert_result
+        for run in runs:
+            _check_progress(run, callbacks['on_experiment'])
+
+        from ._rpy2 import py2rpy_scenario, py2rpy_target_runner, py2rpy_target_runner_parallel, \
+            py2rpy_parameter_space, irace_package, get_converter, ListVector
+        from .codec import convert_result
         from multiprocessing import cpu_count
 
         if n_jobs < 0:
@@ -60,20 +393,36 @@ def multi_irace(runs: Iterable[Run], n_jobs: int = 1, return_df: bool = False, r
             parallel = n_jobs
         parallel = max(parallel, 1)
 
-        r_target_runners = [py2rpy_target_runner(run.target_runner, run.scenario, run.parameter_space) for run in runs]
-        r_scenarios = ListVector([(str(i), py2rpy_scenario(run.scenario, r_target_runner))
-                                  for i, (run, r_target_runner) in enumerate(zip(runs, r_target_runners))])
-        r_parameter_spaces = ListVector([(str(i), py2rpy_parameter_space(run.parameter_space))
-                                         for i, run in enumerate(runs)])
+        with ExitStack() as stack:
+            monitors = [_monitor(run, return_df, remove_metadata, **callbacks) for run in runs]
+            log_files = [stack.enter_context(_log_file(run.scenario,
+                                                       required=monitor.watches_iterations or run.race_log is not None))
+                         for run, monitor in zip(runs, monitors)]
+            for monitor, log_file in zip(monitors, log_files):
+                monitor.log_file = log_file
 
-        results = _irace.multi_irace(r_scenarios, r_parameter_spaces, parallel=parallel, global_seed=global_seed)
-        results = converter.rpy2py(results)
+            r_target_runners = [py2rpy_target_runner(run.target_runner, run.scenario, run.parameter_space, monitor)
+                                for run, monitor in zip(runs, monitors)]
+            r_target_runners_parallel = [
+                py2rpy_target_runner_parallel(run.target_runner, run.scenario, run.parameter_space, monitor)
+                if uses_target_runner_parallel(run.target_runner, run.scenario) else None
+                for run, monitor in zip(runs, monitors)
+            ]
+            r_scenarios = ListVector([(str(i), py2rpy_scenario(run.scenario, r_target_runner,
+                                                               r_target_runner_parallel=r_target_runner_parallel,
+                                                               log_file=log_file,
+                                                               r_initial_configurations=run.r_initial_configurations()))
+                                      for i, (run, r_target_runner, r_target_runner_parallel, log_file)
+                                      in enumerate(zip(runs, r_target_runners, r_target_runners_parallel, log_files))])
+            r_parameter_spaces = ListVector([(str(i), py2rpy_parameter_space(run.parameter_space))
+                                             for i, run in enumerate(runs)])
 
-        results = [convert_result(converter.rpy2py(result), run.parameter_space)
-                   for run, (_, result) in zip(runs, results.items())]
+            results = irace_package().multi_irace(r_scenarios, r_parameter_spaces, parallel=parallel,
+                                                  global_seed=global_seed)
+            converter = get_converter()
+            results = converter.rpy2py(results)
+            for run, log_file in zip(runs, log_files):
+                run.write_race_log(log_file)
 
-    if return_named:
-        return {run.name if run.name is not None else f"run{i}": result
-                for i, (run, result) in enumerate(zip(runs, results))}
-    else:
-        return list(results)
+        return [convert_result(converter.rpy2py(result), run.parameter_space)
+                for run, (_, result) in zip(runs, results.items())]
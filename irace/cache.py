@@ -0,0 +1,216 @@
+import functools
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import weakref
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from .experiment import Experiment
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def default_namespace(target_runner: Callable[..., Any]) -> str:
+    """The qualified name of the target runner (of its function for partials, of its type for callable objects)."""
+    while isinstance(target_runner, functools.partial):
+        target_runner = target_runner.func
+    if not hasattr(target_runner, '__qualname__'):
+        target_runner = type(target_runner)
+    return f'{target_runner.__module__}.{target_runner.__qualname__}'
+
+
+class EvaluationCache(metaclass=ABCMeta):
+    """
+    A cache of target runner results keyed on a namespace (see `Scenario.cache_namespace`), the configuration, the
+    instance and (unless the scenario is deterministic) the seed of an experiment. Failed experiments are never cached.
+
+    Instances are identified by their content rather than by their position in `Scenario.instances`, so that a cache
+    can be shared by tunings with different instances: strings and numbers as they are, arrays by a hash of their
+    data (computed once per array object) and other objects by a hash of their pickle. `instance_key` can map
+    instances to a cheaper identity instead, e.g. their file name.
+
+    With `Scenario.n_jobs > 1`, R forks a worker process per race step, so results put there end up in a copy of
+    the cache and are lost for a `MemoryCache`. A `SQLiteCache` opens its own connection in every process.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None, instance_key: Optional[Callable[[Any], Any]] = None) -> None:
+        self.maxsize = maxsize
+        self.instance_key = instance_key
+        self.hits = 0
+        self.misses = 0
+        self._fingerprints: dict[int, tuple[weakref.ref, str]] = {}
+
+    def key(self, experiment: Experiment, deterministic: bool, namespace: str = '') -> str:
+        """A canonical hash of the experiment. Capped experiments are only reused for the same bound."""
+        instance = experiment.instance
+        instance = self.instance_key(instance) if self.instance_key is not None else self._fingerprint(instance)
+        data = [namespace, sorted(experiment.configuration.items()), instance]
+        if not deterministic:
+            data.append(experiment.seed)
+        if experiment.bound is not None:
+            data.append(['bound', experiment.bound])
+        return _digest(json.dumps(data, default=str).encode())
+
+    def _fingerprint(self, value: Any) -> Any:
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        elif isinstance(value, (list, tuple)):
+            return [self._fingerprint(element) for element in value]
+        elif isinstance(value, Mapping):
+            return ['mapping', sorted([str(key), self._fingerprint(element)] for key, element in value.items())]
+
+        entry = self._fingerprints.get(id(value))
+        if entry is not None and entry[0]() is value:
+            return entry[1]
+        if hasattr(value, 'dtype') and hasattr(value, 'tobytes') and not getattr(value.dtype, 'hasobject', True):
+            fingerprint = _digest(pickle.dumps((str(value.dtype), value.shape)) + value.tobytes())
+        else:
+            fingerprint = _digest(pickle.dumps(value))
+        try:
+            # Arrays from instance stores are the same objects for every experiment, so they are only hashed once
+            reference = weakref.ref(value, functools.partial(_forget, self._fingerprints, id(value)))
+        except TypeError:
+            return fingerprint
+        self._fingerprints[id(value)] = (reference, fingerprint)
+        return fingerprint
+
+    def __getstate__(self) -> dict[str, Any]:
+        # The fingerprints are memoized by the ids of objects in this process
+        state = self.__dict__.copy()
+        state['_fingerprints'] = {}
+        return state
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        result = self._get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: dict[str, Any]) -> None:
+        self._put(key, result)
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def _put(self, key: str, result: dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def __str__(self) -> str:
+        return f"{type(self).__name__}(size={len(self)}, hits={self.hits}, misses={self.misses})"
+
+
+def _forget(fingerprints: dict[int, tuple[weakref.ref, str]], key: int, _: weakref.ref) -> None:
+    entry = fingerprints.get(key)
+    if entry is not None and entry[0]() is None:
+        del fingerprints[key]
+
+
+class MemoryCache(EvaluationCache):
+    """
+    An in-memory LRU cache, which lives as long as the process driving irace. Runs in other processes (e.g. of
+    `imulti_irace`) use a copy of it.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None, instance_key: Optional[Callable[[Any], Any]] = None) -> None:
+        super().__init__(maxsize=maxsize, instance_key=instance_key)
+        self._results: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    def _get(self, key: str) -> Optional[dict[str, Any]]:
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+        return result
+
+    def _put(self, key: str, result: dict[str, Any]) -> None:
+        self._results[key] = result
+        self._results.move_to_end(key)
+        if self.maxsize is not None:
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+
+class SQLiteCache(EvaluationCache):
+    """
+    An on-disk LRU cache backed by SQLite, which can be shared across tuning sessions and processes (it is pickled
+    by its path). Different target runners sharing a cache need different namespaces, which are derived from their
+    names unless set explicitly.
+    """
+
+    def __init__(self, path: str | Path, maxsize: Optional[int] = None,
+                 instance_key: Optional[Callable[[Any], Any]] = None) -> None:
+        super().__init__(maxsize=maxsize, instance_key=instance_key)
+        self.path = path
+        self._connect()
+
+    def _connect(self) -> None:
+        self._pid = os.getpid()
+        self._connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT NOT NULL, accessed INTEGER NOT NULL)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+        # Other processes may have used the cache in the meantime
+        [self._clock] = self._connection.execute('SELECT COALESCE(MAX(accessed), 0) FROM results').fetchone()
+
+    def _check_fork(self) -> None:
+        # A connection must not be used in a forked process, e.g. the workers R forks for `Scenario.n_jobs`
+        if self._pid != os.getpid():
+            self._connect()
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = super().__getstate__()
+        del state['_connection']
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._connect()
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def _get(self, key: str) -> Optional[dict[str, Any]]:
+        self._check_fork()
+        row = self._connection.execute('SELECT result FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        self._connection.execute('UPDATE results SET accessed = ? WHERE key = ?', (self._tick(), key))
+        return json.loads(row[0])
+
+    def _put(self, key: str, result: dict[str, Any]) -> None:
+        self._check_fork()
+        self._connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                                 (key, json.dumps(result), self._tick()))
+        if self.maxsize is not None:
+            excess = len(self) - self.maxsize
+            if excess > 0:
+                self._connection.execute(
+                    'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed LIMIT ?)', (excess,))
+
+    def __len__(self) -> int:
+        self._check_fork()
+        [size] = self._connection.execute('SELECT COUNT(*) FROM results').fetchone()
+        return size
+
+    def close(self) -> None:
+        self._connection.close()
@@ -0,0 +1,172 @@
+import math
+import sys
+from collections.abc import Mapping
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import params as p
+
+
+def _convert_bool(value: Any) -> Optional[bool]:
+    # Bool values come as strings "TRUE" or "FALSE" from R
+    return value == 'TRUE' if isinstance(value, str) else None
+
+
+def _value_converter(subspace: p.ParameterSubspace) -> Callable[[Any], Any]:
+    if isinstance(subspace, p.Real):
+        return float
+    elif isinstance(subspace, p.Integer):
+        return int
+    elif isinstance(subspace, p.Bool):
+        return _convert_bool
+    elif isinstance(subspace, (p.Categorical, p.Ordinal)):
+        # Categorical and ordinal values are passed as strings directly
+        return str
+    else:
+        raise ValueError("unknown parameter type")
+
+
+def _to_float(column: pd.Series, na: np.ndarray) -> np.ndarray:
+    if column.dtype.kind in 'biuf':
+        values = column.to_numpy(dtype='float64', copy=True)
+    else:
+        values = pd.to_numeric(column.to_numpy(dtype=object), errors='coerce').astype('float64')
+    values[na] = np.nan
+    return values
+
+
+def _to_int(column: pd.Series, na: np.ndarray) -> pd.arrays.IntegerArray:
+    values = _to_float(column, na)
+    missing = np.isnan(values)
+    return pd.arrays.IntegerArray(np.trunc(np.where(missing, 0, values)).astype('int64'), missing)
+
+
+def _column_converter(subspace: p.ParameterSubspace) -> Callable[[pd.Series, np.ndarray], Any]:
+    # The converters work on NumPy arrays, as the overhead of pandas operations dominates for the few elites of irace
+    if isinstance(subspace, p.Real):
+        return _to_float
+    elif isinstance(subspace, p.Integer):
+        return _to_int
+    elif isinstance(subspace, p.Bool):
+        return lambda column, na: pd.arrays.BooleanArray(column.to_numpy(dtype=object) == 'TRUE', na)
+    elif isinstance(subspace, (p.Categorical, p.Ordinal)):
+        dtype = pd.CategoricalDtype(list(subspace.values), ordered=isinstance(subspace, p.Ordinal))
+
+        def to_categorical(column: pd.Series, na: np.ndarray) -> pd.Categorical:
+            values = column.astype(str)
+            return pd.Categorical(values.mask(na) if na.any() else values, dtype=dtype)
+
+        return to_categorical
+    else:
+        raise ValueError("unknown parameter type")
+
+
+class ParameterCodec:
+    """
+    Precomputed type converters for the parameters of a `ParameterSpace`.
+    Use `ParameterSpace.codec` to get a cached instance instead of creating one directly.
+    """
+
+    def __init__(self, parameter_space: p.ParameterSpace) -> None:
+        self.names = list(parameter_space.params)
+        self.value_converters = {name: _value_converter(subspace) for name, subspace in parameter_space.params.items()}
+        self.column_converters = {name: _column_converter(subspace)
+                                  for name, subspace in parameter_space.params.items()}
+
+    def convert_configuration(self, raw_configuration: Mapping[str, Any]) -> dict[str, Any]:
+        """Convert a configuration whose missing values are already `None`, ignoring unknown keys."""
+        converters = self.value_converters
+        return {name: None if value is None else converters[name](value)
+                for name, value in raw_configuration.items() if name in converters}
+
+    def convert_column(self, column: pd.Series, na: Optional[np.ndarray] = None) -> pd.Series:
+        """Convert a whole column of raw values at once, `na` masks the missing values."""
+        if na is None:
+            na = column.isna().to_numpy(dtype=bool)
+        values = self.column_converters[column.name](column, na)
+        return pd.Series(values, index=column.index, name=column.name)
+
+
+def _r_na_types() -> tuple[type, ...]:
+    # The NA singletons of R can only be present if rpy2 has been loaded, so there is no need to import it here
+    sexp = sys.modules.get('rpy2.rinterface_lib.sexp')
+    if sexp is None:
+        return ()
+    return sexp.NARealType, sexp.NAIntegerType, sexp.NACharacterType, sexp.NALogicalType
+
+
+def na_mask(column: pd.Series) -> np.ndarray:
+    """Vectorized detection of missing values, including the NA singletons of R."""
+    mask = column.isna().to_numpy(dtype=bool)
+    na_types = _r_na_types()
+    if column.dtype == object and na_types:
+        mask |= column.map(type).isin(na_types).to_numpy(dtype=bool)
+    return mask
+
+
+def convert_configuration(raw_configuration: dict[str, Any], parameter_space: p.ParameterSpace) -> dict[str, Any]:
+    """Convert the raw configuration into the appropriate type for the corresponding parameter subspace."""
+    na_types = _r_na_types()
+    return parameter_space.codec.convert_configuration({
+        name: None if isinstance(value, na_types) or (isinstance(value, float) and math.isnan(value)) else value
+        for name, value in raw_configuration.items()
+    })
+
+
+def frame_to_records(frame: pd.DataFrame) -> list[dict[str, Any]]:
+    """Convert a typed result frame into a list of configurations with plain Python values and `None` for NA."""
+    names = list(frame.columns)
+    columns = [column.astype(object).where(column.notna(), None).tolist() for _, column in frame.items()]
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+# Up to this many rows, converting the values one by one is faster than the overhead of converting whole columns
+_ROWWISE_MAX_ROWS = 10_000
+
+
+def _convert_records(result: pd.DataFrame, codec: ParameterCodec, remove_metadata: bool) -> list[dict[str, Any]]:
+    """Convert a small result frame into configurations value by value, like `convert_result` would."""
+    na_types = _r_na_types()
+    converters = codec.value_converters
+    names, columns = [], []
+    for name, column in result.items():
+        convert = converters.get(name)
+        if convert is None and (remove_metadata or not str(name).startswith('.')):
+            continue
+        names.append(name)
+        columns.append([
+            None if value is None or isinstance(value, na_types) or (isinstance(value, float) and math.isnan(value))
+            else value if convert is None else convert(value)
+            for value in column.tolist()
+        ])
+    return [dict(zip(names, row)) for row in zip(*columns)] if columns else [{} for _ in range(len(result))]
+
+
+def convert_result(result: pd.DataFrame, parameter_space: p.ParameterSpace, return_df: bool = False,
+                   remove_metadata: bool = True) -> pd.DataFrame | list[dict[str, Any]]:
+    """
+    Convert the raw elite configurations column by column: `Real` to float64, `Integer` to nullable Int64,
+    `Bool` to nullable boolean and `Categorical`/`Ordinal` to (ordered) categorical dtypes.
+    Metadata columns (starting with a dot) are kept as they are if `remove_metadata` is false.
+    Small frames, like the elites irace returns, are converted row by row if no DataFrame is requested.
+    """
+
+    codec = parameter_space.codec
+    if not return_df and len(result) <= _ROWWISE_MAX_ROWS:
+        return _convert_records(result, codec, remove_metadata)
+
+    columns = {}
+    for name, column in result.items():
+        if name in codec.column_converters:
+            columns[name] = codec.convert_column(column, na_mask(column))
+        elif not remove_metadata and str(name).startswith('.'):
+            columns[name] = column
+
+    frame = pd.DataFrame(columns, index=result.index).reset_index(drop=True)
+
+    if return_df:
+        return frame
+    else:
+        return frame_to_records(frame)
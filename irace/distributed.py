@@ -0,0 +1,472 @@
+import argparse
+import multiprocessing
+import os
+import pickle
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, wait as wait_for
+from dataclasses import dataclass, field
+from multiprocessing.managers import BaseManager
+from typing import Any, Callable, Optional
+
+Address = tuple[str, int]
+
+
+@dataclass
+class _Task:
+    payload: bytes
+    group: str
+    future: Optional[Future] = None
+    client: Optional[str] = None
+    attempts: int = 0
+    worker: Optional[str] = None
+    charge: float = 0.0
+    started: float = 0.0
+
+
+@dataclass
+class _Group:
+    """The tasks of one submitter (e.g. a run of `multi_irace`), which share the workers according to their weight."""
+
+    weight: float = 1.0
+    pending: OrderedDict[int, None] = field(default_factory=OrderedDict)
+    running: int = 0
+    # The worker time used so far divided by the weight, the group with the least is served next
+    virtual_time: float = 0.0
+    duration: Optional[float] = None
+
+
+@dataclass
+class _Broker:
+    """
+    The work queue, which lives in the coordinator and is served to the workers over TCP.
+    Tasks that are claimed by a worker whose last heartbeat is older than the lease are requeued.
+    """
+
+    lease: float
+    max_retries: int
+    _tasks: dict[int, _Task] = field(default_factory=dict)
+    _groups: dict[str, _Group] = field(default_factory=dict)
+    _outboxes: dict[str, list[tuple[int, bytes]]] = field(default_factory=dict)
+    _seen: dict[str, float] = field(default_factory=dict)
+    _condition: threading.Condition = field(default_factory=threading.Condition)
+    _next_id: int = 0
+    _closed: bool = False
+
+    def _enqueue(self, task_id: int, first: bool = False) -> None:
+        group = self._groups[self._tasks[task_id].group]
+        if not group.pending and not group.running:
+            # A group that was idle does not get to catch up on the time it did not use
+            active = [other.virtual_time for other in self._groups.values() if other.pending or other.running]
+            group.virtual_time = max(group.virtual_time, min(active, default=0.0))
+        group.pending[task_id] = None
+        group.pending.move_to_end(task_id, last=not first)
+        self._condition.notify()
+
+    def put(self, payload: bytes, group: str = '', weight: float = 1.0, future: Optional[Future] = None,
+            client: Optional[str] = None) -> int:
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+            task_id = self._next_id
+            self._next_id += 1
+            self._groups.setdefault(group, _Group()).weight = weight
+            self._tasks[task_id] = _Task(payload, group, future=future, client=client)
+            self._enqueue(task_id)
+            return task_id
+
+    def _next(self) -> Optional[int]:
+        groups = [group for group in self._groups.values() if group.pending]
+        if not groups:
+            return None
+        group = min(groups, key=lambda group: group.virtual_time)
+        task_id, _ = group.pending.popitem(last=False)
+        return task_id
+
+    def claim(self, worker: str, timeout: float) -> Optional[tuple[int, bytes]]:
+        """Take the next pending task of the group with the least fair-share usage, waiting up to `timeout` seconds."""
+
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._seen[worker] = time.monotonic()
+            while True:
+                if self._closed:
+                    # Raised in the worker by the proxy, which ends it
+                    raise EOFError('the coordinator shut down')
+                while (task_id := self._next()) is not None:
+                    task = self._tasks[task_id]
+                    # Requeued tasks are already running, cancelled ones are dropped
+                    if task.future is None or task.attempts > 0 or task.future.set_running_or_notify_cancel():
+                        group = self._groups[task.group]
+                        # Charged with the expected duration until the actual duration is known
+                        known = [other.duration for other in self._groups.values() if other.duration is not None]
+                        task.charge = group.duration if group.duration is not None else \
+                            sum(known) / len(known) if known else 1.0
+                        group.virtual_time += task.charge / group.weight
+                        group.running += 1
+                        task.worker = worker
+                        task.started = time.monotonic()
+                        return task_id, task.payload
+                    del self._tasks[task_id]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def heartbeat(self, worker: str) -> None:
+        with self._condition:
+            self._seen[worker] = time.monotonic()
+
+    def _finish(self, task_id: int, task: _Task, result: bytes) -> None:
+        if task.client is not None:
+            with self._condition:
+                self._outboxes.setdefault(task.client, []).append((task_id, result))
+                self._condition.notify_all()
+            return
+        try:
+            ok, value = pickle.loads(result)
+        except Exception as e:
+            ok, value = False, e
+        if ok:
+            task.future.set_result(value)
+        else:
+            task.future.set_exception(value)
+
+    def complete(self, worker: str, task_id: int, result: bytes) -> None:
+        with self._condition:
+            self._seen[worker] = time.monotonic()
+            # A worker that was considered lost may still finish a task that has been completed elsewhere
+            task = self._tasks.pop(task_id, None)
+            if task is None:
+                return
+            group = self._groups[task.group]
+            group.pending.pop(task_id, None)
+            if task.worker is not None:
+                duration = time.monotonic() - task.started
+                group.running -= 1
+                group.virtual_time += (duration - task.charge) / group.weight
+                group.duration = duration if group.duration is None else 0.9 * group.duration + 0.1 * duration
+        self._finish(task_id, task, result)
+
+    def results(self, client: str, timeout: float) -> list[tuple[int, bytes]]:
+        """The results of the tasks submitted by a client, waiting up to `timeout` seconds for any."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._closed or self._outboxes.get(client), timeout)
+            results = self._outboxes.pop(client, [])
+            if self._closed and not results:
+                raise EOFError('the coordinator shut down')
+            return results
+
+    def requeue_lost(self) -> None:
+        """Requeue the tasks of workers that stopped sending heartbeats, or fail them after `max_retries`."""
+
+        failed = []
+        with self._condition:
+            now = time.monotonic()
+            lost = {worker for worker, seen in self._seen.items() if now - seen > self.lease}
+            for worker in lost:
+                del self._seen[worker]
+            for task_id, task in self._tasks.items():
+                if task.worker is not None and task.worker in lost:
+                    group = self._groups[task.group]
+                    group.running -= 1
+                    group.virtual_time -= task.charge / group.weight
+                    task.worker = None
+                    task.attempts += 1
+                    if task.attempts > self.max_retries:
+                        failed.append(task_id)
+                    else:
+                        self._enqueue(task_id, first=True)
+            failed = [(task_id, self._tasks.pop(task_id)) for task_id in failed]
+        for task_id, task in failed:
+            error = ChildProcessError(f'the task was lost by {task.attempts} workers, '
+                                      f'giving up after {self.max_retries} retries')
+            self._finish(task_id, task, pickle.dumps((False, error)))
+
+    def close(self, cancel: bool) -> None:
+        with self._condition:
+            self._closed = True
+            if cancel:
+                for group in self._groups.values():
+                    for task_id in list(group.pending):
+                        task = self._tasks[task_id]
+                        if task.future is not None and task.attempts == 0 and task.future.cancel():
+                            del self._tasks[task_id]
+                            del group.pending[task_id]
+            self._condition.notify_all()
+
+    def unfinished(self) -> list[Future]:
+        with self._condition:
+            return [task.future for task in self._tasks.values() if task.future is not None]
+
+
+class _WorkerManager(BaseManager):
+    pass
+
+
+_WorkerManager.register('broker')
+
+
+def _connect(address: Address, authkey: bytes, connect_timeout: float) -> Any:
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        manager = _WorkerManager(address=address, authkey=authkey)
+        try:
+            manager.connect()
+            return manager.broker()
+        except ConnectionError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+def _execute(payload: bytes) -> bytes:
+    try:
+        function, args, kwargs = pickle.loads(payload)
+        result = True, function(*args, **kwargs)
+    except BaseException as e:
+        result = False, e
+    try:
+        return pickle.dumps(result)
+    except Exception as e:
+        return pickle.dumps((False, RuntimeError(f'cannot pickle the result of the task: {e}')))
+
+
+def _work(address: Address, authkey: bytes, lease: float, connect_timeout: float) -> None:
+    broker = _connect(address, authkey, connect_timeout)
+    worker = f'{socket.gethostname()}:{os.getpid()}'
+    stopped = threading.Event()
+
+    def heartbeat() -> None:
+        while not stopped.wait(lease / 4):
+            try:
+                broker.heartbeat(worker)
+            except (ConnectionError, EOFError, OSError):
+                return
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    try:
+        while True:
+            task = broker.claim(worker, lease / 4)
+            if task is not None:
+                task_id, payload = task
+                broker.complete(worker, task_id, _execute(payload))
+    except (ConnectionError, EOFError, OSError):
+        # The coordinator shut down
+        pass
+    finally:
+        stopped.set()
+
+
+def work(address: Address | str, authkey: bytes, processes: int = 1, lease: float = 30.0,
+         connect_timeout: float = 60.0) -> None:
+    """
+    Pull tasks from the coordinator (a `DistributedExecutor`) at `address` and execute them in `processes` worker
+    processes, until the coordinator shuts down. `lease` needs to match the coordinator.
+    Functions and arguments are unpickled here, so the target runner needs to be importable on this host.
+    """
+
+    if isinstance(address, str):
+        host, port = address.rsplit(':', 1)
+        address = host, int(port)
+    if processes == 1:
+        _work(address, authkey, lease, connect_timeout)
+        return
+
+    # Workers are not daemonic, as timeouts are enforced by a supervised child process of the worker
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=_work, args=(address, authkey, lease, connect_timeout))
+               for _ in range(processes)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+
+class DistributedExecutor(Executor):
+    """
+    An executor that distributes tasks to worker processes on any number of hosts, e.g. to be used as
+    `Scenario.executor`. The executor serves a work queue at `address`, workers connect to it with the same `authkey`
+    (see `work` and `python -m irace.distributed`) and pull one task at a time, so faster hosts take more tasks.
+
+    Workers send a heartbeat every `lease / 4` seconds. The tasks of a worker that has not been seen for `lease`
+    seconds are requeued for other workers, up to `max_retries` times, after which their future fails with a
+    `ChildProcessError`. `n_workers` local worker processes are started as well, which is useful for testing.
+
+    Tasks can also be submitted from other processes through a `group`, and the groups share the workers by weight.
+    """
+
+    def __init__(self, address: Address = ('127.0.0.1', 0), authkey: Optional[bytes] = None, n_workers: int = 0,
+                 lease: float = 30.0, max_retries: int = 3) -> None:
+        if lease <= 0:
+            raise ValueError('`lease` needs to be positive')
+        if max_retries < 0:
+            raise ValueError('`max_retries` needs to be non-negative')
+
+        self.authkey = os.urandom(32) if authkey is None else authkey
+        self.lease = lease
+        self._broker = _Broker(lease=lease, max_retries=max_retries)
+        self._shutdown = False
+        self._shutdown_lock = threading.Lock()
+
+        broker = self._broker
+        manager_type = type('_CoordinatorManager', (BaseManager,), {})
+        manager_type.register('broker', callable=lambda: broker, exposed=('claim', 'heartbeat', 'complete', 'put', 'results'))
+        self._server = manager_type(address=address, authkey=self.authkey).get_server()
+        self.address: Address = self._server.address
+        threading.Thread(target=self._serve, name='irace-coordinator', daemon=True).start()
+
+        self._stopped = threading.Event()
+        self._reaper = threading.Thread(target=self._requeue_lost, name='irace-reaper', daemon=True)
+        self._reaper.start()
+
+        host, port = self.address
+        self._local_address = ('127.0.0.1' if host in ('', '0.0.0.0') else host), port
+        context = multiprocessing.get_context('spawn')
+        self._workers = [context.Process(target=_work, args=(self._local_address, self.authkey, lease, lease))
+                         for _ in range(n_workers)]
+        for process in self._workers:
+            process.start()
+
+    def _serve(self) -> None:
+        try:
+            self._server.serve_forever()
+        except SystemExit:
+            # Raised by the server once it is stopped
+            pass
+
+    def _requeue_lost(self) -> None:
+        while not self._stopped.wait(self.lease / 4):
+            self._broker.requeue_lost()
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        with self._shutdown_lock:
+            if self._shutdown:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+            future = Future()
+            self._broker.put(pickle.dumps((fn, args, kwargs)), future=future)
+            return future
+
+    def group(self, name: str, weight: float = 1.0) -> 'GroupExecutor':
+        """An executor that submits to this one as the group `name`, which gets a share of the workers by `weight`."""
+        if weight <= 0:
+            raise ValueError('`weight` needs to be positive')
+        return GroupExecutor(self._local_address, self.authkey, name, weight)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._shutdown_lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+
+        if cancel_futures:
+            self._broker.close(cancel=True)
+        if wait:
+            wait_for(self._broker.unfinished())
+
+        self._broker.close(cancel=False)
+        self._stopped.set()
+        self._server.stop_event.set()
+        self._server.listener.close()
+        for process in self._workers:
+            process.join(timeout=self.lease / 4 + 1)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+
+class GroupExecutor(Executor):
+    """
+    Submits tasks to the work queue of a `DistributedExecutor` as one group, see `DistributedExecutor.group`.
+    It can be pickled and used in other processes, e.g. the runs of `multi_irace`, and connects to the coordinator
+    on first use in every process. Its tasks cannot be cancelled once submitted.
+    """
+
+    def __init__(self, address: Address, authkey: bytes, group: str, weight: float = 1.0) -> None:
+        self.address = address
+        self.authkey = authkey
+        self.group = group
+        self.weight = weight
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._broker: Any = None
+        self._client = f'{socket.gethostname()}:{os.getpid()}:{id(self)}'
+        self._futures: dict[int, Future] = {}
+        self._lock = threading.Lock()
+
+    def _connection(self) -> Any:
+        if self._broker is None:
+            self._broker = _connect(self.address, self.authkey, connect_timeout=0)
+            threading.Thread(target=self._collect, args=(self._broker,), name='irace-collector', daemon=True).start()
+        return self._broker
+
+    def _collect(self, broker: Any) -> None:
+        while True:
+            try:
+                results = broker.results(self._client, 1.0)
+            except (ConnectionError, EOFError, OSError) as e:
+                with self._lock:
+                    futures, self._futures = self._futures, {}
+                    self._broker = None
+                for future in futures.values():
+                    future.set_exception(ChildProcessError(f'lost the connection to the coordinator: {e!r}'))
+                return
+            with self._lock:
+                futures = [(self._futures.pop(task_id), result) for task_id, result in results]
+            for future, result in futures:
+                ok, value = pickle.loads(result)
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        if self._pid != os.getpid():
+            # Forked (e.g. by R), the connection and collector of the parent cannot be used
+            self._reset()
+        future = Future()
+        future.set_running_or_notify_cancel()
+        with self._lock:
+            task_id = self._connection().put(pickle.dumps((fn, args, kwargs)), self.group, self.weight,
+                                             None, self._client)
+            self._futures[task_id] = future
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        if wait and self._pid == os.getpid():
+            with self._lock:
+                futures = list(self._futures.values())
+            for future in futures:
+                future.exception()
+
+    def __getstate__(self) -> dict[str, Any]:
+        return dict(address=self.address, authkey=self.authkey, group=self.group, weight=self.weight)
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._reset()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog='python -m irace.distributed',
+                                     description='Run workers for a DistributedExecutor.')
+    parser.add_argument('address', help='address of the coordinator, as host:port')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--lease', type=float, default=30.0, help='lease of the coordinator in seconds')
+    parser.add_argument('--connect-timeout', type=float, default=60.0,
+                        help='how long to wait for the coordinator in seconds')
+    args = parser.parse_args()
+
+    authkey = os.environ.get('IRACE_AUTHKEY')
+    if authkey is None:
+        parser.error('the authentication key of the coordinator needs to be set as IRACE_AUTHKEY')
+    work(args.address, bytes.fromhex(authkey), processes=args.processes, lease=args.lease,
+         connect_timeout=args.connect_timeout)
+
+
+if __name__ == '__main__':
+    main()
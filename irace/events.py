@@ -0,0 +1,157 @@
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence, TypeAlias, TYPE_CHECKING
+
+from .experiment import Experiment
+from .scenario import Scenario
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+Elites: TypeAlias = 'pd.DataFrame | list[dict[str, Any]]'
+
+
+@dataclass
+class Progress:
+    """The progress of an irace run at the time of an event."""
+
+    iteration: int
+    n_experiments: int
+    budget: Optional[int]
+    best_cost: float
+    target_time: float
+    elapsed: float
+
+    @property
+    def experiments_per_second(self) -> float:
+        return self.n_experiments / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class ExperimentEvent:
+    """Emitted after an experiment has been completed."""
+
+    run: Optional[str]
+    experiment: Experiment
+    result: dict[str, Any]
+    progress: Progress
+
+
+@dataclass
+class IterationEvent:
+    """Emitted after irace has finished an iteration, with the elites at that point."""
+
+    run: Optional[str]
+    iteration: int
+    elites: Elites
+    progress: Progress
+
+
+class Monitor:
+    """
+    Tracks the progress of a single irace run and dispatches the events to the callbacks.
+
+    Iterations are detected by watching the log file, which irace saves at the end of every iteration,
+    and `read_elites` is used to load the iteration number and elites from it.
+    The monitor also checks the termination criteria of the scenario and whether the run has been `cancelled`.
+    """
+
+    def __init__(
+            self,
+            scenario: Scenario,
+            log_file: Optional[str | Path] = None,
+            read_elites: Optional[Callable[[str | Path], tuple[int, Elites]]] = None,
+            on_experiment: Optional[Callable[[ExperimentEvent], Any]] = None,
+            on_iteration: Optional[Callable[[IterationEvent], Any]] = None,
+            on_elites: Optional[Callable[[Elites], Any]] = None,
+            name: Optional[str] = None,
+            cancelled: Optional[threading.Event] = None,
+    ) -> None:
+        self.scenario = scenario
+        self.log_file = log_file
+        self.read_elites = read_elites
+        self.on_experiment = on_experiment
+        self.on_iteration = on_iteration
+        self.on_elites = on_elites
+        self.name = name
+        self.cancelled = cancelled
+
+        self.n_experiments = 0
+        self.best_cost = math.inf
+        self.target_time = 0.0
+        self.stop_reason: Optional[str] = None
+        self.iteration = 0
+        self.elites: Optional[Elites] = None
+        self._start = time.monotonic()
+        self._log_mtime: Optional[int] = None
+
+    @property
+    def can_stop(self) -> bool:
+        return self.cancelled is not None or self.scenario.has_termination_criteria
+
+    @property
+    def watches_iterations(self) -> bool:
+        # Elites have to be tracked to return them if the run is stopped early
+        return self.on_iteration is not None or self.on_elites is not None or self.can_stop
+
+    def progress(self) -> Progress:
+        return Progress(iteration=self.iteration, n_experiments=self.n_experiments,
+                        budget=self.scenario.max_experiments, best_cost=self.best_cost, target_time=self.target_time,
+                        elapsed=time.monotonic() - self._start)
+
+    def should_stop(self) -> bool:
+        """Check whether the run should be stopped, the reason is kept in `stop_reason`."""
+
+        if self.stop_reason is None:
+            scenario = self.scenario
+            progress = self.progress()
+            if self.cancelled is not None and self.cancelled.is_set():
+                self.stop_reason = 'cancelled'
+            elif scenario.max_wallclock_time is not None and progress.elapsed >= scenario.max_wallclock_time:
+                self.stop_reason = 'wallclock time budget exhausted'
+            elif scenario.max_target_time is not None and progress.target_time >= scenario.max_target_time:
+                self.stop_reason = 'target runner time budget exhausted'
+            elif scenario.stop_when is not None and scenario.stop_when(progress):
+                self.stop_reason = 'stopping criterion met'
+
+        return self.stop_reason is not None
+
+    def stop_result(self) -> dict[str, Any]:
+        """The result reported to irace for every experiment once the run should stop, which makes irace abort."""
+        return dict(cost=math.inf, error=f'stopped from Python: {self.stop_reason}')
+
+    def completed(self, experiments: Sequence[Experiment], results: Sequence[dict[str, Any]]) -> None:
+        for experiment, result in zip(experiments, results):
+            self.n_experiments += 1
+            self.best_cost = min(self.best_cost, result['cost'])
+            self.target_time += result.get('time', 0.0)
+            if self.on_experiment is not None:
+                self.on_experiment(ExperimentEvent(run=self.name, experiment=experiment, result=result,
+                                                   progress=self.progress()))
+
+    def poll(self) -> None:
+        """Emit an iteration event if irace has saved a new iteration to the log file."""
+
+        if not self.watches_iterations or self.log_file is None or not os.path.exists(self.log_file):
+            return
+
+        mtime = os.stat(self.log_file).st_mtime_ns
+        if mtime == self._log_mtime:
+            return
+        self._log_mtime = mtime
+
+        iteration, elites = self.read_elites(self.log_file)
+        if iteration == self.iteration:
+            return
+        self.iteration = iteration
+        self.elites = elites
+
+        if self.on_iteration is not None:
+            self.on_iteration(IterationEvent(run=self.name, iteration=iteration, elites=elites,
+                                             progress=self.progress()))
+        if self.on_elites is not None:
+            self.on_elites(elites)
@@ -0,0 +1,170 @@
+import math
+from collections.abc import Mapping, Collection, Sequence
+from functools import partial
+from pickle import PicklingError
+from typing import Any, Optional, TYPE_CHECKING
+
+from .cache import default_namespace
+from .experiment import Experiment
+from .runner import TargetRunner, BatchTargetRunner, AsyncTargetRunner, Cost, is_batched, is_async
+from .scenario import Scenario
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+
+def normalize_cost(cost: Cost) -> dict[str, float]:
+    """Convert the output of a target runner into the `dict(cost=..., time=...)` form expected by irace."""
+    if isinstance(cost, Mapping):
+        return {key: float(value) for key, value in cost.items()}
+    elif isinstance(cost, Collection) and len(cost) == 2:
+        cost, time = cost
+        return dict(cost=float(cost), time=float(time))
+    else:
+        return dict(cost=float(cost))
+
+
+def error_result(error: Exception) -> dict[str, Any]:
+    return dict(cost=math.inf, error=str(error))
+
+
+def call_target_runner(target_runner: TargetRunner, experiment: Experiment, scenario: Scenario) -> dict[str, Any]:
+    try:
+        return normalize_cost(target_runner(experiment, scenario))
+    except Exception as e:
+        return error_result(e)
+
+
+def execute_experiment(target_runner: TargetRunner, experiment: Experiment, scenario: Scenario) -> dict[str, Any]:
+    """
+    Execute a single experiment.
+    If the scenario has a timeout, the target runner is run in a supervised worker process, which is killed once
+    the timeout expires, and `scenario.timeout_cost` is reported together with the elapsed time. Target runners in
+    other processes receive the scenario without its instances.
+    """
+    return _execute_experiment(target_runner, scenario, experiment, scenario.experiment_timeout(experiment))
+
+
+def _execute_experiment(target_runner: TargetRunner, scenario: Scenario, experiment: Experiment,
+                        timeout: Optional[float]) -> dict[str, Any]:
+    # The timeout is resolved by the caller, as it is dropped when the scenario is pickled
+    if timeout is None:
+        return call_target_runner(target_runner, experiment, scenario)
+
+    from .supervisor import local_supervisor
+
+    try:
+        completed, result, elapsed = local_supervisor().call(timeout, call_target_runner, target_runner, experiment,
+                                                             scenario.without_instances())
+    except (ChildProcessError, PicklingError) as e:
+        return error_result(e)
+
+    if not completed:
+        return dict(cost=scenario.timeout_cost, time=elapsed)
+    return result
+
+
+def execute_experiments(target_runner: TargetRunner | BatchTargetRunner | AsyncTargetRunner,
+                        experiments: Sequence[Experiment], scenario: Scenario) -> list[dict[str, Any]]:
+    """
+    Execute the experiments and return the normalized results in the same order.
+    Results replayed from `scenario.journal` are reused, all other successful results are appended to it.
+    """
+
+    journal = scenario.journal
+    if journal is None:
+        return cached_experiments(target_runner, experiments, scenario)
+
+    results = [journal.replay(experiment) for experiment in experiments]
+    pending = [i for i, result in enumerate(results) if result is None]
+
+    if pending:
+        executed = cached_experiments(target_runner, [experiments[i] for i in pending], scenario)
+        for i, result in zip(pending, executed):
+            if 'error' not in result:
+                journal.record(experiments[i], result)
+            results[i] = result
+        journal.sync(force=False)
+
+    return results
+
+
+def cached_experiments(target_runner: TargetRunner | BatchTargetRunner | AsyncTargetRunner,
+                       experiments: Sequence[Experiment], scenario: Scenario) -> list[dict[str, Any]]:
+    """Results found in `scenario.cache` are reused, only the remaining experiments are dispatched."""
+
+    cache = scenario.cache
+    if cache is None:
+        return dispatch_experiments(target_runner, experiments, scenario)
+
+    namespace = scenario.cache_namespace
+    if namespace is None:
+        namespace = default_namespace(target_runner)
+    keys = [cache.key(experiment, scenario.deterministic, namespace) for experiment in experiments]
+    results = [cache.get(key) for key in keys]
+
+    # Experiments that are repeated within the batch are only executed once
+    pending = {}
+    for i, (key, result) in enumerate(zip(keys, results)):
+        if result is None:
+            pending.setdefault(key, []).append(i)
+
+    if pending:
+        executed = dispatch_experiments(target_runner, [experiments[indices[0]] for indices in pending.values()],
+                                        scenario)
+        for (key, indices), result in zip(pending.items(), executed):
+            if 'error' not in result:
+                cache.put(key, result)
+            for i in indices:
+                results[i] = result
+
+    return results
+
+
+def _future_result(future: 'Future') -> dict[str, Any]:
+    try:
+        return future.result()
+    except Exception as e:
+        # E.g. a task the `DistributedExecutor` gave up on or a broken process pool, which only fails this experiment
+        return error_result(e)
+
+
+def dispatch_experiments(target_runner: TargetRunner | BatchTargetRunner | AsyncTargetRunner,
+                         experiments: Sequence[Experiment], scenario: Scenario) -> list[dict[str, Any]]:
+    """
+    Run the target runner on the experiments.
+    Batched target runners receive all experiments at once, async target runners run concurrently on an event loop,
+    otherwise they are dispatched to `scenario.executor` if set. A task that fails in the executor only fails its
+    experiment, like an exception of the target runner.
+    """
+
+    if is_async(target_runner):
+        from .aio import execute_async_experiments
+        return execute_async_experiments(target_runner, experiments, scenario)
+
+    if is_batched(target_runner):
+        try:
+            costs = target_runner(experiments, scenario)
+            if hasattr(costs, 'tolist'):
+                # Convert numpy arrays of shape (n,) or (n, 2) to plain costs
+                costs = costs.tolist()
+            if len(costs) != len(experiments):
+                raise ValueError(f'expected {len(experiments)} costs from batch target runner, got {len(costs)}')
+            return [normalize_cost(cost) for cost in costs]
+        except Exception as e:
+            return [error_result(e) for _ in experiments]
+
+    if scenario.executor is not None:
+        # The instances are not sent along with every task, as each experiment carries its own
+        execute = partial(_execute_experiment, target_runner, scenario.without_instances())
+        futures = [scenario.executor.submit(execute, experiment, scenario.experiment_timeout(experiment))
+                   for experiment in experiments]
+        return [_future_result(future) for future in futures]
+
+    return [execute_experiment(target_runner, experiment, scenario) for experiment in experiments]
+
+
+def uses_target_runner_parallel(target_runner: TargetRunner | BatchTargetRunner | AsyncTargetRunner,
+                                scenario: Scenario) -> bool:
+    """Whether irace should hand whole race steps to Python instead of calling the target runner one by one."""
+    return is_batched(target_runner) or is_async(target_runner) or scenario.executor is not None
@@ -11,3 +11,5 @@ class Experiment:
     instance: Optional[Any]
     seed: int
     configuration: dict[str, Any]
+    bound: Optional[float] = None
+    """The execution bound computed by irace if capping is enabled, i.e. the runners may stop once it is exceeded."""
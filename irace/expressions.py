@@ -0,0 +1,315 @@
+import math
+import operator
+from collections import OrderedDict
+from collections.abc import Mapping
+from functools import reduce
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from . import params as p
+
+# Columns are evaluated the way R would see them: numeric parameters as float arrays with NaN for missing values,
+# discrete parameters (including `Bool`, whose values are "TRUE" and "FALSE" in irace) as object arrays of strings
+# with None for missing values. Logical values are floats (1.0, 0.0 and NaN for NA), so that the three-valued logic
+# of R can be used for `&`, `|` and `!`.
+Columns = Mapping[str, np.ndarray]
+Compiled = Callable[[Columns], Any]
+
+_COMPARISONS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+_ARITHMETIC = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+}
+
+_FUNCTIONS = {
+    # R's min and max are variadic, NumPy's minimum and maximum are binary
+    'min': lambda *args: reduce(np.minimum, args),
+    'max': lambda *args: reduce(np.maximum, args),
+    'abs': np.abs,
+    'sqrt': np.sqrt,
+    'exp': np.exp,
+    'log': np.log,
+    'floor': np.floor,
+    'ceiling': np.ceil,
+    'round': np.round,
+}
+
+# Keyword arguments of R functions that have a NumPy equivalent
+_KEYWORDS = {
+    ('round', 'digits'): 'decimals',
+}
+
+
+def _r_str(value: Any) -> Optional[str]:
+    """The string R would coerce a scalar to when comparing it with a string."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    elif isinstance(value, (bool, np.bool_)):
+        return 'TRUE' if value else 'FALSE'
+    elif isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+    else:
+        return str(value)
+
+
+def _is_string(value: Any) -> bool:
+    return isinstance(value, str) or (isinstance(value, np.ndarray) and value.dtype == object)
+
+
+def _as_string(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value if value.dtype == object else np.array([_r_str(v) for v in value.tolist()], dtype=object)
+    return _r_str(value)
+
+
+def _as_number(value: Any) -> Any:
+    if isinstance(value, (bool, np.bool_)):
+        return float(value)
+    return value
+
+
+def _string_na(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return np.equal(value, None)
+    return value is None
+
+
+def _compare(symbol: str, left: Any, right: Any) -> Any:
+    compare = _COMPARISONS[symbol]
+    if _is_string(left) or _is_string(right):
+        left, right = _as_string(left), _as_string(right)
+        left_na, right_na = _string_na(left), _string_na(right)
+        na = left_na | right_na
+        if symbol not in ('==', '!='):
+            # Missing values are replaced by an empty string to be able to order, the result is masked afterwards
+            left = np.where(left_na, '', left) if isinstance(left, np.ndarray) else left or ''
+            right = np.where(right_na, '', right) if isinstance(right, np.ndarray) else right or ''
+        result = np.asarray(compare(left, right), dtype=float)
+    else:
+        left, right = _as_number(left), _as_number(right)
+        with np.errstate(invalid='ignore'):
+            result = np.asarray(compare(left, right), dtype=float)
+        na = np.isnan(left) | np.isnan(right)
+    return np.where(na, np.nan, result)
+
+
+def _and(left: Any, right: Any) -> Any:
+    left, right = _as_number(left), _as_number(right)
+    return np.where((left == 0) | (right == 0), 0.0, np.minimum(left, right))
+
+
+def _or(left: Any, right: Any) -> Any:
+    left, right = _as_number(left), _as_number(right)
+    return np.where((left == 1) | (right == 1), 1.0, np.maximum(left, right))
+
+
+def _isin(column: np.ndarray, variants: Sequence[Any]) -> np.ndarray:
+    # `%in%` is never NA in R, missing values are simply not in the set
+    if _is_string(column):
+        return pd.Series(column, dtype=object).isin([_r_str(v) for v in variants]).to_numpy(dtype=float)
+    numbers = []
+    for variant in variants:
+        try:
+            numbers.append(float(variant))
+        except (TypeError, ValueError):
+            pass
+    return np.isin(column, numbers).astype(float)
+
+
+class RSourceError(ValueError):
+    """Raised for expressions given as R source, which cannot be evaluated in Python."""
+
+
+def _cannot_compile(expression: Any) -> RSourceError:
+    return RSourceError(f"the expression {p.check_expression(expression)!r} cannot be evaluated in Python, "
+                      f"use the `ValueOf` expressions instead of R source")
+
+
+def _constant(value: Any) -> Compiled:
+    return lambda columns: value
+
+
+def _compile(expression: Any) -> Compiled:
+    if isinstance(expression, (bool, int, float)):
+        return _constant(expression)
+    elif isinstance(expression, str):
+        # Bounds may be given as R source, which is fine as long as it is a plain number
+        try:
+            return _constant(float(expression))
+        except ValueError:
+            raise _cannot_compile(expression) from None
+    elif isinstance(expression, p.RLiteral):
+        return _constant(expression.value)
+    elif isinstance(expression, p.ValueOf):
+        # Parameters that are missing altogether are NA, like inactive ones
+        name = expression.name
+        return lambda columns: columns.get(name, np.nan)
+    elif isinstance(expression, p.OneOfRCondition):
+        name, variants = expression.name, list(expression.variants)
+        return lambda columns: _isin(columns.get(name, np.nan), variants)
+    elif isinstance(expression, p.NegateRCondition):
+        condition = compile_expression(expression.condition)
+        return lambda columns: 1.0 - _as_number(condition(columns))
+    elif isinstance(expression, p.CompositeRExpression):
+        symbol = expression.symbol
+        left, right = compile_expression(expression.left), compile_expression(expression.right)
+        if symbol in _COMPARISONS:
+            return lambda columns: _compare(symbol, left(columns), right(columns))
+        elif symbol == '&':
+            return lambda columns: _and(left(columns), right(columns))
+        elif symbol == '|':
+            return lambda columns: _or(left(columns), right(columns))
+        elif symbol in _ARITHMETIC:
+            function = _ARITHMETIC[symbol]
+
+            def arithmetic(columns: Columns) -> Any:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    return function(_as_number(left(columns)), _as_number(right(columns)))
+
+            return arithmetic
+    elif isinstance(expression, p.RFuncCall) and expression.symbol in _FUNCTIONS \
+            and all((expression.symbol, name) in _KEYWORDS for name in expression.kwargs):
+        function = _FUNCTIONS[expression.symbol]
+        args = [compile_expression(arg) for arg in expression.args]
+        kwargs = {_KEYWORDS[expression.symbol, name]: compile_expression(value)
+                  for name, value in expression.kwargs.items()}
+
+        def call(columns: Columns) -> Any:
+            values = [_as_number(arg(columns)) for arg in args]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return function(*values, **{name: int(kwarg(columns)) for name, kwarg in kwargs.items()})
+
+        return call
+
+    raise _cannot_compile(expression)
+
+
+_cache: OrderedDict[tuple[type, str], Compiled] = OrderedDict()
+_CACHE_SIZE = 1024
+
+
+def compile_expression(expression: Any) -> Compiled:
+    """
+    Compile an expression of the `ValueOf` DSL into a function that evaluates it over columns of configurations,
+    following the semantics of R. Compiled functions are memoized on the structure of the expression.
+    Raw R source cannot be compiled and raises an `RSourceError`.
+    """
+
+    if not isinstance(expression, p.RExpression):
+        return _compile(expression)
+
+    key = type(expression), expression.to_r_expression()
+    compiled = _cache.get(key)
+    if compiled is None:
+        compiled = _compile(expression)
+        _cache[key] = compiled
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+    return compiled
+
+
+def is_logical(expression: Any) -> bool:
+    """Whether the expression evaluates to a logical value."""
+    return isinstance(expression, (p.OneOfRCondition, p.NegateRCondition, p.RawRCondition)) or (
+            isinstance(expression, p.CompositeRExpression) and expression.symbol in (*_COMPARISONS, '&', '|'))
+
+
+def broadcast(value: Any, n: int) -> np.ndarray:
+    return np.broadcast_to(np.asarray(_as_number(value), dtype=float), (n,))
+
+
+def truth(value: Any, n: int) -> np.ndarray:
+    """Whether a logical value is true, NA counts as false like in irace."""
+    return broadcast(value, n) == 1.0
+
+
+def references(expression: Any) -> set[str]:
+    """The names of the parameters referenced by the expression."""
+    if isinstance(expression, (p.ValueOf, p.OneOfRCondition)):
+        return {expression.name}
+    elif isinstance(expression, p.NegateRCondition):
+        return references(expression.condition)
+    elif isinstance(expression, p.CompositeRExpression):
+        return references(expression.left) | references(expression.right)
+    elif isinstance(expression, p.RFuncCall):
+        return set().union(*map(references, expression.args), *map(references, expression.kwargs.values()))
+    else:
+        return set()
+
+
+def _column(values: Any) -> np.ndarray:
+    """Convert the values of a single parameter to the representation used for evaluation."""
+
+    if isinstance(values, pd.Series):
+        if pd.api.types.is_bool_dtype(values):
+            na = values.isna().to_numpy(dtype=bool)
+            strings = np.where(values.to_numpy(dtype=bool, na_value=False), 'TRUE', 'FALSE').astype(object)
+            strings[na] = None
+            return strings
+        if pd.api.types.is_numeric_dtype(values):
+            return values.to_numpy(dtype=float, na_value=np.nan)
+        return values.astype(object).where(values.notna(), None).to_numpy(dtype=object)
+
+    values = np.atleast_1d(values if isinstance(values, np.ndarray) else np.array(values, dtype=object))
+    if values.dtype.kind in 'iuf':
+        return values.astype(float)
+    values = values.astype(object)
+    if all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values.tolist()):
+        return np.array([np.nan if v is None else v for v in values.tolist()], dtype=float)
+    return np.array([None if v is None or (isinstance(v, float) and math.isnan(v))
+                     else _r_str(v) if isinstance(v, (bool, np.bool_)) else v for v in values.tolist()], dtype=object)
+
+
+def to_columns(configurations: pd.DataFrame | Mapping[str, Any] | Iterable[Mapping[str, Any]],
+               names: Optional[Iterable[str]] = None) -> tuple[dict[str, np.ndarray], int]:
+    """
+    Convert a single configuration, a list of configurations, a DataFrame or a mapping of columns to the
+    representation used for evaluation, returns the columns and the number of configurations.
+    Only the parameters in `names` are converted if given.
+    """
+
+    if isinstance(configurations, pd.DataFrame):
+        names = configurations.columns if names is None else [name for name in names if name in configurations]
+        return {name: _column(configurations[name]) for name in names}, len(configurations)
+    elif isinstance(configurations, Mapping):
+        names = configurations if names is None else [name for name in names if name in configurations]
+        columns = {name: _column(configurations[name]) for name in names}
+        return columns, max(map(len, columns.values()), default=1)
+    else:
+        configurations = list(configurations)
+        if names is None:
+            names = dict.fromkeys(name for configuration in configurations for name in configuration)
+        columns = {name: _column([configuration.get(name) for configuration in configurations]) for name in names}
+        return columns, len(configurations)
+
+
+def evaluate(expression: Any, configurations: pd.DataFrame | Mapping[str, Any] | Iterable[Mapping[str, Any]]) \
+        -> Any:
+    """
+    Evaluate an expression for a single configuration (a dict of values) or column-wise for many configurations.
+    Conditions evaluate to booleans, where NA counts as false like in irace; other expressions evaluate to numbers.
+    """
+
+    single = isinstance(configurations, Mapping) and not any(
+        isinstance(values, (np.ndarray, pd.Series, list, tuple)) for values in configurations.values())
+    columns, n = to_columns(configurations, references(expression))
+    value = compile_expression(expression)(columns)
+    if is_logical(expression):
+        value = truth(value, n)
+    else:
+        value = np.broadcast_to(value, (n,))
+    return value[0].item() if single else value
@@ -0,0 +1,270 @@
+import itertools
+import math
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from abc import abstractmethod
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Callable, Iterable, Literal, Optional
+
+import numpy as np
+
+Backend = Literal['shm', 'memmap']
+
+
+@dataclass(frozen=True)
+class Handle:
+    """Enough information to open a stored array in any process."""
+
+    backend: Backend
+    location: str
+    shape: tuple[int, ...] = ()
+    dtype: str = ''
+
+
+# Every process maps each array once while it is in use, the mapping is released with the last view of it
+_attached: 'weakref.WeakValueDictionary[Handle, InstanceView]' = weakref.WeakValueDictionary()
+_attached_lock = threading.Lock()
+
+
+class InstanceView(np.ndarray):
+    """
+    A read-only array backed by an instance store. It is pickled as a reference to the shared memory or file
+    instead of a copy, so that passing instances to worker processes is cheap.
+    """
+
+    _handle: Optional[Handle] = None
+
+    def __array_finalize__(self, obj: Any) -> None:
+        # Derived arrays (slices, results of ufuncs) do not cover the whole stored array, so they are copied as usual
+        self._handle = None
+
+    def __reduce__(self) -> Any:
+        if self._handle is not None:
+            return open_view, (self._handle,)
+        return np.asarray(self).__reduce__()
+
+
+def _attach_shared_memory(name: str, size: int) -> mmap.mmap:
+    """Map an existing shared memory segment read-only, it is unmapped once the mapping is garbage collected."""
+    if os.name == 'nt':
+        # Windows does not track shared memory, it is released once the last handle is closed
+        return mmap.mmap(-1, size, tagname=name)
+    # Attaching with `SharedMemory` would register the segment with the resource tracker of this process (before
+    # Python 3.13), and unregistering it afterwards would also drop the registration of its owner, see
+    # https://github.com/python/cpython/issues/82300
+    import _posixshmem
+
+    fd = _posixshmem.shm_open('/' + name, os.O_RDONLY, mode=0o600)
+    try:
+        return mmap.mmap(fd, os.fstat(fd).st_size, prot=mmap.PROT_READ)
+    finally:
+        os.close(fd)
+
+
+def _open(handle: Handle) -> InstanceView:
+    if handle.backend == 'shm':
+        dtype = np.dtype(handle.dtype)
+        segment = _attach_shared_memory(handle.location, max(math.prod(handle.shape) * dtype.itemsize, 1))
+        # The mapping is kept alive by the view as its base
+        view = np.ndarray(handle.shape, dtype=dtype, buffer=segment).view(InstanceView)
+    else:
+        view = np.load(handle.location, mmap_mode='r').view(InstanceView)
+    view.flags.writeable = False
+    view._handle = handle
+    return view
+
+
+def open_view(handle: Handle) -> InstanceView:
+    """Open the array behind a handle as a read-only view, which is shared by all users of it in this process."""
+
+    with _attached_lock:
+        view = _attached.get(handle)
+        if view is None:
+            view = _attached[handle] = _open(handle)
+        return view
+
+
+def _map_arrays(instance: Any, function: Callable[[Any], Any], leaf: type = np.ndarray) -> Any:
+    """Apply the function to the arrays of an instance, which may be an array or a dict, list or tuple of arrays."""
+    if isinstance(instance, leaf):
+        return function(instance)
+    elif isinstance(instance, Mapping):
+        return {key: _map_arrays(value, function, leaf) for key, value in instance.items()}
+    elif isinstance(instance, (list, tuple)):
+        return type(instance)(_map_arrays(value, function, leaf) for value in instance)
+    else:
+        return instance
+
+
+class InstanceStore(Sequence):
+    """
+    A sequence of instances that can be passed as `Scenario.instances` to control how instances are held in memory
+    and how they are passed to worker processes.
+    """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def __getitem__(self, index: int) -> Any:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> 'InstanceStore':
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+
+class SharedInstanceStore(InstanceStore):
+    """
+    Keeps the arrays of the instances in shared memory (`backend='shm'`) or in memory-mapped `.npy` files in
+    `directory` (`backend='memmap'`, a temporary directory by default). Instances are returned as zero-copy,
+    read-only `InstanceView`s, so forked or spawned workers share a single copy of the data.
+
+    An instance can be a NumPy array or a dict, list or tuple of arrays, other values (including arrays of Python
+    objects, which only hold pointers into the creating process) are kept as they are and pickled as usual.
+    The views of the instances are kept by the store until it is closed, so that they are only mapped once per
+    process. The store that created the data removes it on `close` or when it is garbage collected, except for the
+    files in a `directory` that was given explicitly.
+    """
+
+    def __init__(self, instances: Iterable[Any], backend: Backend = 'shm',
+                 directory: Optional[str | Path] = None) -> None:
+        if backend not in ('shm', 'memmap'):
+            raise ValueError(f'unknown instance store backend `{backend}`')
+
+        self.backend = backend
+        segments: list[shared_memory.SharedMemory] = []
+        counter = itertools.count()
+        created_directory = None
+        if backend == 'memmap':
+            if directory is None:
+                directory = created_directory = tempfile.mkdtemp(prefix='irace-instances-')
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+
+        def store(array: np.ndarray) -> Handle | np.ndarray:
+            if array.dtype.hasobject:
+                return array
+            array = np.ascontiguousarray(array)
+            if backend == 'shm':
+                memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[...] = array
+                segments.append(memory)
+                return Handle('shm', memory.name, array.shape, array.dtype.str)
+            else:
+                path = os.path.join(directory, f'{next(counter)}.npy')
+                np.save(path, array)
+                return Handle('memmap', path)
+
+        self._handles = [_map_arrays(instance, store) for instance in instances]
+        self._views: dict[int, Any] = {}
+        self._finalizer = weakref.finalize(self, SharedInstanceStore._release, segments, created_directory)
+
+    @staticmethod
+    def _release(segments: list[shared_memory.SharedMemory], directory: Optional[str]) -> None:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def __getitem__(self, index: int) -> Any:
+        index = range(len(self._handles))[index]
+        if index not in self._views:
+            self._views[index] = _map_arrays(self._handles[index], open_view, leaf=Handle)
+        return self._views[index]
+
+    def close(self) -> None:
+        """
+        Release the stored data and the views of this store. Views that are still in use in this process stay valid
+        and are unmapped once they are garbage collected.
+        """
+        self._views.clear()
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Copies in other processes only reference the data and never release it
+        state = self.__dict__.copy()
+        state['_views'] = {}
+        state['_finalizer'] = None
+        return state
+
+
+def load_instance(path: str | Path) -> Any:
+    """
+    Load an instance from a file: `.npy` files are memory-mapped (and pickled as references),
+    `.npz` files are loaded into a dict of arrays. The data is released once the instance is garbage collected.
+    """
+    path = os.fspath(path)
+    if path.endswith('.npy'):
+        # Not shared through `open_view`, so that the LRU cache of a `LazyInstanceStore` bounds the mapped files
+        return _open(Handle('memmap', os.path.abspath(path)))
+    elif path.endswith('.npz'):
+        with np.load(path) as data:
+            return dict(data)
+    raise ValueError(f'cannot load the instance `{path}`, pass a `load` function for this format')
+
+
+class LazyInstanceStore(InstanceStore):
+    """
+    Loads the instances from their paths on first access with `load` and keeps up to `maxsize` of them in an
+    LRU cache. Only the paths are passed to worker processes, each loads the instances it needs itself.
+    """
+
+    def __init__(self, paths: Iterable[str | Path], load: Callable[[str | Path], Any] = load_instance,
+                 maxsize: Optional[int] = 16) -> None:
+        self.paths = list(paths)
+        self.load = load
+        self.maxsize = maxsize
+        self._cache: OrderedDict[int, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __getitem__(self, index: int) -> Any:
+        index = range(len(self.paths))[index]
+        with self._lock:
+            if index in self._cache:
+                self._cache.move_to_end(index)
+                return self._cache[index]
+        # Loading happens outside the lock, so that concurrent experiments on other instances are not blocked
+        instance = self.load(self.paths[index])
+        with self._lock:
+            self._cache[index] = instance
+            if self.maxsize is not None:
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+        return instance
+
+    def close(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state['_cache'] = OrderedDict()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
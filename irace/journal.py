@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from .experiment import Experiment
+
+
+class Journal:
+    """
+    An append-only journal of all completed experiments, stored as JSON lines.
+
+    Records are flushed after every race step and synced to disk once `sync_every` records or `sync_interval`
+    seconds have accumulated. With `resume=True`, the journal of a previous (e.g. crashed) tuning is read first
+    and its results are replayed instead of executed whenever irace requests the same experiment again.
+    Replaying requires the same scenario seed, as otherwise irace requests different experiments. Failed experiments
+    are not replayed, but executed again.
+
+    A journal that is pickled, e.g. for a run of `imulti_irace` in another process, opens the file again there and
+    appends to it. The file stays open until `close` is called or a `with` block of the journal ends.
+    """
+
+    def __init__(self, path: str | Path, resume: bool = False, sync_every: int = 100,
+                 sync_interval: float = 10.0) -> None:
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.replayed = 0
+
+        self._replay: dict[str, dict[str, Any]] = self._read(path) if resume else {}
+        self._open()
+
+    def _open(self) -> None:
+        # The journal owns the file, which is closed by `close`
+        self._file = open(self.path, 'a', encoding='utf-8')  # noqa: SIM115
+        if self._file.tell() > 0 and not self._ends_with_newline(self.path):
+            # Terminate a partially written record, so that it does not swallow the next one
+            self._file.write('\n')
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state['_file']
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._open()
+
+    def __enter__(self) -> 'Journal':
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    @staticmethod
+    def _read(path: str | Path) -> dict[str, dict[str, Any]]:
+        results = {}
+        if not os.path.exists(path):
+            return results
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last record might have been partially written before a crash
+                    continue
+                if 'error' not in record['result']:
+                    # Failures may be transient (e.g. a lost worker), so they are executed again
+                    results[record['key']] = record['result']
+        return results
+
+    @staticmethod
+    def _ends_with_newline(path: str | Path) -> bool:
+        with open(path, 'rb') as file:
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b'\n'
+
+    @staticmethod
+    def key(experiment: Experiment) -> str:
+        # A journal is only replayed by the same tuning, so the instance is identified by its position
+        data = [sorted(experiment.configuration.items()), experiment.instance_id, experiment.seed]
+        if experiment.bound is not None:
+            data.append(['bound', experiment.bound])
+        return hashlib.blake2b(json.dumps(data).encode(), digest_size=16).hexdigest()
+
+    def replay(self, experiment: Experiment) -> Optional[dict[str, Any]]:
+        result = self._replay.get(self.key(experiment))
+        if result is not None:
+            self.replayed += 1
+        return result
+
+    def record(self, experiment: Experiment, result: dict[str, Any]) -> None:
+        record = dict(
+            key=self.key(experiment),
+            configuration_id=experiment.configuration_id,
+            configuration=experiment.configuration,
+            instance_id=experiment.instance_id,
+            seed=experiment.seed,
+            cost=result.get('cost'),
+            time=result.get('time'),
+            wallclock=time.time(),
+            result=result,
+        )
+        self._file.write(json.dumps(record) + '\n')
+        self._unsynced += 1
+
+    def sync(self, force: bool = True) -> None:
+        """Flush the journal and sync it to disk if forced or due."""
+        self._file.flush()
+        if force or self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
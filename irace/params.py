@@ -1,7 +1,15 @@
+import builtins
+import hashlib
 from abc import ABCMeta, abstractmethod
 from collections import OrderedDict
 from functools import reduce
-from typing import Optional, Iterable, Union, Sequence, Any, Self
+from typing import Optional, Iterable, Union, Sequence, Any, Self, Callable, Mapping, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    from .codec import ParameterCodec
+    from .sampling import ParameterSampler
 
 
 class RExpression(metaclass=ABCMeta):
@@ -11,6 +19,19 @@ class RExpression(metaclass=ABCMeta):
     def to_r_expression(self) -> str:
         pass
 
+    def compile(self) -> 'Callable[[Mapping[str, np.ndarray]], Any]':
+        """
+        Compile the expression into a function over columns of configurations that evaluates it like R would.
+        See `irace.expressions` for the representation of the columns.
+        """
+        from .expressions import compile_expression
+        return compile_expression(self)
+
+    def evaluate(self, configurations: 'pd.DataFrame | Mapping[str, Any] | Iterable[Mapping[str, Any]]') -> Any:
+        """Evaluate the expression for a single configuration or column-wise for a batch of configurations."""
+        from .expressions import evaluate
+        return evaluate(self, configurations)
+
 
 def check_expression(value: Any) -> str:
     if isinstance(value, RExpression):
@@ -105,7 +126,7 @@ class RFuncCall(RExpression):
 
     def to_r_expression(self) -> str:
         str_args = [arg.to_r_expression() for arg in self.args]
-        str_kwargs = [f"{name}={value.to_r_expression()}" for name, value in self.kwargs]
+        str_kwargs = [f"{name}={value.to_r_expression()}" for name, value in self.kwargs.items()]
         return f"{self.symbol}({', '.join([*str_args, *str_kwargs])})"
 
 
@@ -182,11 +203,18 @@ class ValueOf(RExpression):
 
 
 class ParameterSubspace(metaclass=ABCMeta):
+    # Counts the changes of subspaces after their construction, so that `ParameterSpace` notices them cheaply
+    _revision = 0
 
     def __init__(self, name: str, condition: Optional[str | RCondition]):
         self.name = name
         self.condition = condition
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in self.__dict__:
+            ParameterSubspace._revision += 1
+        super().__setattr__(name, value)
+
     def _fmt_condition(self):
         return "" if self.condition is None else f"if {self.condition}"
 
@@ -223,7 +251,7 @@ class DiscreteParameterSubspace(ParameterSubspace, metaclass=ABCMeta):
     def __init__(self, name: str, values: Sequence[str], condition: Optional[str | RCondition] = None):
         super().__init__(name=name, condition=condition)
         # Validate that all values are strings
-        if not all(isinstance(v, str) for v in values):
+        if not builtins.all(isinstance(v, str) for v in values):
             raise TypeError(f"All categorical values must be strings, got: {values}")
         self.values = list(values)  # Convert to list to ensure consistency
 
@@ -253,10 +281,39 @@ class Ordinal(DiscreteParameterSubspace):
     """
 
 
+class _Parameters(OrderedDict):
+    """The parameters of a `ParameterSpace`, which count their changes so that its cached converters are rebuilt."""
+
+    revision = 0
+
+    def __setitem__(self, name: str, subspace: ParameterSubspace) -> None:
+        self.revision += 1
+        super().__setitem__(name, subspace)
+
+    def __delitem__(self, name: str) -> None:
+        self.revision += 1
+        super().__delitem__(name)
+
+    def pop(self, *args: Any) -> Any:
+        self.revision += 1
+        return super().pop(*args)
+
+    def popitem(self, last: bool = True) -> tuple[str, ParameterSubspace]:
+        self.revision += 1
+        return super().popitem(last)
+
+    def clear(self) -> None:
+        self.revision += 1
+        super().clear()
+
+    def move_to_end(self, name: str, last: bool = True) -> None:
+        self.revision += 1
+        super().move_to_end(name, last)
+
+
 class ParameterSpace:
     """A parameter space."""
 
-    params: dict[str, ParameterSubspace]
     forbidden: Optional[Iterable[str]]
 
     def __init__(self, params: Iterable[ParameterSubspace],
@@ -264,6 +321,72 @@ class ParameterSpace:
         self.params = OrderedDict([(param.name, param) for param in params])
         self.forbidden = forbidden
 
+    @property
+    def params(self) -> dict[str, ParameterSubspace]:
+        return self._params
+
+    @params.setter
+    def params(self, params: dict[str, ParameterSubspace]) -> None:
+        self._params = _Parameters(params)
+        self._codec = None
+        self._sampler = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # The codec and the sampler hold closures, they are built again on first use
+        state = self.__dict__.copy()
+        state['_codec'] = None
+        state['_sampler'] = None
+        return state
+
+    @property
+    def codec(self) -> 'ParameterCodec':
+        """
+        The type converters for this parameter space, built on first use and rebuilt once `params` or the attributes
+        of a parameter are changed.
+        """
+        revision = ParameterSubspace._revision, self._params.revision
+        if self._codec is None or self._codec[0] != revision:
+            from .codec import ParameterCodec
+            self._codec = (revision, ParameterCodec(self))
+        return self._codec[1]
+
+    @property
+    def sampler(self) -> 'ParameterSampler':
+        """The NumPy sampler and validator for this parameter space, built on first use and rebuilt like `codec`."""
+        forbidden = None if self.forbidden is None else tuple(self.forbidden)
+        revision = ParameterSubspace._revision, self._params.revision, forbidden
+        if self._sampler is None or self._sampler[0] != revision:
+            from .sampling import ParameterSampler
+            self._sampler = (revision, ParameterSampler(self))
+        return self._sampler[1]
+
+    def sample(self, n: int, seed: 'Optional[int | np.random.Generator]' = None,
+               return_df: bool = False) -> 'pd.DataFrame | list[dict[str, Any]]':
+        """Draw `n` random configurations in Python, respecting conditions, dependent bounds and forbidden ones."""
+        return self.sampler.sample(n, seed=seed, return_df=return_df)
+
+    def is_forbidden(self, configurations: 'pd.DataFrame | Iterable[dict[str, Any]]') -> 'np.ndarray':
+        """Evaluate the forbidden expressions for a batch of configurations."""
+        return self.sampler.is_forbidden(configurations)
+
+    def validate(self, configurations: 'pd.DataFrame | Iterable[dict[str, Any]]') -> None:
+        """Raise a `ValueError` if any of the configurations is not valid in this parameter space."""
+        self.sampler.validate(configurations)
+
+    def fingerprint(self) -> str:
+        """A hash of the structure of the parameter space, equal for parameter spaces that irace sees as the same."""
+        parts = []
+        for subspace in self.params.values():
+            part = [type(subspace).__name__, subspace.name, check_expression(subspace.condition)]
+            if isinstance(subspace, NumericalParameterSubspace):
+                part += [check_expression(subspace.lower), check_expression(subspace.upper), subspace.log]
+            elif isinstance(subspace, DiscreteParameterSubspace):
+                part += subspace.values
+            parts.append(repr(part))
+        if self.forbidden is not None:
+            parts += [repr(check_expression(forbidden)) for forbidden in self.forbidden]
+        return hashlib.blake2b('\n'.join(parts).encode(), digest_size=16).hexdigest()
+
     def __str__(self):
         forbidden = ["[forbidden]", *map(str, self.forbidden)] if self.forbidden is not None else []
         return '\n'.join([*map(str, self.params.values()), *forbidden])
@@ -0,0 +1,149 @@
+import bisect
+import time
+from typing import Optional
+
+# Upper bounds of the histogram buckets in seconds, from 1 µs to 1000 s in steps of 1, 2.5 and 5
+BUCKETS = tuple(m * 10.0 ** e for e in range(-6, 3) for m in (1.0, 2.5, 5.0)) + (1000.0,)
+
+SECTIONS = {
+    'r': "R's racing logic and rpy2, i.e. the time between returning to R and the next call of the target runner",
+    'monitor': 'polling the log file and checking the termination criteria',
+    'decode': 'converting the experiments from R',
+    'target': 'executing the experiments, including the cache and the journal',
+    'callbacks': 'progress tracking and the `on_experiment` callbacks',
+    'encode': 'converting the results to R',
+    'setup': 'converting the parameter space and the scenario to R',
+    'convert_result': 'converting the elites (and the race log, if exported) from R',
+}
+
+
+class Histogram:
+    """A histogram of durations with fixed buckets, see `BUCKETS`."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: 'Histogram') -> None:
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count > 0 else 0.0
+
+    def quantile(self, q: float) -> float:
+        """An upper bound of the quantile, i.e. the upper bound of the bucket it falls into."""
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            cumulative += count
+            if cumulative >= rank and count > 0:
+                return min(bound, self.max)
+        return self.max
+
+
+class Profiler:
+    """
+    Splits the wall time of tunings into the `SECTIONS` of the binding, set it as `Scenario.profiler`.
+    Every call of the target runner from R is timed section by section with `time.perf_counter_ns`, which costs
+    about half a microsecond per section. The durations of every section are kept as a `Histogram` per call.
+
+    The profiler accumulates over all tunings it is used for, it is not thread-safe. Runs of `multi_irace` and
+    `imulti_irace` that are executed by joblib use a new profiler each, which is merged into this one once they finish.
+    """
+
+    def __init__(self) -> None:
+        self.sections: dict[str, Histogram] = {name: Histogram() for name in SECTIONS}
+        self.calls = 0
+        self.experiments = 0
+        self._returned: Optional[int] = None
+
+    def start(self) -> int:
+        """Mark the start of a tuning, which is handed over to R afterwards."""
+        self._returned = None
+        return time.perf_counter_ns()
+
+    def call(self) -> int:
+        """Mark a call from R, the time since the last return to R is accounted to R."""
+        now = time.perf_counter_ns()
+        if self._returned is not None:
+            self.sections['r'].record((now - self._returned) * 1e-9)
+        self.calls += 1
+        return now
+
+    def lap(self, section: str, start: int) -> int:
+        """Account the time since `start` to the section and return the current time."""
+        now = time.perf_counter_ns()
+        self.sections[section].record((now - start) * 1e-9)
+        return now
+
+    def returned(self, start: int, experiments: int) -> None:
+        """Account the time since `start` to encoding the results, which are returned to R now."""
+        self._returned = self.lap('encode', start)
+        self.experiments += experiments
+
+    def finish(self) -> int:
+        """Mark the return of R at the end of a tuning."""
+        now = time.perf_counter_ns()
+        if self._returned is not None:
+            self.sections['r'].record((now - self._returned) * 1e-9)
+            self._returned = None
+        return now
+
+    def merge(self, other: 'Profiler') -> None:
+        """Add the measurements of another profiler, e.g. of a run in another process."""
+        for name, histogram in other.sections.items():
+            self.sections[name].merge(histogram)
+        self.calls += other.calls
+        self.experiments += other.experiments
+
+    @property
+    def total(self) -> float:
+        return sum(histogram.sum for histogram in self.sections.values())
+
+    def share(self, section: str) -> float:
+        """The fraction of the profiled time spent in the section."""
+        total = self.total
+        return self.sections[section].sum / total if total > 0 else 0.0
+
+    def to_openmetrics(self, prefix: str = 'irace') -> str:
+        """Export the counters and histograms in the OpenMetrics text format."""
+
+        lines = [f'# TYPE {prefix}_calls counter',
+                 f'# HELP {prefix}_calls Calls of the target runner from R.',
+                 f'{prefix}_calls_total {self.calls}',
+                 f'# TYPE {prefix}_experiments counter',
+                 f'# HELP {prefix}_experiments Experiments executed.',
+                 f'{prefix}_experiments_total {self.experiments}',
+                 f'# TYPE {prefix}_section_seconds histogram',
+                 f'# UNIT {prefix}_section_seconds seconds',
+                 f'# HELP {prefix}_section_seconds Time spent in each section of the binding.']
+        for name, histogram in self.sections.items():
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, '+Inf'), histogram.counts):
+                cumulative += count
+                le = bound if isinstance(bound, str) else f'{bound:g}'
+                lines.append(f'{prefix}_section_seconds_bucket{{section="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_section_seconds_count{{section="{name}"}} {histogram.count}')
+            lines.append(f'{prefix}_section_seconds_sum{{section="{name}"}} {histogram.sum!r}')
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def __str__(self) -> str:
+        lines = [f"{'section':<16}{'share':>8}{'total [s]':>12}{'count':>10}{'mean [ms]':>12}{'p99 [ms]':>12}"]
+        for name, histogram in self.sections.items():
+            lines.append(f"{name:<16}{self.share(name):>8.1%}{histogram.sum:>12.3f}{histogram.count:>10}"
+                         f"{histogram.mean * 1e3:>12.3f}{histogram.quantile(0.99) * 1e3:>12.3f}")
+        return '\n'.join(lines)
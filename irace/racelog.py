@@ -0,0 +1,85 @@
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from .params import ParameterSpace
+
+Format = Literal['arrow', 'parquet']
+
+_TABLES = ('experiments', 'configurations', 'elites')
+_SUFFIXES = {'arrow': '.arrow', 'parquet': '.parquet'}
+
+
+def _pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError('Exporting race logs requires pyarrow, consider running `pip install irace[arrow]`.') from e
+    return pyarrow
+
+
+@dataclass
+class RaceLog:
+    """
+    The complete history of an irace run as three tables:
+
+    - `experiments`: one row per experiment with `iteration`, `configuration_id`, `instance_id` (the id irace
+      passes to the target runner), `instance` (the index into `Scenario.instances`), `seed`, `cost`, `time`
+      and `bound`.
+    - `configurations`: every configuration irace generated, with its `configuration_id`, `parent_id` and one
+      column per parameter, typed like the results of `irace` with `return_df`.
+    - `elites`: the elites after each `iteration`, with their `rank` and `configuration_id`.
+    """
+
+    experiments: 'pd.DataFrame'
+    configurations: 'pd.DataFrame'
+    elites: 'pd.DataFrame'
+
+    @staticmethod
+    def from_log_file(log_file: str | Path, parameter_space: 'ParameterSpace') -> 'RaceLog':
+        """Read the race log from the log file (`.Rdata`) saved by irace, converting whole vectors at once."""
+        from ._rpy2 import rpy2py_race_log
+        return rpy2py_race_log(log_file, parameter_space)
+
+    def write(self, directory: str | Path, format: Format = 'arrow') -> None:
+        """
+        Write the tables to `directory` as uncompressed Arrow IPC files, which can be memory-mapped without
+        decoding, or as Parquet files.
+        """
+
+        pa = _pyarrow()
+        os.makedirs(directory, exist_ok=True)
+        for name in _TABLES:
+            table = pa.Table.from_pandas(getattr(self, name), preserve_index=False)
+            path = os.path.join(directory, name + _SUFFIXES[format])
+            if format == 'arrow':
+                with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            else:
+                pa.parquet.write_table(table, path)
+
+    @staticmethod
+    def read_tables(directory: str | Path) -> dict[str, Any]:
+        """Memory-map the tables written by `write` as `pyarrow.Table`s, without copying them."""
+
+        pa = _pyarrow()
+        tables = {}
+        for name in _TABLES:
+            arrow_path = os.path.join(directory, name + _SUFFIXES['arrow'])
+            if os.path.exists(arrow_path):
+                tables[name] = pa.ipc.open_file(pa.memory_map(arrow_path)).read_all()
+            else:
+                tables[name] = pa.parquet.read_table(os.path.join(directory, name + _SUFFIXES['parquet']),
+                                                     memory_map=True)
+        return tables
+
+    @classmethod
+    def read(cls, directory: str | Path) -> 'RaceLog':
+        """Read the tables written by `write`, restoring the pandas dtypes."""
+        tables = cls.read_tables(directory)
+        return cls(**{name: table.to_pandas(split_blocks=True) for name, table in tables.items()})
@@ -1,8 +1,12 @@
-from typing import Protocol, TypeAlias
+import inspect
+from typing import Protocol, TypeAlias, Sequence, TypeVar, TYPE_CHECKING
 
 from .scenario import Scenario
 from .experiment import Experiment
 
+if TYPE_CHECKING:
+    import numpy as np
+
 Cost: TypeAlias = float | tuple[float, float] | dict[str, float]
 
 
@@ -10,3 +14,42 @@ class TargetRunner(Protocol):
     """A runner that executes the target algorithm with the given configuration and experiment data."""
 
     def __call__(self, experiment: Experiment, scenario: Scenario) -> Cost: ...
+
+
+class BatchTargetRunner(Protocol):
+    """
+    A runner that executes a whole batch of experiments (e.g. all experiments of a race step) in a single call.
+    It returns one cost per experiment in the same order, either as a sequence of costs or as an array of shape
+    `(n,)` (cost) or `(n, 2)` (cost, time).
+    """
+
+    batched: bool
+
+    def __call__(self, experiments: Sequence[Experiment], scenario: Scenario) -> 'Sequence[Cost] | np.ndarray': ...
+
+
+class AsyncTargetRunner(Protocol):
+    """
+    A target runner that is a coroutine function, e.g. to submit remote or subprocess jobs and await their results.
+    The experiments of a race step run concurrently on an event loop of the binding, see `Scenario.max_concurrency`.
+    """
+
+    async def __call__(self, experiment: Experiment, scenario: Scenario) -> Cost: ...
+
+
+R = TypeVar('R')
+
+
+def batched(target_runner: R) -> R:
+    """Mark a callable as a `BatchTargetRunner`."""
+    target_runner.batched = True
+    return target_runner
+
+
+def is_batched(target_runner: TargetRunner | BatchTargetRunner | AsyncTargetRunner) -> bool:
+    return getattr(target_runner, 'batched', False)
+
+
+def is_async(target_runner: TargetRunner | BatchTargetRunner | AsyncTargetRunner) -> bool:
+    return inspect.iscoroutinefunction(target_runner) or \
+        (callable(target_runner) and inspect.iscoroutinefunction(target_runner.__call__))
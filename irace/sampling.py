@@ -0,0 +1,237 @@
+from collections.abc import Mapping
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import params as p
+from .codec import frame_to_records
+from .expressions import Columns, Compiled, compile_expression, references, broadcast, truth, _as_string, _r_str
+
+def _dependencies(subspace: p.ParameterSubspace) -> set[str]:
+    dependencies = references(subspace.condition)
+    if isinstance(subspace, p.NumericalParameterSubspace):
+        dependencies |= references(subspace.lower) | references(subspace.upper)
+    return dependencies
+
+
+def _sorted_subspaces(parameter_space: p.ParameterSpace) -> list[p.ParameterSubspace]:
+    """The subspaces in an order in which every parameter comes after the parameters it depends on."""
+
+    remaining = {name: _dependencies(subspace) & set(parameter_space.params) - {name}
+                 for name, subspace in parameter_space.params.items()}
+    order = []
+    while remaining:
+        ready = [name for name, dependencies in remaining.items() if not dependencies & set(remaining)]
+        if not ready:
+            raise ValueError(f"cyclic dependencies between the parameters {', '.join(remaining)}")
+        for name in ready:
+            del remaining[name]
+        order += ready
+    return [parameter_space.params[name] for name in order]
+
+
+def _raw_values(configurations: Any, name: str) -> np.ndarray:
+    if isinstance(configurations, pd.DataFrame):
+        if name not in configurations:
+            return np.full(len(configurations), None, dtype=object)
+        column = configurations[name]
+        if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+            return column.to_numpy(dtype=float, na_value=np.nan)
+        return column.astype(object).where(column.notna(), None).to_numpy(dtype=object)
+    return np.array([configuration.get(name) for configuration in configurations] + [None], dtype=object)[:-1]
+
+
+class ParameterSampler:
+    """
+    Samples and checks configurations of a `ParameterSpace` with NumPy, without going through R.
+    Conditions, forbidden expressions and dependent bounds need to be given with the `ValueOf` expressions.
+    Use `ParameterSpace.sampler` to get a cached instance instead of creating one directly.
+    """
+
+    def __init__(self, parameter_space: p.ParameterSpace) -> None:
+        self.parameter_space = parameter_space
+        self.subspaces = _sorted_subspaces(parameter_space)
+        self.conditions: dict[str, Optional[Compiled]] = {
+            subspace.name: None if subspace.condition is None else compile_expression(subspace.condition)
+            for subspace in self.subspaces
+        }
+        self.bounds: dict[str, tuple[Compiled, Compiled]] = {
+            subspace.name: (compile_expression(subspace.lower), compile_expression(subspace.upper))
+            for subspace in self.subspaces if isinstance(subspace, p.NumericalParameterSubspace)
+        }
+
+    def _forbidden(self, columns: Columns, n: int) -> np.ndarray:
+        # The forbidden expressions are not compiled ahead, as they may be reassigned
+        forbidden = np.zeros(n, dtype=bool)
+        for expression in self.parameter_space.forbidden or ():
+            forbidden |= truth(compile_expression(expression)(columns), n)
+        return forbidden
+
+    def _active(self, subspace: p.ParameterSubspace, columns: Columns, n: int) -> np.ndarray:
+        condition = self.conditions[subspace.name]
+        if condition is None:
+            return np.ones(n, dtype=bool)
+        return truth(condition(columns), n)
+
+    def _bounds(self, subspace: p.NumericalParameterSubspace, columns: Columns, n: int) \
+            -> tuple[np.ndarray, np.ndarray]:
+        lower, upper = self.bounds[subspace.name]
+        return broadcast(lower(columns), n), broadcast(upper(columns), n)
+
+    def _sample_columns(self, n: int, rng: np.random.Generator) -> tuple[Columns, dict[str, np.ndarray]]:
+        """Sample the columns, plus the category codes of discrete parameters (-1 if inactive)."""
+        columns, codes = {}, {}
+        for subspace in self.subspaces:
+            active = self._active(subspace, columns, n)
+            if isinstance(subspace, p.NumericalParameterSubspace):
+                lower, upper = self._bounds(subspace, columns, n)
+                active &= ~(np.isnan(lower) | np.isnan(upper))
+                if np.any(active & (lower > upper)):
+                    raise ValueError(f"the lower bound of {subspace.name} is greater than the upper bound")
+                if isinstance(subspace, p.Integer):
+                    # Integers are sampled from [lower, upper + 1) and truncated, as in irace
+                    upper = upper + 1
+                if subspace.log:
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        values = np.exp(rng.uniform(np.log(lower), np.log(upper)))
+                else:
+                    values = rng.uniform(lower, upper)
+                if isinstance(subspace, p.Integer):
+                    values = np.minimum(np.floor(values), upper - 1)
+                columns[subspace.name] = np.where(active, values, np.nan)
+            else:
+                indices = np.where(active, rng.integers(len(subspace.values), size=n), -1)
+                columns[subspace.name] = np.array([*subspace.values, None], dtype=object)[indices]
+                codes[subspace.name] = indices
+        return columns, codes
+
+    def _frame(self, columns: Columns, codes: dict[str, np.ndarray]) -> pd.DataFrame:
+        # Built from the category codes directly, which gives the same dtypes as `convert_result`
+        frame = {}
+        for name, subspace in self.parameter_space.params.items():
+            if isinstance(subspace, p.Real):
+                frame[name] = columns[name]
+            elif isinstance(subspace, p.Integer):
+                na = np.isnan(columns[name])
+                frame[name] = pd.arrays.IntegerArray(np.where(na, 0, columns[name]).astype('int64'), na)
+            elif isinstance(subspace, p.Bool):
+                frame[name] = pd.arrays.BooleanArray(codes[name] == subspace.values.index('TRUE'), codes[name] < 0)
+            else:
+                frame[name] = pd.Categorical.from_codes(codes[name], categories=subspace.values,
+                                                        ordered=isinstance(subspace, p.Ordinal))
+        return pd.DataFrame(frame)
+
+    def sample(self, n: int, seed: Optional[int | np.random.Generator] = None, return_df: bool = False,
+               max_rounds: int = 100) -> pd.DataFrame | list[dict[str, Any]]:
+        """
+        Draw `n` configurations uniformly at random, like irace does for its first iteration.
+        Configurations that are forbidden are redrawn up to `max_rounds` times.
+        """
+
+        rng = np.random.default_rng(seed)
+        columns, codes = self._sample_columns(n, rng)
+        forbidden = np.flatnonzero(self._forbidden(columns, n))
+        for _ in range(max_rounds):
+            if len(forbidden) == 0:
+                break
+            redrawn, redrawn_codes = self._sample_columns(len(forbidden), rng)
+            for name, values in redrawn.items():
+                columns[name][forbidden] = values
+            for name, values in redrawn_codes.items():
+                codes[name][forbidden] = values
+            forbidden = forbidden[self._forbidden(redrawn, len(forbidden))]
+        else:
+            if len(forbidden) > 0:
+                raise ValueError(f"could not sample {n} configurations that are not forbidden")
+
+        frame = self._frame(columns, codes)
+        return frame if return_df else frame_to_records(frame)
+
+    def columns(self, configurations: pd.DataFrame | Iterable[Mapping[str, Any]]) \
+            -> tuple[Columns, dict[str, np.ndarray]]:
+        """
+        Convert configurations to the representation used for evaluating expressions, returns the columns and a
+        mask of the values that do not have the type of their parameter.
+        """
+
+        if not isinstance(configurations, pd.DataFrame):
+            configurations = list(configurations)
+        columns, invalid = {}, {}
+        for name, subspace in self.parameter_space.params.items():
+            raw = _raw_values(configurations, name)
+            if raw.dtype == float:
+                values, bad = raw, np.zeros(len(raw), dtype=bool)
+                if not isinstance(subspace, p.NumericalParameterSubspace):
+                    values, bad = _as_string(raw), ~np.isnan(raw)
+            elif isinstance(subspace, p.NumericalParameterSubspace):
+                numeric = [isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, (bool, np.bool_))
+                           for v in raw.tolist()]
+                values = np.array([float(v) if ok else np.nan for v, ok in zip(raw.tolist(), numeric)], dtype=float)
+                bad = np.array([v is not None and not ok for v, ok in zip(raw.tolist(), numeric)], dtype=bool)
+            else:
+                values = np.array([None if v is None else _r_str(v) if isinstance(v, (bool, np.bool_)) else v
+                                   for v in raw.tolist()], dtype=object)
+                bad = np.array([v is not None and not isinstance(v, str) for v in values.tolist()], dtype=bool)
+                values[bad] = None
+            columns[name], invalid[name] = values, bad
+        return columns, invalid
+
+    def is_forbidden(self, configurations: pd.DataFrame | Iterable[Mapping[str, Any]]) -> np.ndarray:
+        """Evaluate the forbidden expressions for a batch of configurations."""
+        if not isinstance(configurations, pd.DataFrame):
+            configurations = list(configurations)
+        columns, _ = self.columns(configurations)
+        return self._forbidden(columns, len(configurations))
+
+    def errors(self, configurations: pd.DataFrame | Iterable[Mapping[str, Any]]) -> list[list[str]]:
+        """Check a batch of configurations against the parameter space and return the problems of each one."""
+
+        if not isinstance(configurations, pd.DataFrame):
+            configurations = list(configurations)
+        n = len(configurations)
+        names = set(self.parameter_space.params)
+        problems = [[] for _ in range(n)]
+
+        if isinstance(configurations, pd.DataFrame):
+            unknown = [name for name in configurations.columns if name not in names and not str(name).startswith('.')]
+            for i in range(n if unknown else 0):
+                problems[i].append(f"unknown parameters {', '.join(map(str, unknown))}")
+        else:
+            for i, configuration in enumerate(configurations):
+                unknown = [name for name in configuration if name not in names and not str(name).startswith('.')]
+                if unknown:
+                    problems[i].append(f"unknown parameters {', '.join(map(str, unknown))}")
+
+        def report(mask: np.ndarray, message: str) -> None:
+            for i in np.flatnonzero(mask):
+                problems[i].append(message)
+
+        columns, invalid = self.columns(configurations)
+        for subspace in self.subspaces:
+            name, values = subspace.name, columns[subspace.name]
+            report(invalid[name], f"{name} has a value of the wrong type")
+            missing = np.isnan(values) if values.dtype == float else np.equal(values, None)
+            active = self._active(subspace, columns, n)
+            report(active & missing & ~invalid[name], f"{name} is missing")
+            report(~active & ~missing, f"{name} is set, but its condition is not satisfied")
+            present = active & ~missing
+            if isinstance(subspace, p.NumericalParameterSubspace):
+                lower, upper = self._bounds(subspace, columns, n)
+                with np.errstate(invalid='ignore'):
+                    report(present & ((values < lower) | (values > upper)), f"{name} is out of bounds")
+                if isinstance(subspace, p.Integer):
+                    report(present & (values != np.floor(values)), f"{name} is not an integer")
+            else:
+                known = pd.Series(values, dtype=object).isin(subspace.values).to_numpy(dtype=bool)
+                report(present & ~known, f"{name} is not one of its values")
+
+        report(self._forbidden(columns, n), "the configuration is forbidden")
+        return problems
+
+    def validate(self, configurations: pd.DataFrame | Iterable[Mapping[str, Any]]) -> None:
+        """Raise a `ValueError` listing the problems of the first invalid configuration."""
+        for i, problems in enumerate(self.errors(configurations)):
+            if problems:
+                raise ValueError(f"configuration {i} is invalid: {'; '.join(problems)}")
+
@@ -1,26 +1,64 @@
+import math
 import os
 from pathlib import Path
-from typing import Optional, Sequence
+from typing import Any, Callable, Optional, Sequence, TYPE_CHECKING
+from .cache import EvaluationCache
+from .experiment import Experiment
+from .journal import Journal
 from .params import ParameterSpace
 
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from .events import Progress
+    from .instances import InstanceStore
+    from .profiling import Profiler
+
 
 class Scenario:
-    """Configuration for irace."""
+    """
+    Configuration for irace.
+
+    `instances` can be any sequence, or an `InstanceStore` to share large array-backed instances between worker
+    processes (`SharedInstanceStore`) or to load them lazily from files (`LazyInstanceStore`).
+    `test_instances`, `test_n_elites` and `test_repetitions` are the defaults for `evaluate_elites`.
+    Results in the `cache` are separated by `cache_namespace`, which defaults to the name of the target runner.
+    """
 
     def __init__(
             self,
             max_experiments: Optional[int] = None,
             min_experiments: Optional[int] = None,
-            instances: Optional[Sequence] = None,
+            instances: 'Optional[Sequence | InstanceStore]' = None,
+            test_instances: 'Optional[Sequence | InstanceStore]' = None,
+            test_n_elites: Optional[int] = None,
+            test_repetitions: int = 1,
             elitist: bool = True,
             deterministic: bool = False,
             log_file: Optional[str | Path] = None,
             exec_dir: Optional[str | Path] = None,
             n_jobs: int = 1,
+            executor: Optional['Executor'] = None,
+            cache: Optional[EvaluationCache] = None,
+            cache_namespace: Optional[str] = None,
+            journal: Optional[Journal] = None,
+            profiler: Optional['Profiler'] = None,
+            max_wallclock_time: Optional[float] = None,
+            max_target_time: Optional[float] = None,
+            stop_when: Optional[Callable[['Progress'], bool]] = None,
+            timeout: Optional[float | Callable[[Experiment], float]] = None,
+            timeout_cost: float = math.inf,
+            max_concurrency: int = 100,
+            capping: bool = False,
+            bound_max: Optional[float] = None,
+            capping_type: str = 'median',
+            bound_type: str = 'candidate',
             seed: Optional[int] = None,
             verbose: int = 0,
     ) -> None:
         self.instances = instances
+        self.test_instances = test_instances
+        self.test_n_elites = test_n_elites
+        self.test_repetitions = test_repetitions
         self.max_experiments = max_experiments
         self.min_experiments = min_experiments
         self.elitist = elitist
@@ -28,14 +66,77 @@ class Scenario:
         self.log_file = log_file
         self.exec_dir = exec_dir
         self.n_jobs = n_jobs
+        self.executor = executor
+        self.cache = cache
+        self.cache_namespace = cache_namespace
+        self.journal = journal
+        self.profiler = profiler
+        self.max_wallclock_time = max_wallclock_time
+        self.max_target_time = max_target_time
+        self.stop_when = stop_when
+        self.timeout = timeout
+        self.timeout_cost = timeout_cost
+        self.max_concurrency = max_concurrency
+        self.capping = capping
+        self.bound_max = bound_max
+        self.capping_type = capping_type
+        self.bound_type = bound_type
         self.seed = seed
         self.verbose = verbose
 
         self._check()
 
+    def __getstate__(self) -> dict[str, Any]:
+        # These are only used by the process driving irace and are usually not picklable, a callable `timeout` is
+        # resolved to a number before experiments are sent to other processes
+        state = self.__dict__.copy()
+        for name in ('executor', 'cache', 'journal', 'profiler', 'stop_when', 'timeout'):
+            state[name] = None
+        return state
+
+    def replace(self, **changes: Any) -> 'Scenario':
+        """A copy of the scenario with some attributes changed, which shares the executor, cache and journal."""
+        scenario = object.__new__(Scenario)
+        scenario.__dict__.update(self.__dict__, **changes)
+        scenario._check()
+        return scenario
+
+    def without_instances(self) -> 'Scenario':
+        """A copy without the (test) instances, to send along with experiments, which carry their own instance."""
+        return self.replace(instances=None, test_instances=None)
+
+    @property
+    def has_termination_criteria(self) -> bool:
+        """Whether the run may be stopped early from Python, see `max_wallclock_time`, `max_target_time` and `stop_when`."""
+        return self.max_wallclock_time is not None or self.max_target_time is not None or self.stop_when is not None
+
+    def experiment_timeout(self, experiment: Experiment) -> Optional[float]:
+        """The timeout in seconds for a single experiment, `timeout` may also be a function of the experiment."""
+        if callable(self.timeout):
+            return self.timeout(experiment)
+        return self.timeout
+
     def _check(self):
         if self.n_jobs not in (0, 1) and os.name == 'nt':
             raise NotImplementedError('parallel running on Windows is not supported')
 
+        if self.executor is not None and self.n_jobs not in (0, 1):
+            raise ValueError('`n_jobs` and `executor` cannot be used together')
+
+        if self.test_repetitions < 1:
+            raise ValueError('`test_repetitions` needs to be at least 1')
+
+        if self.max_concurrency < 1:
+            raise ValueError('`max_concurrency` needs to be at least 1')
+
+        if self.capping and self.bound_max is None:
+            raise ValueError('`bound_max` needs to be set for capping')
+
+        if self.capping_type not in ('median', 'mean', 'worst', 'best'):
+            raise ValueError(f'unknown capping type `{self.capping_type}`')
+
+        if self.bound_type not in ('candidate', 'instance'):
+            raise ValueError(f'unknown bound type `{self.bound_type}`')
+
         if self.max_experiments is None and self.min_experiments is None:
             raise ValueError('either `max_experiments` or `min_experiments` needs to be set')
@@ -0,0 +1,85 @@
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, TYPE_CHECKING
+
+from .base import Run, _run
+from .events import ExperimentEvent, IterationEvent, Monitor, Elites
+from .params import ParameterSpace
+from .runner import TargetRunner, BatchTargetRunner
+from .scenario import Scenario
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from rpy2.robjects import ListVector
+    from ._rpy2 import Trampolines
+
+
+class IraceSession:
+    """
+    Keeps the R side of the binding warm across many tunings in the same process.
+
+    The R session and the irace package are started once, parameter spaces are compiled to R once per distinct
+    structure (see `ParameterSpace.fingerprint`) and kept in an LRU cache of `max_parameter_spaces` entries, and the
+    R functions that call back into the target runner are created once and rebound for every tuning.
+    Only the scenario is converted anew for each call of `irace`.
+
+    The tunings of a session run one after another, a session must not be used from several threads at once.
+    """
+
+    def __init__(self, max_parameter_spaces: Optional[int] = 128) -> None:
+        from ._rpy2 import irace_package, get_converter, Trampolines
+
+        irace_package()
+        get_converter()
+        self.max_parameter_spaces = max_parameter_spaces
+        self._parameter_spaces: OrderedDict[str, 'ListVector'] = OrderedDict()
+        self._trampolines = Trampolines()
+        self.n_tunings = 0
+
+    def parameter_space(self, parameter_space: ParameterSpace) -> 'ListVector':
+        """The R version of the parameter space, compiled on first use."""
+        from ._rpy2 import py2rpy_parameter_space
+
+        key = parameter_space.fingerprint()
+        r_parameter_space = self._parameter_spaces.get(key)
+        if r_parameter_space is None:
+            r_parameter_space = py2rpy_parameter_space(parameter_space)
+            self._parameter_spaces[key] = r_parameter_space
+            if self.max_parameter_spaces is not None:
+                while len(self._parameter_spaces) > self.max_parameter_spaces:
+                    self._parameter_spaces.popitem(last=False)
+        else:
+            self._parameter_spaces.move_to_end(key)
+        return r_parameter_space
+
+    def bind(self, target_runner: TargetRunner | BatchTargetRunner, scenario: Scenario,
+             parameter_space: ParameterSpace, monitor: Optional[Monitor] = None) -> 'Trampolines':
+        """Point the R target runners of the session at the given target runner."""
+        self._trampolines.bind(target_runner, scenario, parameter_space, monitor)
+        return self._trampolines
+
+    def unbind(self) -> None:
+        self._trampolines.unbind()
+
+    def irace(self, target_runner: TargetRunner | BatchTargetRunner, parameter_space: ParameterSpace,
+              scenario: Scenario, return_df: bool = False, remove_metadata: bool = True,
+              on_experiment: Optional[Callable[[ExperimentEvent], Any]] = None,
+              on_iteration: Optional[Callable[[IterationEvent], Any]] = None,
+              on_elites: Optional[Callable[[Elites], Any]] = None,
+              initial_configurations: 'Optional[pd.DataFrame | Iterable[dict[str, Any]]]' = None,
+              race_log: Optional[str | os.PathLike] = None) -> 'pd.DataFrame | list[dict[str, Any]]':
+        """Like `irace.irace`, but reusing the R state of the session."""
+
+        self.n_tunings += 1
+        return _run(Run(target_runner, parameter_space, scenario, initial_configurations=initial_configurations,
+                        race_log=race_log),
+                    return_df=return_df,
+                    remove_metadata=remove_metadata, session=self, on_experiment=on_experiment,
+                    on_iteration=on_iteration, on_elites=on_elites)
+
+    def clear(self) -> None:
+        """Drop the compiled parameter spaces, so that R can free them."""
+        self._parameter_spaces.clear()
+
+    def __str__(self) -> str:
+        return f"IraceSession(parameter_spaces={len(self._parameter_spaces)}, tunings={self.n_tunings})"
@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Optional
+
+
+def _serve(connection: Connection) -> None:
+    while True:
+        try:
+            function, args = connection.recv()
+        except EOFError:
+            return
+        # Acknowledge once the task is unpickled, so that imports do not count towards the timeout
+        connection.send(None)
+        connection.send(function(*args))
+
+
+class Supervisor:
+    """
+    Runs functions in a persistent worker process, which is killed on timeout and restarted on the next call.
+    The function and its arguments need to be picklable.
+    """
+
+    def __init__(self, context: Optional[str] = 'spawn') -> None:
+        self.context = multiprocessing.get_context(context)
+        self._pid = os.getpid()
+        self._process: Optional[multiprocessing.Process] = None
+        self._connection: Optional[Connection] = None
+
+    def _start(self) -> None:
+        self._connection, child_connection = self.context.Pipe()
+        self._process = self.context.Process(target=_serve, args=(child_connection,), daemon=True)
+        self._process.start()
+        child_connection.close()
+
+    def call(self, timeout: float, function: Callable[..., Any], *args: Any) -> tuple[bool, Any, float]:
+        """
+        Call the function in the worker process and return whether it finished in time, its return value and the
+        elapsed time. Raises `ChildProcessError` if the worker died and `pickle.PicklingError` if the function or its
+        arguments cannot be pickled.
+        """
+
+        if self._process is None or not self._process.is_alive():
+            self._start()
+
+        try:
+            self._connection.send((function, args))
+        except (EOFError, OSError) as e:
+            self.close()
+            raise ChildProcessError('the supervised worker process died') from e
+        except Exception as e:
+            # The task is pickled before anything is written, so the worker can still be used
+            raise pickle.PicklingError(f'cannot send the task to the supervised worker: {e}') from e
+
+        try:
+            self._connection.recv()
+            start = time.perf_counter()
+            if not self._connection.poll(timeout):
+                self.close()
+                return False, None, time.perf_counter() - start
+            return True, self._connection.recv(), time.perf_counter() - start
+        except (EOFError, OSError) as e:
+            self.close()
+            raise ChildProcessError('the supervised worker process died') from e
+
+    def close(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+            self._connection.close()
+            self._process = None
+            self._connection = None
+
+
+_local = threading.local()
+
+
+def local_supervisor() -> Supervisor:
+    """The supervisor of the current thread, so that concurrent experiments each get their own worker."""
+    supervisor = getattr(_local, 'supervisor', None)
+    if supervisor is None or supervisor._pid != os.getpid():
+        # Forked (e.g. by R for `Scenario.n_jobs`), the worker of the parent is not a child of this process
+        supervisor = _local.supervisor = Supervisor()
+    return supervisor
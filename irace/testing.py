@@ -0,0 +1,126 @@
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import Any, Iterable, Optional, Sequence, TYPE_CHECKING
+
+import numpy as np
+
+from .codec import frame_to_records
+from .execution import execute_experiments
+from .experiment import Experiment
+from .runner import TargetRunner, BatchTargetRunner, AsyncTargetRunner, is_batched, is_async
+from .scenario import Scenario
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _id(value: Any) -> str:
+    return str(int(value)) if isinstance(value, float) and value.is_integer() else str(value)
+
+
+def _configurations(elites: 'pd.DataFrame | Iterable[dict[str, Any]]') -> tuple[list[str], list[dict[str, Any]]]:
+    """The ids (`.ID.` if present, otherwise the rank) and the configurations without metadata of the elites."""
+    if not isinstance(elites, list) and hasattr(elites, 'columns'):
+        elites = frame_to_records(elites)
+    elites = list(elites)
+    ids = [_id(elite.get('.ID.', rank)) for rank, elite in enumerate(elites, start=1)]
+    configurations = [{name: value for name, value in elite.items() if not str(name).startswith('.')}
+                      for elite in elites]
+    return ids, configurations
+
+
+def _seeds(scenario: Scenario, n_instances: int, repetitions: int) -> np.ndarray:
+    """
+    The seeds of the test experiments, one per test instance and repetition and shared by all configurations,
+    drawn from the seed of the scenario so that they are the same across calls.
+    """
+    rng = np.random.default_rng(None if scenario.seed is None else [scenario.seed, 0x7e57])
+    return rng.integers(1, 2 ** 31 - 1, size=(n_instances, repetitions))
+
+
+def evaluate_elites(target_runner: TargetRunner | BatchTargetRunner | AsyncTargetRunner,
+                    elites: 'pd.DataFrame | Iterable[dict[str, Any]]', scenario: Scenario,
+                    test_instances: Optional[Sequence] = None, n_elites: Optional[int] = None,
+                    repetitions: Optional[int] = None, return_df: bool = False) -> 'np.ndarray | pd.DataFrame':
+    """
+    Evaluate the elites returned by `irace` on held-out test instances, like the testing phase of irace.
+
+    Every elite is run on every test instance `repetitions` times, with the same seeds for all elites. The
+    instances, the number of elites and the repetitions default to `Scenario.test_instances`, `test_n_elites` and
+    `test_repetitions`. Without test instances, a single dummy instance like during tuning is used.
+
+    The experiments are executed like during tuning: with the executor of the scenario (or `n_jobs` spawned worker
+    processes, which need an importable target runner), as a batch for batched target runners and concurrently for
+    async target runners. Results are reused from the cache and the journal of the scenario, and identical elites
+    are only evaluated once.
+    Test instances get the instance ids `test1`, `test2` and so on, so that they are told apart from the training
+    instances in the journal.
+
+    Returns the costs as an array of shape `(n_elites, n_instances, repetitions)`, or with `return_df` as a tidy
+    DataFrame with one row per experiment and the columns `configuration_id`, `instance`, `instance_id`,
+    `repetition`, `seed`, `cost` and `time`.
+    """
+
+    test_instances = scenario.test_instances if test_instances is None else test_instances
+    n_elites = scenario.test_n_elites if n_elites is None else n_elites
+    repetitions = scenario.test_repetitions if repetitions is None else repetitions
+    if repetitions < 1:
+        raise ValueError('`repetitions` needs to be at least 1')
+
+    ids, configurations = _configurations(elites)
+    if n_elites is not None:
+        ids, configurations = ids[:n_elites], configurations[:n_elites]
+    has_instances = test_instances is not None and len(test_instances) > 0
+    n_instances = len(test_instances) if has_instances else 1
+    seeds = _seeds(scenario, n_instances, repetitions)
+
+    # Identical elites (e.g. the same elite in several iterations) are evaluated once
+    unique = {}
+    rows = [unique.setdefault(json.dumps(sorted(configuration.items()), default=str), len(unique))
+            for configuration in configurations]
+    representatives = {}
+    for row, index in enumerate(rows):
+        representatives.setdefault(index, row)
+
+    experiments = [
+        Experiment(
+            configuration_id=ids[row],
+            instance_id=f'test{instance + 1}' if has_instances else None,
+            instance=test_instances[instance] if has_instances else None,
+            seed=int(seeds[instance, repetition]),
+            configuration=dict(configurations[row]),
+        )
+        for row in representatives.values() for instance in range(n_instances) for repetition in range(repetitions)
+    ]
+
+    with ExitStack() as stack:
+        if scenario.executor is None and scenario.n_jobs not in (0, 1) and not is_batched(target_runner) \
+                and not is_async(target_runner):
+            # irace parallelizes in R during tuning, which is not involved here. Forking this process would copy the
+            # embedded R session and threads like the event loop of async target runners, so workers are spawned
+            executor = stack.enter_context(ProcessPoolExecutor(scenario.n_jobs,
+                                                               mp_context=multiprocessing.get_context('spawn')))
+            scenario = scenario.replace(executor=executor, n_jobs=1)
+        results = execute_experiments(target_runner, experiments, scenario)
+
+    shape = (len(representatives), n_instances, repetitions)
+    costs = np.array([result['cost'] for result in results], dtype=float).reshape(shape)[rows]
+    if not return_df:
+        return costs
+
+    import pandas as pd
+
+    times = np.array([result.get('time', np.nan) for result in results], dtype=float).reshape(shape)[rows]
+    n = len(rows)
+    return pd.DataFrame({
+        'configuration_id': np.repeat(ids, n_instances * repetitions),
+        'instance': np.tile(np.repeat(np.arange(n_instances), repetitions), n),
+        'instance_id': np.tile(np.repeat([f'test{i + 1}' if has_instances else None for i in range(n_instances)],
+                                         repetitions), n),
+        'repetition': np.tile(np.arange(repetitions), n * n_instances),
+        'seed': np.tile(seeds.reshape(-1), n),
+        'cost': costs.reshape(-1),
+        'time': times.reshape(-1),
+    })
@@ -0,0 +1,91 @@
+import asyncio
+import math
+import os
+import signal
+import time
+
+import pytest
+
+from irace import Experiment, Scenario
+from irace.aio import event_loop
+from irace.execution import execute_experiments, uses_target_runner_parallel
+from irace.runner import is_async
+
+
+async def sleep_for_instance(experiment, scenario):
+    await asyncio.sleep(experiment.instance)
+    return experiment.instance
+
+
+class ConcurrencyCounter:
+    def __init__(self):
+        self.running = self.max_running = 0
+
+    async def __call__(self, experiment, scenario):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.05)
+        self.running -= 1
+        return 1.0
+
+
+async def failing(experiment, scenario):
+    raise RuntimeError('job rejected')
+
+
+def experiments(*instances):
+    return [Experiment(configuration_id='1', instance_id=str(i), instance=instance, seed=1, configuration={})
+            for i, instance in enumerate(instances)]
+
+
+def test_async_target_runners_run_concurrently():
+    scenario = Scenario(max_experiments=1)
+    assert is_async(sleep_for_instance) and is_async(ConcurrencyCounter())
+    assert uses_target_runner_parallel(sleep_for_instance, scenario)
+    start = time.perf_counter()
+    assert execute_experiments(sleep_for_instance, experiments(*[0.2] * 10), scenario) == [{'cost': 0.2}] * 10
+    assert time.perf_counter() - start < 1
+
+
+def test_concurrency_is_limited():
+    counter = ConcurrencyCounter()
+    execute_experiments(counter, experiments(*range(10)), Scenario(max_experiments=1, max_concurrency=3))
+    assert counter.max_running == 3
+
+
+def test_the_event_loop_is_reused():
+    scenario = Scenario(max_experiments=1)
+    execute_experiments(sleep_for_instance, experiments(0), scenario)
+    loop = event_loop()
+    execute_experiments(sleep_for_instance, experiments(0), scenario)
+    assert event_loop() is loop and loop.is_running()
+
+
+def test_timeouts_cancel_the_experiment():
+    scenario = Scenario(max_experiments=1, timeout=0.2, timeout_cost=100.0)
+    fast, slow = execute_experiments(sleep_for_instance, experiments(0.01, 5), scenario)
+    assert fast == {'cost': 0.01}
+    assert slow['cost'] == 100.0 and 0.2 <= slow['time'] < 1
+
+
+def test_exceptions_fail_the_experiment():
+    assert execute_experiments(failing, experiments(0), Scenario(max_experiments=1)) == \
+        [{'cost': math.inf, 'error': 'job rejected'}]
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')
+def test_forked_processes_start_their_own_event_loop():
+    # R forks the process driving irace for `Scenario.n_jobs`, which does not inherit the thread of the loop
+    scenario = Scenario(max_experiments=1)
+    assert execute_experiments(sleep_for_instance, experiments(0.01), scenario) == [{'cost': 0.01}]
+    pid = os.fork()
+    if pid == 0:
+        signal.alarm(10)
+        try:
+            [result] = execute_experiments(sleep_for_instance, experiments(0.02), scenario)
+            os._exit(0 if result == {'cost': 0.02} else 1)
+        except BaseException:
+            os._exit(2)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
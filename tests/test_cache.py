@@ -0,0 +1,148 @@
+import functools
+import os
+
+import numpy as np
+import pytest
+
+from irace import Experiment, MemoryCache, Scenario, SQLiteCache
+from irace.cache import default_namespace
+from irace.execution import execute_experiments
+
+
+def experiment(instance=None, seed=1, configuration=None, instance_id='1', bound=None):
+    return Experiment(configuration_id='1', instance_id=instance_id, instance=instance, seed=seed,
+                      configuration={'x': 1} if configuration is None else configuration, bound=bound)
+
+
+def count_calls(function):
+    @functools.wraps(function)
+    def wrapper(experiment, scenario):
+        wrapper.calls += 1
+        return function(experiment, scenario)
+
+    wrapper.calls = 0
+    return wrapper
+
+
+@count_calls
+def total(experiment, scenario):
+    return float(np.sum(experiment.instance))
+
+
+@count_calls
+def negative(experiment, scenario):
+    return -1.0
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def cache(request, tmp_path):
+    total.calls = negative.calls = 0
+    if request.param == 'memory':
+        yield MemoryCache()
+    else:
+        cache = SQLiteCache(tmp_path / 'cache.db')
+        yield cache
+        cache.close()
+
+
+def test_repeated_experiments_are_reused(cache):
+    scenario = Scenario(max_experiments=1, cache=cache)
+    experiments = [experiment(np.ones(3)), experiment(np.ones(3)), experiment(np.ones(3), seed=2)]
+    assert execute_experiments(total, experiments, scenario) == [{'cost': 3.0}] * 3
+    assert total.calls == 2
+    execute_experiments(total, experiments, scenario)
+    assert total.calls == 2
+    assert cache.hits == 3
+
+
+def test_seeds_are_ignored_if_deterministic(cache):
+    scenario = Scenario(max_experiments=1, cache=cache, deterministic=True)
+    execute_experiments(total, [experiment(np.ones(3), seed=1), experiment(np.ones(3), seed=2)], scenario)
+    assert total.calls == 1
+
+
+def test_instances_are_identified_by_their_content(cache):
+    scenario = Scenario(max_experiments=1, cache=cache)
+    # The same positional instance id refers to different instances in different tunings
+    assert execute_experiments(total, [experiment(np.ones(3))], scenario) == [{'cost': 3.0}]
+    assert execute_experiments(total, [experiment(np.zeros(3))], scenario) == [{'cost': 0.0}]
+    # and different ids may refer to the same instance
+    execute_experiments(total, [experiment(np.ones(3), instance_id='7')], scenario)
+    assert total.calls == 2
+
+
+def test_target_runners_are_separated_by_namespace(cache):
+    scenario = Scenario(max_experiments=1, cache=cache)
+    assert execute_experiments(total, [experiment(np.ones(3))], scenario) == [{'cost': 3.0}]
+    assert execute_experiments(negative, [experiment(np.ones(3))], scenario) == [{'cost': -1.0}]
+    execute_experiments(negative, [experiment(np.ones(3))], scenario.replace(cache_namespace='v2'))
+    assert negative.calls == 2
+
+
+def test_capped_experiments_are_reused_for_the_same_bound(cache):
+    scenario = Scenario(max_experiments=1, cache=cache)
+    execute_experiments(total, [experiment(1.0, bound=10.0), experiment(1.0, bound=10.0),
+                                experiment(1.0, bound=20.0)], scenario)
+    assert total.calls == 2
+
+
+def test_failed_experiments_are_not_cached(cache):
+    scenario = Scenario(max_experiments=1, cache=cache)
+    [result] = execute_experiments(total, [experiment('not a number')], scenario)
+    assert 'error' in result
+    assert len(cache) == 0
+
+
+def test_instance_key_replaces_the_content(cache):
+    cache.instance_key = len
+    assert cache.key(experiment([1, 2]), False) == cache.key(experiment([3, 4]), False)
+    assert cache.key(experiment([1, 2]), False) != cache.key(experiment([1, 2, 3]), False)
+
+
+def test_array_fingerprints_are_memoized_per_object():
+    cache = MemoryCache()
+    array = np.arange(10.0)
+    key = cache.key(experiment(array), False)
+    assert len(cache._fingerprints) == 1
+    assert cache.key(experiment(array.copy()), False) == key
+    del array
+    assert len(cache._fingerprints) <= 1
+
+
+def test_lru_eviction(tmp_path):
+    for cache in (MemoryCache(maxsize=2), SQLiteCache(tmp_path / 'cache.db', maxsize=2)):
+        cache.put('a', {'cost': 1.0})
+        cache.put('b', {'cost': 2.0})
+        cache.get('a')
+        cache.put('c', {'cost': 3.0})
+        assert cache.get('b') is None
+        assert cache.get('a') == {'cost': 1.0} and cache.get('c') == {'cost': 3.0}
+
+
+def test_sqlite_cache_is_shared_across_sessions(tmp_path):
+    path = tmp_path / 'cache.db'
+    first = SQLiteCache(path)
+    first.put('a', {'cost': 1.0, 'time': 2.0})
+    first.close()
+    assert SQLiteCache(path).get('a') == {'cost': 1.0, 'time': 2.0}
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_sqlite_cache_reconnects_after_fork(tmp_path):
+    cache = SQLiteCache(tmp_path / 'cache.db')
+    cache.put('parent', {'cost': 1.0})
+    pid = os.fork()
+    if pid == 0:
+        try:
+            cache.put('child', {'cost': 2.0})
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    assert cache.get('child') == {'cost': 2.0}
+    assert len(cache) == 2
+
+
+def test_default_namespace():
+    assert default_namespace(total) == f'{__name__}.total'
+    assert default_namespace(functools.partial(total, 1)) == f'{__name__}.total'
+    assert default_namespace(MemoryCache()) == 'irace.cache.MemoryCache'
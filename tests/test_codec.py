@@ -0,0 +1,84 @@
+import math
+import pickle
+
+import pandas as pd
+import pytest
+
+from irace import ParameterSpace, Real, Integer, Categorical, Ordinal, Bool
+from irace import codec
+from irace.codec import convert_result
+
+space = ParameterSpace([Categorical('algorithm', ['as', 'acs']), Ordinal('ls', ['0', '1', '2']), Real('alpha', 0, 5),
+                        Integer('ants', 5, 100), Bool('dlb')])
+
+
+def raw_result():
+    return pd.DataFrame({
+        '.ID.': [1, 2, 3],
+        'algorithm': ['as', 'acs', 'as'],
+        'ls': ['0', None, '2'],
+        'alpha': [0.5, math.nan, 4.0],
+        'ants': [10.0, 20.0, math.nan],
+        'dlb': ['TRUE', 'FALSE', None],
+        '.PARENT.': [math.nan, 1.0, 1.0],
+    })
+
+
+def test_codec_is_cached():
+    space = ParameterSpace([Real('a', 0, 1), Integer('b', 1, 10)])
+    assert space.codec is space.codec
+
+
+def test_codec_follows_changes_of_the_parameter_space():
+    space = ParameterSpace([Real('a', 0, 1), Integer('b', 1, 10)])
+    codec = space.codec
+    space.params['b'] = Categorical('b', ['1', '10'])
+    assert space.codec is not codec
+    assert space.codec.convert_configuration({'b': 10}) == {'b': '10'}
+
+    codec = space.codec
+    del space.params['a']
+    assert space.codec is not codec and space.codec.names == ['b']
+
+    codec = space.codec
+    space.params = {'c': Integer('c', 1, 10)}
+    assert space.codec is not codec and space.codec.names == ['c']
+
+
+def test_sampler_follows_changes_of_parameters_and_forbidden_expressions():
+    space = ParameterSpace([Real('a', 0, 1)], forbidden=[])
+    sampler = space.sampler
+    space.params['a'].upper = 2
+    assert space.sampler is not sampler
+
+    sampler = space.sampler
+    space.forbidden.append('a > 1')
+    assert space.sampler is not sampler
+
+
+def test_parameter_spaces_can_be_pickled_after_use():
+    space = ParameterSpace([Real('a', 0, 1), Categorical('b', ['x', 'y'])], forbidden=[])
+    space.codec, space.sampler
+    copy = pickle.loads(pickle.dumps(space))
+    assert copy.fingerprint() == space.fingerprint()
+    assert copy.codec.convert_configuration({'a': '0.5', 'b': 'x'}) == {'a': 0.5, 'b': 'x'}
+    assert len(copy.sample(3, seed=1)) == 3
+
+
+@pytest.mark.parametrize('remove_metadata', [True, False])
+def test_small_results_are_converted_like_large_ones(monkeypatch, remove_metadata):
+    rowwise = convert_result(raw_result(), space, remove_metadata=remove_metadata)
+    monkeypatch.setattr(codec, '_ROWWISE_MAX_ROWS', 0)
+    assert convert_result(raw_result(), space, remove_metadata=remove_metadata) == rowwise
+    assert rowwise[1] == {'algorithm': 'acs', 'ls': None, 'alpha': None, 'ants': 20, 'dlb': False,
+                          **({} if remove_metadata else {'.ID.': 2, '.PARENT.': 1.0})}
+    assert [type(rowwise[0][name]) for name in space.params] == [str, str, float, int, bool]
+
+
+def test_results_are_converted_to_typed_frames():
+    frame = convert_result(raw_result(), space, return_df=True, remove_metadata=False)
+    assert frame.dtypes.astype(str).to_dict() == {'.ID.': 'int64', 'algorithm': 'category', 'ls': 'category',
+                                                   'alpha': 'float64', 'ants': 'Int64', 'dlb': 'boolean',
+                                                   '.PARENT.': 'float64'}
+    assert frame['ls'].cat.ordered and list(frame['ls'].cat.categories) == ['0', '1', '2']
+    assert frame['ants'].isna().tolist() == [False, False, True]
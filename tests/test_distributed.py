@@ -0,0 +1,185 @@
+import operator
+import pickle
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from irace import Experiment, MemoryCache, Scenario
+from irace.distributed import DistributedExecutor, _Broker, _execute
+from irace.execution import execute_experiments
+
+
+def payload(value):
+    return pickle.dumps((operator.neg, (value,), {}))
+
+
+def result(value):
+    return pickle.dumps((True, value))
+
+
+def run(broker, worker, duration=0.0):
+    """
+    Claim the next task, pretend it ran for `duration` seconds (or a duration per group) and complete it,
+    returns its group.
+    """
+    task_id, _ = broker.claim(worker, timeout=0)
+    task = broker._tasks[task_id]
+    task.started -= duration[task.group] if isinstance(duration, dict) else duration
+    broker.complete(worker, task_id, result(None))
+    return task.group
+
+
+def test_tasks_of_a_group_run_in_submission_order():
+    broker = _Broker(lease=10, max_retries=0)
+    futures = [Future() for _ in range(3)]
+    for i, future in enumerate(futures):
+        broker.put(payload(i), future=future)
+    claimed = [broker.claim('w', timeout=0)[1] for _ in futures]
+    assert claimed == [payload(0), payload(1), payload(2)]
+    assert broker.claim('w', timeout=0) is None
+
+
+def test_groups_share_the_workers_by_weight():
+    broker = _Broker(lease=10, max_retries=0)
+    for _ in range(200):
+        broker.put(payload(0), group='heavy', weight=3.0, future=Future())
+        broker.put(payload(0), group='light', weight=1.0, future=Future())
+    groups = [run(broker, 'w', duration=1.0) for _ in range(100)]
+    assert groups.count('heavy') == pytest.approx(75, abs=2)
+
+
+def test_groups_are_charged_by_the_duration_of_their_tasks():
+    broker = _Broker(lease=10, max_retries=0)
+    for _ in range(100):
+        broker.put(payload(0), group='slow', future=Future())
+        broker.put(payload(0), group='fast', future=Future())
+    # Every task of the slow group takes four times as long, so it gets a fifth of the tasks
+    groups = [run(broker, 'w', duration={'slow': 4.0, 'fast': 1.0}) for _ in range(50)]
+    assert groups.count('fast') == pytest.approx(40, abs=2)
+
+
+def test_idle_groups_do_not_catch_up():
+    broker = _Broker(lease=10, max_retries=0)
+    for _ in range(10):
+        broker.put(payload(0), group='early', future=Future())
+    for _ in range(5):
+        run(broker, 'w', duration=1.0)
+    for _ in range(10):
+        broker.put(payload(0), group='late', future=Future())
+    groups = [run(broker, 'w', duration=1.0) for _ in range(4)]
+    assert groups.count('early') == 2
+
+
+def test_cancelled_futures_are_skipped():
+    broker = _Broker(lease=10, max_retries=0)
+    cancelled, kept = Future(), Future()
+    broker.put(payload(0), future=cancelled)
+    broker.put(payload(1), future=kept)
+    cancelled.cancel()
+    assert broker.claim('w', timeout=0)[1] == payload(1)
+    assert kept.running()
+
+
+def test_lost_tasks_are_requeued_first():
+    broker = _Broker(lease=0.05, max_retries=1)
+    lost, other = Future(), Future()
+    broker.put(payload(0), future=lost)
+    broker.put(payload(1), future=other)
+    task_id, _ = broker.claim('dead', timeout=0)
+    time.sleep(0.1)
+    broker.heartbeat('alive')
+    broker.requeue_lost()
+    assert broker.claim('alive', timeout=0) == (task_id, payload(0))
+    broker.complete('alive', task_id, result(-0))
+    assert lost.result(timeout=0) == 0
+
+
+def test_tasks_fail_after_max_retries():
+    broker = _Broker(lease=0.05, max_retries=1)
+    future = Future()
+    broker.put(payload(0), future=future)
+    for _ in range(2):
+        broker.claim('dead', timeout=0)
+        time.sleep(0.1)
+        broker.requeue_lost()
+    with pytest.raises(ChildProcessError, match='giving up after 1 retries'):
+        future.result(timeout=0)
+    assert broker.claim('w', timeout=0) is None
+
+
+def test_late_results_of_requeued_tasks_are_ignored():
+    broker = _Broker(lease=0.05, max_retries=1)
+    future = Future()
+    broker.put(payload(0), future=future)
+    task_id, _ = broker.claim('slow', timeout=0)
+    time.sleep(0.1)
+    broker.requeue_lost()
+    broker.claim('fast', timeout=0)
+    broker.complete('fast', task_id, result(1))
+    broker.complete('slow', task_id, result(2))
+    assert future.result(timeout=0) == 1
+
+
+def test_closed_broker_ends_the_workers():
+    broker = _Broker(lease=10, max_retries=0)
+    broker.close(cancel=False)
+    with pytest.raises(EOFError):
+        broker.claim('w', timeout=1)
+    with pytest.raises(RuntimeError):
+        broker.put(payload(0), future=Future())
+
+
+def test_results_of_clients_are_collected_in_outboxes():
+    broker = _Broker(lease=10, max_retries=0)
+    task_id = broker.put(payload(0), group='run', client='c')
+    assert broker.results('c', timeout=0) == []
+    claimed, _ = broker.claim('w', timeout=0)
+    broker.complete('w', claimed, result(7))
+    assert broker.results('c', timeout=0) == [(task_id, result(7))]
+
+
+def test_executor_runs_tasks_on_local_workers():
+    with DistributedExecutor(n_workers=2, lease=2) as executor:
+        assert list(executor.map(operator.mul, range(20), range(20))) == [i * i for i in range(20)]
+        group = executor.group('run', weight=2)
+        assert group.submit(operator.add, 1, 2).result(timeout=30) == 3
+        with pytest.raises(ZeroDivisionError):
+            executor.submit(operator.truediv, 1, 0).result(timeout=30)
+    with pytest.raises(RuntimeError):
+        executor.submit(operator.neg, 1)
+
+
+def configuration_x(experiment, scenario):
+    return experiment.configuration['x']
+
+
+def test_lost_tasks_only_fail_their_experiment():
+    experiments = [Experiment(configuration_id=str(x), instance_id='1', instance=None, seed=1, configuration={'x': x})
+                   for x in range(2)]
+    with DistributedExecutor(lease=0.2, max_retries=0) as executor:
+        broker = executor._broker
+
+        def workers():
+            # The first task is claimed by a worker that dies, the second one is executed
+            broker.claim('dead', timeout=10)
+            task_id, task = broker.claim('alive', timeout=10)
+            broker.complete('alive', task_id, _execute(task))
+
+        thread = threading.Thread(target=workers)
+        thread.start()
+        scenario = Scenario(max_experiments=10, executor=executor, cache=MemoryCache())
+        results = execute_experiments(configuration_x, experiments, scenario)
+        thread.join()
+
+    assert 'giving up after 0 retries' in results[0]['error']
+    assert results[1] == {'cost': 1.0}
+    assert len(scenario.cache) == 1
+
+
+def test_invalid_arguments_are_rejected():
+    with pytest.raises(ValueError):
+        DistributedExecutor(lease=0)
+    with pytest.raises(ValueError):
+        DistributedExecutor(max_retries=-1)
@@ -0,0 +1,105 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from irace import irace, multi_irace, batched, Experiment, ParameterSpace, Real, Run, Scenario
+from irace.base import _check_progress
+from irace.events import Monitor
+
+
+def target_runner(experiment, scenario):
+    return experiment.configuration['x']
+
+
+parameter_space = ParameterSpace([Real('x', 0, 1)])
+
+
+def experiments(n):
+    return [Experiment(configuration_id=str(i), instance_id='1', instance=None, seed=1, configuration={'x': i})
+            for i in range(n)]
+
+
+@pytest.mark.parametrize('criterion', [dict(max_target_time=10.0), dict(stop_when=lambda progress: False)])
+def test_termination_criteria_are_rejected_with_forked_experiments(criterion):
+    scenario = Scenario(max_experiments=100, n_jobs=2, **criterion)
+    with pytest.raises(ValueError, match='need `n_jobs=1`'):
+        irace(target_runner, parameter_space, scenario)
+    with pytest.raises(ValueError, match='need `n_jobs=1`'):
+        multi_irace([Run(target_runner, parameter_space, scenario)], joblib=True)
+
+
+def test_experiment_callbacks_are_rejected_with_forked_experiments():
+    scenario = Scenario(max_experiments=100, n_jobs=2)
+    with pytest.raises(ValueError, match='need `n_jobs=1`'):
+        irace(target_runner, parameter_space, scenario, on_experiment=print)
+    with pytest.raises(ValueError, match='need `n_jobs=1`'):
+        multi_irace([Run(target_runner, parameter_space, scenario)], on_experiment=print)
+
+
+def test_experiments_of_batched_target_runners_and_executors_are_tracked():
+    # R calls `targetRunnerParallel` in this process
+    scenario = Scenario(max_experiments=100, n_jobs=2, max_target_time=10.0)
+    _check_progress(Run(batched(lambda experiments, scenario: [0.0] * len(experiments)), parameter_space, scenario),
+                    on_experiment=print)
+    with ThreadPoolExecutor() as executor:
+        _check_progress(Run(target_runner, parameter_space, scenario.replace(n_jobs=1, executor=executor)),
+                        on_experiment=print)
+
+
+def test_completed_experiments_update_the_progress():
+    events = []
+    monitor = Monitor(Scenario(max_experiments=100), on_experiment=events.append, name='run')
+    monitor.completed(experiments(2), [{'cost': 3.0, 'time': 1.5}, {'cost': 2.0}])
+    progress = monitor.progress()
+    assert (progress.n_experiments, progress.budget, progress.best_cost, progress.target_time) == (2, 100, 2.0, 1.5)
+    assert [(event.run, event.result['cost'], event.progress.n_experiments) for event in events] == \
+        [('run', 3.0, 1), ('run', 2.0, 2)]
+    assert not monitor.can_stop and not monitor.should_stop()
+
+
+@pytest.mark.parametrize('criterion, reason', [
+    (dict(max_target_time=2.0), 'target runner time budget exhausted'),
+    (dict(stop_when=lambda progress: progress.best_cost < 1), 'stopping criterion met'),
+])
+def test_termination_criteria_stop_the_run(criterion, reason):
+    monitor = Monitor(Scenario(max_experiments=100, **criterion))
+    assert monitor.can_stop and monitor.watches_iterations
+    monitor.completed(experiments(1), [{'cost': 1.0, 'time': 1.0}])
+    assert not monitor.should_stop()
+    monitor.completed(experiments(1), [{'cost': 0.5, 'time': 1.0}])
+    assert monitor.should_stop() and monitor.stop_reason == reason
+    assert monitor.stop_result() == {'cost': math.inf, 'error': f'stopped from Python: {reason}'}
+
+
+def test_wallclock_time_stops_the_run():
+    monitor = Monitor(Scenario(max_experiments=100, max_wallclock_time=0.1))
+    assert not monitor.should_stop()
+    time.sleep(0.1)
+    assert monitor.should_stop() and monitor.stop_reason == 'wallclock time budget exhausted'
+
+
+def test_cancelled_runs_stop_with_the_first_reason():
+    cancelled = threading.Event()
+    monitor = Monitor(Scenario(max_experiments=100, max_target_time=1.0), cancelled=cancelled)
+    assert monitor.can_stop and not monitor.should_stop()
+    cancelled.set()
+    assert monitor.should_stop() and monitor.stop_reason == 'cancelled'
+    monitor.completed(experiments(1), [{'cost': 1.0, 'time': 1.0}])
+    assert monitor.should_stop() and monitor.stop_reason == 'cancelled'
+
+
+def test_new_iterations_are_read_from_the_log_file(tmp_path):
+    log_file = tmp_path / 'irace.Rdata'
+    iterations, elites = [], []
+    monitor = Monitor(Scenario(max_experiments=100), log_file=log_file, on_elites=elites.append,
+                      read_elites=lambda path: (int(path.read_text()), [{'x': 0.5}]),
+                      on_iteration=lambda event: iterations.append((event.iteration, event.progress.iteration)))
+    monitor.poll()
+    log_file.write_text('1')
+    monitor.poll()
+    monitor.poll()
+    assert iterations == [(1, 1)] and elites == [[{'x': 0.5}]]
+    assert monitor.elites == [{'x': 0.5}]
@@ -0,0 +1,98 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from irace import Experiment, Scenario, batched
+from irace.execution import execute_experiments, uses_target_runner_parallel
+
+
+def experiments(*instances):
+    return [Experiment(configuration_id='1', instance_id=str(i), instance=instance, seed=1, configuration={'x': 1})
+            for i, instance in enumerate(instances)]
+
+
+def sleep_for_instance(experiment, scenario):
+    time.sleep(experiment.instance)
+    return experiment.instance
+
+
+def count_scenario_instances(experiment, scenario):
+    return 0 if scenario.instances is None else len(scenario.instances)
+
+
+@batched
+def instance_costs(experiments, scenario):
+    return np.array([experiment.instance for experiment in experiments], dtype=float)
+
+
+@batched
+def instance_costs_and_times(experiments, scenario):
+    return np.array([[experiment.instance, 2 * experiment.instance] for experiment in experiments])
+
+
+@batched
+def one_cost(experiments, scenario):
+    return [1.0]
+
+
+@batched
+def failing(experiments, scenario):
+    raise RuntimeError('cluster unavailable')
+
+
+def test_batched_target_runners_receive_all_experiments_at_once():
+    calls = []
+
+    @batched
+    def runner(experiments, scenario):
+        calls.append(len(experiments))
+        return [(experiment.instance, 1) for experiment in experiments]
+
+    scenario = Scenario(max_experiments=1)
+    assert execute_experiments(runner, experiments(1, 2, 3), scenario) == \
+        [{'cost': 1.0, 'time': 1.0}, {'cost': 2.0, 'time': 1.0}, {'cost': 3.0, 'time': 1.0}]
+    assert calls == [3]
+    assert uses_target_runner_parallel(runner, scenario)
+
+
+def test_batched_target_runners_may_return_arrays():
+    scenario = Scenario(max_experiments=1)
+    assert execute_experiments(instance_costs, experiments(1, 2), scenario) == [{'cost': 1.0}, {'cost': 2.0}]
+    assert execute_experiments(instance_costs_and_times, experiments(1, 2), scenario) == \
+        [{'cost': 1.0, 'time': 2.0}, {'cost': 2.0, 'time': 4.0}]
+
+
+def test_batched_target_runners_fail_the_whole_batch():
+    scenario = Scenario(max_experiments=1)
+    results = execute_experiments(one_cost, experiments(1, 2), scenario)
+    assert all(result['cost'] == float('inf') and 'expected 2 costs' in result['error'] for result in results)
+    results = execute_experiments(failing, experiments(1, 2), scenario)
+    assert results == [{'cost': float('inf'), 'error': 'cluster unavailable'}] * 2
+
+
+def test_executors_keep_the_order_of_the_experiments():
+    with ThreadPoolExecutor(3) as executor:
+        scenario = Scenario(max_experiments=1, executor=executor)
+        assert uses_target_runner_parallel(sleep_for_instance, scenario)
+        # The experiments complete in the reverse order
+        assert execute_experiments(sleep_for_instance, experiments(0.3, 0.2, 0.01), scenario) == \
+            [{'cost': 0.3}, {'cost': 0.2}, {'cost': 0.01}]
+
+
+def test_executors_receive_the_scenario_without_instances():
+    instances = [np.zeros(10), np.ones(10)]
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context('spawn')) as executor:
+        scenario = Scenario(max_experiments=1, instances=instances, executor=executor)
+        assert execute_experiments(count_scenario_instances, experiments(*instances), scenario) == [{'cost': 0.0}] * 2
+    assert count_scenario_instances(None, scenario) == 2
+
+
+def test_executors_resolve_the_timeout_of_each_experiment():
+    with ThreadPoolExecutor(2) as executor:
+        scenario = Scenario(max_experiments=1, executor=executor, timeout_cost=100.0,
+                            timeout=lambda experiment: 0.3 if experiment.instance > 1 else 10)
+        fast, slow = execute_experiments(sleep_for_instance, experiments(0.5, 5), scenario)
+    assert fast == {'cost': 0.5}
+    assert slow['cost'] == 100.0 and 0.3 <= slow['time'] < 2
@@ -0,0 +1,89 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from irace.expressions import RSourceError, compile_expression, evaluate
+from irace.params import ValueOf, RawRCondition, RFuncCall, RLiteral
+
+NA = float('nan')
+
+
+def logical(expression, columns):
+    """The raw three-valued result, with NaN for NA."""
+    return np.broadcast_to(compile_expression(expression)(columns), (len(next(iter(columns.values()))),)).tolist()
+
+
+def same(left, right):
+    return all((math.isnan(a) and math.isnan(b)) or a == b for a, b in zip(left, right))
+
+
+def test_comparisons_with_na_are_na():
+    columns = {'x': np.array([1.0, NA, 3.0])}
+    assert same(logical(ValueOf('x').ge(2), columns), [0.0, NA, 1.0])
+    assert same(logical(ValueOf('x').eq(1), columns), [1.0, NA, 0.0])
+
+
+def test_and_or_not_follow_three_valued_logic():
+    columns = {'x': np.array([NA, NA, NA, 1.0, 3.0]), 'y': np.array([0.0, 2.0, NA, NA, NA])}
+    x, y = ValueOf('x').ge(2), ValueOf('y').ge(1)
+    # FALSE & NA is FALSE, TRUE & NA and NA & NA are NA
+    assert same(logical(x.both(y), columns), [0.0, NA, NA, 0.0, NA])
+    # TRUE | NA is TRUE, FALSE | NA and NA | NA are NA
+    assert same(logical(x.one(y), columns), [NA, 1.0, NA, NA, 1.0])
+    assert same(logical(x.negate(), columns), [NA, NA, NA, 1.0, 0.0])
+
+
+def test_in_is_never_na():
+    columns = {'mode': np.array(['a', None, 'c'], dtype=object)}
+    assert logical(ValueOf('mode').isin(['a', 'b']), columns) == [1.0, 0.0, 0.0]
+    assert logical(ValueOf('mode').notin(['a', 'b']), columns) == [0.0, 1.0, 1.0]
+
+
+def test_na_counts_as_false_in_conditions():
+    configurations = [{'x': 1.0}, {'x': None}, {'x': 3.0}]
+    assert evaluate(ValueOf('x').ge(2), configurations).tolist() == [False, False, True]
+    assert evaluate(ValueOf('x').ge(2).negate(), configurations).tolist() == [True, False, False]
+
+
+def test_missing_parameters_are_na():
+    assert ValueOf('beta').ge(1).evaluate({'alpha': 2}) is False
+    assert ValueOf('beta').ge(1).negate().evaluate({'alpha': 2}) is False
+    assert ValueOf('beta').isin(['a']).evaluate({'alpha': 2}) is False
+    assert ValueOf('beta').ge(1).one(ValueOf('alpha').ge(1)).evaluate({'alpha': 2}) is True
+    assert math.isnan(ValueOf('beta').min(3).evaluate({'alpha': 2}))
+
+
+def test_numbers_are_compared_with_strings_like_r():
+    # R coerces the number to a string, 10 becomes "10" and TRUE becomes "TRUE"
+    assert ValueOf('size').eq(10).evaluate({'size': '10'}) is True
+    assert ValueOf('flag').eq(True).evaluate({'flag': 'TRUE'}) is True
+    assert ValueOf('flag').eq('TRUE').evaluate({'flag': True}) is True
+
+
+def test_functions_and_arithmetic():
+    configuration = {'a': 2.5, 'b': 4.0}
+    assert ValueOf('a').max(3).evaluate(configuration) == 3.0
+    assert RFuncCall('min', ValueOf('a'), ValueOf('b'), RLiteral(1)).evaluate(configuration) == 1.0
+    assert RFuncCall('round', ValueOf('a'), digits=RLiteral(0)).evaluate(configuration) == 2.0
+    assert RFuncCall('ceiling', ValueOf('a')).evaluate(configuration) == 3.0
+
+
+def test_batches_are_evaluated_column_wise():
+    frame = pd.DataFrame({'x': pd.array([1, None, 5], dtype='Int64'), 'mode': ['a', 'b', None]})
+    condition = ValueOf('x').ge(2).both(ValueOf('mode').isin(['a', 'b']).negate())
+    assert evaluate(condition, frame).tolist() == [False, False, True]
+    assert evaluate(ValueOf('x').ge(2), {'x': [1, 3]}).tolist() == [False, True]
+
+
+def test_r_source_cannot_be_compiled():
+    with pytest.raises(RSourceError):
+        compile_expression(RawRCondition('x > 1'))
+    with pytest.raises(RSourceError):
+        compile_expression('log(x)')
+    assert compile_expression('2.5')({}) == 2.5
+
+
+def test_compiled_expressions_are_memoized():
+    assert compile_expression(ValueOf('x').ge(2)) is compile_expression(ValueOf('x').ge(2))
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ['rpy2', 'pandas', 'numpy', 'multiprocessing', 'asyncio', 'irace._rpy2', 'irace.supervisor',
+                 'irace.distributed', 'irace.instances', 'irace.testing']
+
+
+def imported_modules(code):
+    # A fresh interpreter, as the tests themselves import most of these modules
+    output = subprocess.run([sys.executable, '-c', f'{code}\nimport sys\nprint(*sys.modules)'],
+                            capture_output=True, text=True, check=True).stdout
+    return set(output.split())
+
+
+def test_import_does_not_load_r_or_heavy_dependencies():
+    modules = imported_modules('import irace')
+    assert [name for name in HEAVY_MODULES if name in modules] == []
+
+
+@pytest.mark.parametrize('name, module', [('SharedInstanceStore', 'irace.instances'),
+                                          ('DistributedExecutor', 'irace.distributed'),
+                                          ('evaluate_elites', 'irace.testing')])
+def test_optional_features_are_imported_on_first_use(name, module):
+    modules = imported_modules(f'import irace\nirace.{name}')
+    assert module in modules and 'rpy2' not in modules
+
+
+def test_unknown_attributes():
+    import irace
+    with pytest.raises(AttributeError):
+        irace.Unknown
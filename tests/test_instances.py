@@ -0,0 +1,124 @@
+import gc
+import multiprocessing
+import os
+import pickle
+import weakref
+
+import numpy as np
+import pytest
+
+from irace import LazyInstanceStore, SharedInstanceStore
+from irace.instances import InstanceView
+
+
+def describe(instance):
+    return {key: (type(value).__name__, np.asarray(value).tolist()) for key, value in instance.items()}
+
+
+def read_in_child(store, index, queue):
+    queue.put(describe(store[index]))
+
+
+@pytest.fixture(params=['shm', 'memmap'])
+def backend(request):
+    return request.param
+
+
+def test_arrays_are_shared_as_read_only_views(backend):
+    with SharedInstanceStore([np.arange(5.0), {'a': np.ones((2, 2)), 'n': 3}], backend=backend) as store:
+        assert len(store) == 2
+        assert isinstance(store[0], InstanceView) and store[0].tolist() == [0, 1, 2, 3, 4]
+        assert store[1]['n'] == 3
+        with pytest.raises(ValueError):
+            store[0][0] = 1
+        assert pickle.loads(pickle.dumps(store[1]['a'])).tolist() == [[1, 1], [1, 1]]
+
+
+def test_views_are_pickled_as_references(backend):
+    with SharedInstanceStore([np.zeros(100_000)], backend=backend) as store:
+        assert len(pickle.dumps(store[0])) < 1000
+        assert len(pickle.dumps(store)) < 1000
+
+
+def test_spawned_processes_read_the_shared_data(backend):
+    instance = {'numbers': np.arange(3), 'objects': np.array(['a', {'b': 1}], dtype=object)}
+    with SharedInstanceStore([instance], backend=backend) as store:
+        context = multiprocessing.get_context('spawn')
+        queue = context.Queue()
+        process = context.Process(target=read_in_child, args=(store, 0, queue))
+        process.start()
+        result = queue.get(timeout=60)
+        process.join(timeout=60)
+    assert process.exitcode == 0
+    assert result['numbers'] == ('InstanceView', [0, 1, 2])
+    # Arrays of Python objects cannot be shared and are pickled as usual
+    assert result['objects'] == ('ndarray', ['a', {'b': 1}])
+
+
+def test_closing_releases_the_data(tmp_path):
+    store = SharedInstanceStore([np.ones(3)], backend='memmap')
+    store.close()
+    assert not os.path.exists(store.directory)
+    explicit = SharedInstanceStore([np.ones(3)], backend='memmap', directory=tmp_path)
+    explicit.close()
+    assert list(tmp_path.iterdir())
+
+
+def test_views_are_released_once_the_store_is_closed(backend):
+    store = SharedInstanceStore([np.arange(3.0)], backend=backend)
+    view = store[0]
+    assert store[0] is view
+    reference = weakref.ref(view)
+    store.close()
+    # Views that are still in use stay valid
+    assert view.tolist() == [0, 1, 2]
+    del view
+    gc.collect()
+    assert reference() is None
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        SharedInstanceStore([], backend='disk')
+
+
+def test_lazy_store_loads_on_first_access(tmp_path):
+    paths = []
+    for i in range(3):
+        paths.append(tmp_path / f'{i}.npy')
+        np.save(paths[-1], np.full(4, i))
+    loaded = []
+
+    def load(path):
+        loaded.append(path)
+        return np.load(path)
+
+    store = LazyInstanceStore(paths, load=load, maxsize=2)
+    assert loaded == []
+    assert store[1].tolist() == [1] * 4 and store[1].tolist() == [1] * 4
+    assert loaded == [paths[1]]
+    store[0], store[2], store[1]
+    assert loaded == [paths[1], paths[0], paths[2], paths[1]]
+    assert store[-1].tolist() == [2] * 4
+
+
+def test_lazy_store_pickles_only_the_paths(tmp_path):
+    path = tmp_path / 'instance.npy'
+    np.save(path, np.zeros(100_000))
+    store = LazyInstanceStore([path])
+    assert isinstance(store[0], InstanceView)
+    copy = pickle.loads(pickle.dumps(store))
+    assert len(pickle.dumps(store)) < 1000
+    assert copy[0].shape == (100_000,)
+
+
+def test_lazy_store_releases_evicted_instances(tmp_path):
+    paths = []
+    for i in range(2):
+        paths.append(tmp_path / f'{i}.npy')
+        np.save(paths[-1], np.full(4, i))
+    store = LazyInstanceStore(paths, maxsize=1)
+    reference = weakref.ref(store[0])
+    assert store[1].tolist() == [1] * 4
+    gc.collect()
+    assert reference() is None
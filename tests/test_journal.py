@@ -0,0 +1,89 @@
+import json
+
+from irace import Experiment, Journal, Scenario
+from irace.execution import execute_experiments
+
+
+def experiments(n):
+    return [Experiment(configuration_id=str(i), instance_id='1', instance=i, seed=i, configuration={'x': i})
+            for i in range(n)]
+
+
+def square(experiment, scenario):
+    return experiment.instance ** 2
+
+
+def fail(experiment, scenario):
+    raise AssertionError('should have been replayed')
+
+
+def test_resume_replays_the_journal(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    with Journal(path) as journal:
+        results = execute_experiments(square, experiments(3), Scenario(max_experiments=1, journal=journal))
+    assert journal._file.closed
+
+    journal = Journal(path, resume=True)
+    assert execute_experiments(fail, experiments(3), Scenario(max_experiments=1, journal=journal)) == results
+    assert journal.replayed == 3
+    journal.close()
+
+
+def test_without_resume_nothing_is_replayed(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    journal = Journal(path)
+    execute_experiments(square, experiments(2), Scenario(max_experiments=1, journal=journal))
+    journal.close()
+    journal = Journal(path)
+    execute_experiments(square, experiments(2), Scenario(max_experiments=1, journal=journal))
+    assert journal.replayed == 0
+    journal.close()
+    assert len(path.read_text().splitlines()) == 4
+
+
+def test_partially_written_records_are_skipped(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    journal = Journal(path)
+    execute_experiments(square, experiments(2), Scenario(max_experiments=1, journal=journal))
+    journal.close()
+    with open(path, 'a') as file:
+        file.write('{"key": "trunc')
+
+    journal = Journal(path, resume=True)
+    results = execute_experiments(square, experiments(3), Scenario(max_experiments=1, journal=journal))
+    assert journal.replayed == 2
+    assert results[2] == {'cost': 4.0}
+    journal.close()
+    # The partial record is terminated, so that the new record stays readable
+    assert json.loads(path.read_text().splitlines()[-1])['result'] == {'cost': 4.0}
+
+
+def test_failed_experiments_are_executed_again(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+
+    def flaky(experiment, scenario):
+        if experiment.instance == 1:
+            raise ChildProcessError('the worker died')
+        return square(experiment, scenario)
+
+    journal = Journal(path)
+    results = execute_experiments(flaky, experiments(3), Scenario(max_experiments=1, journal=journal))
+    assert 'error' in results[1]
+    journal.close()
+    assert len(path.read_text().splitlines()) == 2
+
+    journal = Journal(path, resume=True)
+    results = execute_experiments(square, experiments(3), Scenario(max_experiments=1, journal=journal))
+    assert results[1] == {'cost': 1.0}
+    assert journal.replayed == 2
+    journal.close()
+
+
+def test_errors_in_older_journals_are_not_replayed(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    [experiment] = experiments(1)
+    path.write_text(json.dumps(dict(key=Journal.key(experiment), result={'cost': float('inf'), 'error': 'lost'}))
+                    + '\n')
+    journal = Journal(path, resume=True)
+    assert execute_experiments(square, [experiment], Scenario(max_experiments=1, journal=journal)) == [{'cost': 0.0}]
+    journal.close()
@@ -0,0 +1,64 @@
+import pickle
+
+import pytest
+
+from irace import Experiment, Journal, MemoryCache, ParameterSpace, Profiler, Real, Run, Scenario, SQLiteCache
+from irace.base import _merge_profiler, _portable_state
+
+# Used by joblib to pickle the runs
+cloudpickle = pytest.importorskip('cloudpickle')
+
+
+def target_runner(experiment, scenario):
+    return experiment.configuration['x']
+
+
+def experiment(x):
+    return Experiment(configuration_id='1', instance_id='1', instance=None, seed=1, configuration={'x': x})
+
+
+def in_other_process(run):
+    """The scenario a run of `imulti_irace` in a joblib worker gets."""
+    scenario, state = cloudpickle.loads(cloudpickle.dumps((run.scenario, _portable_state(run))))
+    return scenario.replace(**state)
+
+
+def test_runs_in_other_processes_keep_the_cache_and_journal(tmp_path):
+    cache = SQLiteCache(tmp_path / 'cache.db')
+    journal = Journal(tmp_path / 'journal.jsonl')
+    stop_when = lambda progress: False  # noqa: E731
+    run = Run(target_runner, ParameterSpace([Real('x', 0, 1)]),
+              Scenario(max_experiments=10, cache=cache, journal=journal, stop_when=stop_when, timeout=5.0))
+
+    scenario = in_other_process(run)
+    assert scenario.timeout == 5.0 and scenario.stop_when is not None
+    key = scenario.cache.key(experiment(0.5), deterministic=False)
+    scenario.cache.put(key, {'cost': 0.5})
+    scenario.journal.record(experiment(0.5), {'cost': 0.5})
+    scenario.journal.close()
+
+    assert cache.get(key) == {'cost': 0.5}
+    assert Journal(tmp_path / 'journal.jsonl', resume=True).replay(experiment(0.5)) == {'cost': 0.5}
+
+
+def test_memory_caches_are_copied():
+    cache = MemoryCache()
+    key = cache.key(experiment(0.5), deterministic=False)
+    cache.put(key, {'cost': 0.5})
+    run = Run(target_runner, ParameterSpace([Real('x', 0, 1)]), Scenario(max_experiments=10, cache=cache))
+    copy = in_other_process(run).cache
+    assert copy is not cache and copy.get(key) == {'cost': 0.5}
+    assert pickle.loads(pickle.dumps(cache)).get(key) == {'cost': 0.5}
+
+
+def test_profilers_of_runs_in_other_processes_are_merged():
+    profiler = Profiler()
+    run = Run(target_runner, ParameterSpace([Real('x', 0, 1)]), Scenario(max_experiments=10, profiler=profiler))
+
+    other = in_other_process(run).profiler
+    assert other is not profiler
+    other.returned(other.call(), experiments=3)
+    _merge_profiler(run, other)
+    _merge_profiler(run, other)
+    assert profiler.calls == 2 and profiler.experiments == 6
+    assert profiler.sections['encode'].count == 2
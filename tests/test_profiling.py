@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from irace import Profiler
+from irace.profiling import BUCKETS, SECTIONS, Histogram
+
+
+def profile_call(profiler, experiments=1, seconds=0.01):
+    start = profiler.call()
+    start = profiler.lap('decode', start)
+    time.sleep(seconds)
+    start = profiler.lap('target', start)
+    profiler.returned(start, experiments)
+
+
+def test_calls_are_split_into_sections():
+    profiler = Profiler()
+    profiler.start()
+    profile_call(profiler, experiments=3)
+    time.sleep(0.01)
+    profile_call(profiler, experiments=2)
+    profiler.finish()
+    assert (profiler.calls, profiler.experiments) == (2, 5)
+    assert {name: histogram.count for name, histogram in profiler.sections.items() if histogram.count} == \
+        {'decode': 2, 'target': 2, 'encode': 2, 'r': 2}
+    assert profiler.sections['target'].sum >= 0.02 and profiler.sections['r'].sum >= 0.01
+    assert sum(profiler.share(name) for name in SECTIONS) == pytest.approx(1)
+    assert profiler.share('target') > profiler.share('decode')
+
+
+def test_time_before_the_first_call_is_not_accounted_to_r():
+    profiler = Profiler()
+    profiler.start()
+    time.sleep(0.01)
+    profiler.call()
+    profiler.finish()
+    assert profiler.sections['r'].count == 0 and profiler.total == 0 and profiler.share('r') == 0
+
+
+def test_histogram_quantiles_are_bucket_bounds():
+    histogram = Histogram()
+    for seconds in [1e-5] * 98 + [0.3, 2.0]:
+        histogram.record(seconds)
+    assert histogram.quantile(0.5) == pytest.approx(1e-5)
+    assert histogram.quantile(0.99) == 0.5
+    # The upper bound is limited by the largest duration
+    assert histogram.quantile(1.0) == 2.0
+    assert histogram.mean == pytest.approx((98e-5 + 2.3) / 100)
+
+
+def test_profilers_are_merged():
+    first, second = Profiler(), Profiler()
+    profile_call(first, seconds=0)
+    profile_call(second, experiments=2, seconds=0)
+    first.merge(second)
+    assert (first.calls, first.experiments, first.sections['target'].count) == (2, 3, 2)
+
+
+def test_openmetrics_export():
+    profiler = Profiler()
+    profile_call(profiler)
+    lines = profiler.to_openmetrics(prefix='tuning').splitlines()
+    assert 'tuning_calls_total 1' in lines and 'tuning_experiments_total 1' in lines
+    assert 'tuning_section_seconds_bucket{section="target",le="+Inf"} 1' in lines
+    assert 'tuning_section_seconds_bucket{section="target",le="0.001"} 0' in lines
+    assert 'tuning_section_seconds_count{section="r"} 0' in lines
+    assert lines[-1] == '# EOF'
+    assert len([line for line in lines if line.startswith('tuning_section_seconds_bucket')]) == \
+        len(SECTIONS) * (len(BUCKETS) + 1)
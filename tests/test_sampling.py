@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from irace import ParameterSpace, Real, Integer, Categorical, Ordinal, Bool
+from irace.params import ValueOf
+from irace.sampling import _sorted_subspaces
+
+
+def test_parameters_come_after_their_dependencies():
+    space = ParameterSpace([
+        Real('c', ValueOf('b'), 10),
+        Real('b', 0, ValueOf('a')),
+        Categorical('mode', ['x', 'y'], condition=ValueOf('a').ge(1)),
+        Real('a', 1, 2),
+    ])
+    order = [subspace.name for subspace in _sorted_subspaces(space)]
+    assert order.index('a') < order.index('b') < order.index('c')
+    assert order.index('a') < order.index('mode')
+
+
+def test_cyclic_dependencies_are_rejected():
+    space = ParameterSpace([Real('a', 0, ValueOf('b')), Real('b', 0, ValueOf('a'))])
+    with pytest.raises(ValueError, match='cyclic'):
+        space.sample(1)
+
+
+def test_dependent_bounds_are_respected():
+    space = ParameterSpace([Real('a', 1, 10), Real('b', 0, ValueOf('a'))])
+    frame = space.sample(1000, seed=1, return_df=True)
+    assert (frame['b'] <= frame['a']).all()
+    assert (frame['b'] >= 0).all()
+
+
+def test_integers_cover_both_bounds():
+    space = ParameterSpace([Integer('n', 1, 3)])
+    frame = space.sample(1000, seed=1, return_df=True)
+    assert frame['n'].dtype == 'Int64'
+    assert set(frame['n']) == {1, 2, 3}
+
+
+def test_log_scale_is_uniform_in_the_exponent():
+    space = ParameterSpace([Real('lr', 1e-4, 1, log=True)])
+    values = np.array([configuration['lr'] for configuration in space.sample(4000, seed=1)])
+    assert values.min() >= 1e-4 and values.max() <= 1
+    # Every decade gets about a quarter of the samples
+    counts, _ = np.histogram(np.log10(values), bins=4, range=(-4, 0))
+    assert counts.min() > 800
+
+
+def test_lower_bound_greater_than_upper_bound_fails():
+    space = ParameterSpace([Real('a', 0, 1), Real('b', ValueOf('a').max(3), 2)])
+    with pytest.raises(ValueError, match='lower bound of b'):
+        space.sample(100, seed=1)
+
+
+def test_inactive_parameters_are_missing():
+    space = ParameterSpace([
+        Categorical('algorithm', ['sa', 'ga']),
+        Real('temperature', 0, 1, condition=ValueOf('algorithm').eq('sa')),
+        Bool('elitism', condition=ValueOf('algorithm').eq('ga')),
+    ])
+    for configuration in space.sample(200, seed=1):
+        if configuration['algorithm'] == 'sa':
+            assert configuration['temperature'] is not None and configuration['elitism'] is None
+        else:
+            assert configuration['temperature'] is None and configuration['elitism'] in (True, False)
+
+
+def test_forbidden_configurations_are_redrawn():
+    space = ParameterSpace([Real('a', 0, 1), Real('b', 0, 1)],
+                           forbidden=[ValueOf('a').ge(0.5).both(ValueOf('b').ge(0.5))])
+    frame = space.sample(2000, seed=1, return_df=True)
+    assert len(frame) == 2000
+    assert ((frame['a'] <= 0.5) | (frame['b'] <= 0.5)).all()
+    assert not space.is_forbidden(frame).any()
+
+
+def test_sampling_fails_if_everything_is_forbidden():
+    space = ParameterSpace([Real('a', 0, 1)], forbidden=[ValueOf('a').geq(0)])
+    with pytest.raises(ValueError, match='could not sample'):
+        space.sample(10, seed=1)
+
+
+def test_samples_are_reproducible():
+    space = ParameterSpace([Real('a', 0, 1), Ordinal('size', ['s', 'm', 'l'])])
+    pd.testing.assert_frame_equal(space.sample(50, seed=7, return_df=True), space.sample(50, seed=7, return_df=True))
+
+
+def test_validate_reports_the_problems():
+    space = ParameterSpace([
+        Categorical('algorithm', ['sa', 'ga']),
+        Integer('n', 1, 10),
+        Real('temperature', 0, 1, condition=ValueOf('algorithm').eq('sa')),
+    ])
+    space.validate([{'algorithm': 'sa', 'n': 3, 'temperature': 0.5}, {'algorithm': 'ga', 'n': 10}])
+    problems = space.sampler.errors([
+        {'algorithm': 'ga', 'n': 3, 'temperature': 0.5},
+        {'algorithm': 'sa', 'n': 11},
+        {'algorithm': 'es', 'n': 2.5, 'extra': 1},
+    ])
+    assert problems[0] == ['temperature is set, but its condition is not satisfied']
+    assert set(problems[1]) == {'n is out of bounds', 'temperature is missing'}
+    assert 'unknown parameters extra' in problems[2]
+    assert 'algorithm is not one of its values' in problems[2]
+    assert 'n is not an integer' in problems[2]
+    with pytest.raises(ValueError, match='configuration 0 is invalid'):
+        space.validate([{'algorithm': 'ga', 'n': 0}])
+
+
+def test_sampler_follows_changes_of_the_parameter_space():
+    space = ParameterSpace([Real('a', 0, 1)])
+    assert space.sample(10, seed=1, return_df=True)['a'].max() <= 1
+    space.params['a'] = Real('a', 5, 6)
+    assert space.sample(10, seed=1, return_df=True)['a'].min() >= 5
@@ -0,0 +1,96 @@
+import multiprocessing
+import operator
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from irace import Experiment, Scenario
+from irace.execution import execute_experiments
+from irace.supervisor import Supervisor
+
+
+def sleep_for_instance(experiment, scenario):
+    time.sleep(experiment.instance)
+    return experiment.instance
+
+
+def experiments(*instances):
+    return [Experiment(configuration_id='1', instance_id=str(i), instance=instance, seed=1, configuration={})
+            for i, instance in enumerate(instances)]
+
+
+@pytest.fixture
+def supervisor():
+    supervisor = Supervisor()
+    yield supervisor
+    supervisor.close()
+
+
+def test_results_are_returned(supervisor):
+    completed, result, elapsed = supervisor.call(10, operator.add, 1, 2)
+    assert completed and result == 3 and elapsed < 10
+
+
+def test_worker_is_killed_on_timeout_and_restarted(supervisor):
+    completed, result, elapsed = supervisor.call(0.2, time.sleep, 5)
+    assert not completed and result is None and 0.2 <= elapsed < 2
+    assert supervisor.call(10, os.getpid)[1] != os.getpid()
+
+
+def test_worker_is_reused(supervisor):
+    assert supervisor.call(10, os.getpid)[1] == supervisor.call(10, os.getpid)[1]
+
+
+def test_unpicklable_tasks_fail_without_losing_the_worker(supervisor):
+    pid = supervisor.call(10, os.getpid)[1]
+    with pytest.raises(pickle.PicklingError):
+        supervisor.call(10, operator.add, lambda: 0, 1)
+    assert supervisor.call(10, os.getpid)[1] == pid
+
+
+def test_dead_worker_is_reported(supervisor):
+    with pytest.raises(ChildProcessError):
+        supervisor.call(10, os._exit, 1)
+
+
+def test_timeouts_report_the_timeout_cost():
+    scenario = Scenario(max_experiments=1, timeout=0.3, timeout_cost=100.0)
+    fast, slow = execute_experiments(sleep_for_instance, experiments(0.01, 5), scenario)
+    assert fast == {'cost': 0.01}
+    assert slow['cost'] == 100.0 and 0.3 <= slow['time'] < 2
+
+
+def test_timeout_functions_are_resolved_before_pickling():
+    scenario = Scenario(max_experiments=1, timeout=lambda experiment: 0.3 if experiment.instance > 1 else 10,
+                        timeout_cost=100.0)
+    assert execute_experiments(sleep_for_instance, experiments(0.5, 5), scenario)[1]['cost'] == 100.0
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context('spawn')) as executor:
+        results = execute_experiments(sleep_for_instance, experiments(0.5, 5), scenario.replace(executor=executor))
+    assert results[0] == {'cost': 0.5}
+    assert results[1]['cost'] == 100.0
+
+
+def test_unpicklable_target_runners_fail_the_experiment():
+    [result] = execute_experiments(lambda experiment, scenario: 1.0, experiments(0),
+                                   Scenario(max_experiments=1, timeout=10))
+    assert 'cannot send the task' in result['error']
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')
+def test_forked_processes_start_their_own_worker():
+    # R forks the process driving irace for `Scenario.n_jobs`, which inherits the supervisor of its parent
+    scenario = Scenario(max_experiments=1, timeout=10)
+    assert execute_experiments(sleep_for_instance, experiments(0.01), scenario) == [{'cost': 0.01}]
+    pid = os.fork()
+    if pid == 0:
+        try:
+            [result] = execute_experiments(sleep_for_instance, experiments(0.02), scenario)
+            os._exit(0 if result == {'cost': 0.02} else 1)
+        except BaseException:
+            os._exit(2)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from irace import evaluate_elites, MemoryCache, Scenario
+
+
+def seed_and_instance(experiment, scenario):
+    return experiment.seed + experiment.configuration['x'] * (experiment.instance or 0)
+
+
+def worker_pid(experiment, scenario):
+    return os.getpid()
+
+
+def record(experiments):
+    def target_runner(experiment, scenario):
+        experiments.append(experiment)
+        return experiment.configuration['x']
+
+    return target_runner
+
+
+elites = [{'.ID.': 3.0, 'x': 1}, {'.ID.': 7.0, 'x': 2}]
+
+
+def test_elites_share_reproducible_seeds():
+    scenario = Scenario(max_experiments=1, test_instances=[10, 20], test_repetitions=3, seed=42)
+    costs = evaluate_elites(seed_and_instance, elites, scenario)
+    assert costs.shape == (2, 2, 3)
+    seeds = costs[0] - np.array([[10], [20]])
+    assert np.array_equal(costs[1], seeds + 2 * np.array([[10], [20]]))
+    assert len(np.unique(seeds)) == 6
+    assert np.array_equal(evaluate_elites(seed_and_instance, elites, scenario), costs)
+    assert not np.array_equal(evaluate_elites(seed_and_instance, elites, scenario.replace(seed=43)), costs)
+
+
+def test_test_instances_have_their_own_ids():
+    experiments = []
+    scenario = Scenario(max_experiments=1, instances=['a'], test_instances=['b', 'c'])
+    evaluate_elites(record(experiments), elites, scenario)
+    assert [(experiment.configuration_id, experiment.instance_id, experiment.instance) for experiment in experiments] \
+        == [('3', 'test1', 'b'), ('3', 'test2', 'c'), ('7', 'test1', 'b'), ('7', 'test2', 'c')]
+    assert experiments[0].configuration == {'x': 1}
+
+
+def test_identical_elites_are_evaluated_once():
+    experiments = []
+    costs = evaluate_elites(record(experiments), elites + [{'.ID.': 9, 'x': 1}], Scenario(max_experiments=1))
+    assert costs.reshape(-1).tolist() == [1, 2, 1]
+    assert len(experiments) == 2 and experiments[0].instance_id is None
+
+
+def test_elites_are_limited_and_results_are_cached():
+    cache = MemoryCache()
+    scenario = Scenario(max_experiments=1, test_instances=[1], test_n_elites=1, cache=cache, seed=1)
+    assert evaluate_elites(seed_and_instance, elites, scenario).shape == (1, 1, 1)
+    evaluate_elites(seed_and_instance, elites, scenario)
+    assert cache.hits == 1
+    with pytest.raises(ValueError):
+        evaluate_elites(seed_and_instance, elites, scenario, repetitions=0)
+
+
+def test_results_as_data_frame():
+    frame = evaluate_elites(lambda experiment, scenario: (1.0, 2.0), pd.DataFrame(elites),
+                            Scenario(max_experiments=1, test_instances=['a', 'b'], test_repetitions=2), return_df=True)
+    assert list(frame.columns) == ['configuration_id', 'instance', 'instance_id', 'repetition', 'seed', 'cost', 'time']
+    assert len(frame) == 8
+    assert frame['configuration_id'].tolist() == ['3'] * 4 + ['7'] * 4
+    assert frame['instance_id'].tolist()[:4] == ['test1', 'test1', 'test2', 'test2']
+    assert frame['repetition'].tolist()[:4] == [0, 1, 0, 1]
+    assert (frame['cost'] == 1.0).all() and (frame['time'] == 2.0).all()
+
+
+def test_experiments_run_in_spawned_workers_with_n_jobs():
+    costs = evaluate_elites(worker_pid, elites, Scenario(max_experiments=1, test_instances=[1, 2, 3], n_jobs=2))
+    assert os.getpid() not in costs
+    assert 1 <= len(np.unique(costs)) <= 2
+